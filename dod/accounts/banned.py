@@ -0,0 +1,31 @@
+from django.db.models import Count, Max
+
+from accounts.models import BannedPhoneInfo
+from core.registry import FingerprintedRegistry
+from core.tools import normalize_phone
+
+
+class BannedPhoneRegistry(FingerprintedRegistry):
+    """
+    밴 된 전화번호 set 을 프로세스 안에 들고 있습니다.
+    BannedPhoneInfo 의 (개수, 마지막 수정시간) 이 바뀌었을 때만 다시 읽습니다.
+    """
+    def __init__(self):
+        super(BannedPhoneRegistry, self).__init__()
+        self._phones = frozenset()
+
+    def fetch_fingerprint(self):
+        info = BannedPhoneInfo.objects.aggregate(count=Count('id'), updated_at=Max('updated_at'))
+        return info['count'], info['updated_at']
+
+    def load(self):
+        # 정규화 이전에 저장된 번호도 있을 수 있어서 읽을때 한번 더 정규화합니다.
+        phones = BannedPhoneInfo.objects.values_list('phone', flat=True)
+        self._phones = frozenset(normalize_phone(phone) for phone in phones)
+
+    def is_banned(self, phone):
+        self.refresh()
+        return normalize_phone(phone) in self._phones
+
+
+banned_phones = BannedPhoneRegistry()
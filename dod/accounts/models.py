@@ -2,6 +2,8 @@ from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
 from django.contrib.auth.models import PermissionsMixin
 from django.db import models
 
+from core.tools import normalize_phone
+
 
 class UserManager(BaseUserManager):
     use_in_migrations = True
@@ -78,7 +80,11 @@ class BannedPhoneInfo(models.Model):
     어뷰징, 성의없는 설문을 한 핸드폰 번호 정보들
     추후 유저 및 응답자 인증 시 해당 데이터를 참고해서 밴 여부 확인
     """
-    phone = models.CharField(max_length=20)
+    phone = models.CharField(max_length=20, db_index=True, help_text='숫자만 저장합니다. ex) 01012345678')
     description = models.TextField(help_text='밴 사유', null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    def save(self, *args, **kwargs):
+        self.phone = normalize_phone(self.phone)
+        super(BannedPhoneInfo, self).save(*args, **kwargs)
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.banned import banned_phones
+from accounts.models import BannedPhoneInfo
+
+
+@receiver(post_save, sender=BannedPhoneInfo)
+@receiver(post_delete, sender=BannedPhoneInfo)
+def reload_banned_phones(sender, **kwargs):
+    banned_phones.invalidate()
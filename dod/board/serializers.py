@@ -1,9 +1,11 @@
 import datetime
 
 from django.conf import settings
+from django.db.models import F
 from rest_framework import serializers
 from board.models import Board
-from products.models import Item
+from products.catalog import item_catalog
+from projects.counters import get_counter
 from projects.models import Project
 
 
@@ -34,7 +36,7 @@ class BoardCreateSerializer(serializers.ModelSerializer):
             products_id_list = products.order_by('-item__price').values_list('item', flat=True)
             products_count = products_id_list.count()  # 전체 개수
             products_distinct_count = products_id_list.distinct().count()  # 중복제거 후 개수
-            representative_item = Item.objects.get(id=products_id_list[0])
+            representative_item = item_catalog.get(products_id_list[0])
             if products_distinct_count > 1:
                 # 여러개 기프티콘: 비싼 상품 + 외 개수
                 count = products_count - 1
@@ -53,6 +55,9 @@ class BoardUpdateSerializer(serializers.ModelSerializer):
 
 
 class BoardInfoSerializer(serializers.ModelSerializer):
+    """
+    annotate_queryset 으로 project, owner, 응답자수를 같이 읽은 queryset 을 사용합니다. (게시물 수와 관계없이 한번의 쿼리)
+    """
     total_respondent = serializers.SerializerMethodField()
     period = serializers.SerializerMethodField()
     project_status = serializers.SerializerMethodField()
@@ -62,6 +67,11 @@ class BoardInfoSerializer(serializers.ModelSerializer):
         model = Board
         fields = ['id', 'is_owner', 'form_link', 'title', 'content', 'period', 'reward_text', 'total_respondent', 'is_dod', 'project_status']
 
+    @staticmethod
+    def annotate_queryset(queryset):
+        return queryset.select_related('project', 'owner')\
+            .annotate(respondent_count=F('project__counter__respondent_count'))
+
     @staticmethod
     def get_period(obj):
         if obj.project:
@@ -75,12 +85,12 @@ class BoardInfoSerializer(serializers.ModelSerializer):
     @staticmethod
     def get_total_respondent(obj):
         if obj.project:
-            if obj.owner.is_staff:
-                count = obj.project.respondents.all().count()
-                if count > 50:
-                    count = count + 40
-            else:
-                count = obj.project.respondents.all().count()
+            count = getattr(obj, 'respondent_count', None)
+            if count is None:
+                # counter 가 아직 없는 프로젝트
+                count = get_counter(obj.project).respondent_count
+            if obj.owner.is_staff and count > 50:
+                count = count + 40
         else:
             count = None
         return count
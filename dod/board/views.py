@@ -10,14 +10,14 @@ from rest_framework.views import APIView
 
 from board.models import Board
 from core.permissions import BoardViewPermission
-from projects.models import Project
+from projects.cache import get_project_snapshot
 from board.serializers import BoardCreateSerializer, BoardUpdateSerializer, BoardInfoSerializer
 from core.pagination import DodPagination
 from urllib.request import urlopen, Request
 from bs4 import BeautifulSoup
 import time
 
-from respondent.models import Respondent
+from respondent.counters import get_total_count
 
 
 def _google_info_crawler(form_url):
@@ -66,6 +66,7 @@ def _google_info_crawler(form_url):
 class BoardViewSet(viewsets.ModelViewSet):
     permission_classes = [BoardViewPermission, ]
     queryset = Board.objects.filter(is_active=True).order_by('-id')
+    query_budgets = {'list': 3, 'retrieve': 2}
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -77,6 +78,12 @@ class BoardViewSet(viewsets.ModelViewSet):
         else:
             return super(BoardViewSet, self).get_serializer_class()
 
+    def get_queryset(self):
+        queryset = super(BoardViewSet, self).get_queryset()
+        if self.action in ['retrieve', 'list']:
+            queryset = BoardInfoSerializer.annotate_queryset(queryset)
+        return queryset
+
     @action(methods=['post'], detail=False)
     def check_dod(self, request, *args, **kwargs):
         """
@@ -89,9 +96,10 @@ class BoardViewSet(viewsets.ModelViewSet):
         is_dod = False
         project_id = None
         project_hash_key, valid = _google_info_crawler(google_form_link)
-        if Project.objects.filter(project_hash_key=project_hash_key).exists():
+        project = get_project_snapshot(project_hash_key)
+        if project:
             is_dod = True
-            project_id = Project.objects.get(project_hash_key=project_hash_key).id
+            project_id = project.id
         return Response({"valid": valid, "is_dod": is_dod, "project": project_id})
 
     @transaction.atomic
@@ -165,7 +173,7 @@ class CumulativeDrawsCountAPIView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request, *args, **kwargs):
-        respondents = Respondent.objects.all().count()
+        respondents = get_total_count()
         count = 4000 + respondents
         if count >= 1000000:
             value = "%.0f%s" % (count / 1000000.00, 'M+')
@@ -1,13 +1,9 @@
 import string
-import time
 
 import random
-import json
 from accounts.models import PhoneConfirm
-from core.sms.signature import time_stamp, make_signature
+from core.sens import alim_client
 from respondent.models import RespondentPhoneConfirm
-from ..loader import load_credential
-import requests
 import uuid
 
 
@@ -32,28 +28,8 @@ class ALIMV1Manager():
 
 
     def send_alim(self, phone):
-        alim_dic = load_credential("alim")
-        access_key = alim_dic["access_key"]
-        url = "https://sens.apigw.ntruss.com"
-        uri = "/alimtalk/v2/services/" + alim_dic["serviceId"] + "/messages"
-        api_url = url + uri
-        timestamp = str(int(time.time() * 1000))
-        string_to_sign = "POST " + uri + "\n" + timestamp + "\n" + access_key
-        signature = make_signature(string_to_sign)
-
-        headers = {
-            'Content-Type': 'application/json; charset=utf-8',
-            'x-ncp-apigw-timestamp': timestamp,
-            'x-ncp-iam-access-key': access_key,
-            'x-ncp-apigw-signature-v2': signature
-        }
-
         self.body['messages'][0]['to'] = phone
         # TODO: message content template 규격 맞춰야함
         self.body['messages'][0]['content'] = phone
 
-        request = requests.post(api_url, headers=headers, data=json.dumps(self.body))
-        if request.status_code == 202:
-            return True
-        else:
-            return False
+        return alim_client.post(self.body) == 202
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework import status
+from rest_framework.response import Response
+
+# staff 가 가끔 수정하는 내용(공지, 메뉴, 상품목록 등)을 group 단위 version key 로 캐시합니다.
+# 모델이 수정되면 signal 에서 bump_content_version(group) 을 호출하여 이전 캐시를 더이상 읽지 않습니다.
+NOTICE = 'notice'
+PAYMENT = 'payment'
+PRODUCTS = 'products'
+
+
+def _version_key(group):
+    return 'content:version:{}'.format(group)
+
+
+def _content_version(group):
+    key = _version_key(group)
+    version = cache.get(key)
+    if version is None:
+        # 캐시가 비워진 경우 이전 version 과 겹치지 않도록 현재 시간으로 시작합니다.
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_content_version(group):
+    try:
+        cache.incr(_version_key(group))
+    except ValueError:
+        cache.add(_version_key(group), int(time.time() * 1000), None)
+
+
+def get_content(name, groups, build):
+    """
+    :param name: 캐시 이름 (api 별)
+    :param groups: 이 내용이 의존하는 group list, 하나라도 version 이 바뀌면 다시 만듭니다.
+    :param build: 캐시가 없을 때 내용을 만드는 함수 (json 으로 변환 가능한 값)
+    :return: (data, etag)
+    """
+    versions = ':'.join('{}'.format(_content_version(group)) for group in groups)
+    key = 'content:{}:{}'.format(name, versions)
+    content = cache.get(key)
+    if content is None:
+        body = json.dumps(build(), cls=DjangoJSONEncoder, ensure_ascii=False)
+        etag = '"{}"'.format(hashlib.md5(body.encode('utf-8')).hexdigest())
+        content = (json.loads(body), etag)
+        cache.set(key, content, settings.CONTENT_CACHE_TIMEOUT)
+    return content
+
+
+def content_response(request, name, groups, build):
+    """
+    get_content 로 읽은 내용을 ETag 와 같이 내려줍니다. If-None-Match 가 같으면 304 를 리턴합니다.
+    """
+    data, etag = get_content(name, groups, build)
+    if etag in [tag.strip() for tag in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(data, status=status.HTTP_200_OK)
+    response['ETag'] = etag
+    return response
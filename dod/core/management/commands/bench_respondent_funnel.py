@@ -0,0 +1,264 @@
+import datetime
+import http.server
+import io
+import json
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlparse, parse_qs
+
+from PIL import Image
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from accounts.models import User
+from core.sms.outbox import drain_outbox
+from core.tools import percentile
+from logic.models import UserSelectLogic, PercentageResult
+from logs.models import MMSOutbox
+from products.models import Brand, Item, Product, Reward
+from projects.models import Project
+from respondent.models import Respondent, RespondentPhoneConfirm, DeviceMetaInfo
+
+STEPS = ('checklink', 'respondent_send', 'respondent_confirm')
+
+
+class _FakeSENSHandler(http.server.BaseHTTPRequestHandler):
+    """
+    SENS 대신 모든 요청에 202 를 주고, 받은 메시지를 번호별로 기록합니다.
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with self.server.lock:
+            self.server.calls[body.get('type', 'ALIMTALK')] += 1
+            for message in body['messages']:
+                self.server.messages[message['to']] = message.get('content') or body.get('content', '')
+        self.send_response(202)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+class _FakeS3Handler(http.server.SimpleHTTPRequestHandler):
+    """
+    S3 대신 임시 MEDIA_ROOT 를 http 로 내려줍니다. (MMS 발송시 이미지 다운로드용)
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_server(handler):
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, 'http://127.0.0.1:{}'.format(server.server_port)
+
+
+def _jpg():
+    buffer = io.BytesIO()
+    Image.new('RGB', (200, 200), (200, 60, 60)).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = 'checklink -> sms/respondent_send -> sms/respondent_confirm 퍼널을 가짜 SENS/S3 로 여러 스레드에서 실행하고 ' \
+           '처리량, latency, 요청당 쿼리 수, 유실된 당첨을 출력합니다. (현재 설정된 db 를 사용하며 외부 네트워크는 쓰지 않습니다.)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=1, help='생성할 프로젝트 수')
+        parser.add_argument('--rewards', type=int, default=50, help='프로젝트당 기프티콘(Reward) 수 = 당첨 슬롯 수')
+        parser.add_argument('--respondents', type=int, default=200, help='전체 응답자 수 (프로젝트에 나눠서 참여)')
+        parser.add_argument('--threads', type=int, default=8, help='동시에 퍼널을 진행하는 스레드 수')
+        parser.add_argument('--drain', action='store_true', help='퍼널 이후 MMS outbox 를 발송하고 발송 시간도 출력합니다.')
+        parser.add_argument('--keep', action='store_true', help='벤치마크 데이터를 삭제하지 않습니다.')
+
+    def handle(self, *args, **options):
+        sens, sens_url = _start_server(_FakeSENSHandler)
+        sens.lock = threading.Lock()
+        sens.calls = defaultdict(int)
+        sens.messages = {}
+        media_root = tempfile.mkdtemp(prefix='dod-bench-')
+        s3, s3_url = _start_server(partial(_FakeS3Handler, directory=media_root))
+
+        overrides = override_settings(
+            SENS_API_URL=sens_url,
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+            MEDIA_ROOT=media_root,
+            MEDIA_URL=s3_url + '/',
+            ALLOWED_HOSTS=list(settings.ALLOWED_HOSTS) + ['testserver'],
+        )
+        overrides.enable()
+        try:
+            self._run(options, sens)
+        finally:
+            overrides.disable()
+            sens.shutdown()
+            s3.shutdown()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+    def _run(self, options, sens):
+        run_id = int(time.time()) % 100000
+        owner, projects, brand, item = self._seed(run_id, options['projects'], options['rewards'])
+        phones = ['019{:03d}{:05d}'.format(run_id % 1000, i) for i in range(options['respondents'])]
+
+        lock = threading.Lock()
+        latencies = defaultdict(list)
+        queries = defaultdict(list)
+        failures = defaultdict(int)
+
+        def request(client, step, method, path, **kwargs):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = getattr(client, method)(path, **kwargs)
+                elapsed = time.perf_counter() - started
+            with lock:
+                latencies[step].append(elapsed)
+                queries[step].append(len(context.captured_queries))
+                if response.status_code >= 400:
+                    failures[step] += 1
+            return response
+
+        def respondent(index):
+            project = projects[index % len(projects)]
+            phone = phones[index]
+            # view 에서 난 에러(ex: lock timeout)는 500 응답으로 집계합니다.
+            client = Client(raise_request_exception=False,
+                            HTTP_REFERER='https://docs.google.com/forms/bench', HTTP_USER_AGENT='bench')
+            response = request(client, 'checklink', 'get', '/checklink/{}/'.format(project.project_hash_key))
+            validator = parse_qs(urlparse(response.get('Location', '')).query).get('v', [''])[0]
+            response = request(client, 'respondent_send', 'post', '/api/v1/sms/respondent_send/',
+                               data={'phone': phone, 'project_key': project.project_hash_key},
+                               content_type='application/json')
+            if response.status_code != 200:
+                return
+            with sens.lock:
+                match = re.search(r'(\d{4})', sens.messages.get(phone, ''))
+            if match is None:
+                # fake SENS 가 인증번호를 받지 못했으면 confirm 단계 실패로 집계합니다.
+                with lock:
+                    failures['respondent_confirm'] += 1
+                return
+            request(client, 'respondent_confirm', 'post', '/api/v1/sms/respondent_confirm/',
+                    data={'phone': phone, 'confirm_key': match.group(1), 'validator': validator,
+                          'project_key': project.project_hash_key},
+                    content_type='application/json')
+
+        def worker(offset):
+            try:
+                for index in range(offset, len(phones), options['threads']):
+                    respondent(index)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        total_time = time.perf_counter() - started
+
+        try:
+            self._report(options, projects, phones, latencies, queries, failures, total_time)
+            self.stdout.write('fake SENS calls: {}'.format(dict(sens.calls)))
+            if options['drain']:
+                self._drain(phones, sens)
+        finally:
+            if not options['keep']:
+                self._cleanup(owner, brand, phones)
+
+    def _report(self, options, projects, phones, latencies, queries, failures, total_time):
+        confirmed = len(latencies['respondent_confirm'])
+        self.stdout.write('projects: {} / rewards per project: {} / respondents: {} / threads: {}'.format(
+            len(projects), options['rewards'], len(phones), options['threads']))
+        self.stdout.write('throughput: {:.1f} respondents/s ({} confirmed in {:.2f}s)'.format(
+            confirmed / total_time if total_time else 0, confirmed, total_time))
+        for step in STEPS:
+            step_latencies = latencies[step]
+            step_queries = queries[step]
+            self.stdout.write('{:<20} n={:<5} p50 {:7.1f}ms  p95 {:7.1f}ms  p99 {:7.1f}ms  '
+                              'queries avg {:5.1f} max {:3d}  errors {}'.format(
+                                  step, len(step_latencies),
+                                  percentile(step_latencies, 50) * 1000,
+                                  percentile(step_latencies, 95) * 1000,
+                                  percentile(step_latencies, 99) * 1000,
+                                  sum(step_queries) / len(step_queries) if step_queries else 0,
+                                  max(step_queries) if step_queries else 0,
+                                  failures[step]))
+
+        # 확률 100% 슬롯을 기프티콘 수만큼 만들었기 때문에 프로젝트당 min(참여자, 기프티콘) 명이 당첨되어야 합니다.
+        expected = 0
+        for i, project in enumerate(projects):
+            participants = len(range(i, len(phones), len(projects)))
+            expected += min(participants, options['rewards'])
+        rewards = Reward.objects.filter(product__project__in=projects, winner_id__isnull=False)
+        assigned = rewards.count()
+        duplicated = rewards.values('winner_id').annotate(count=Count('id')).filter(count__gt=1).count()
+        winners = Respondent.objects.filter(project__in=projects, is_win=True).count()
+        self.stdout.write('wins: expected {} / winners {} / rewards assigned {} / lost {} / duplicated {}'.format(
+            expected, winners, assigned, expected - assigned, duplicated))
+
+    def _drain(self, phones, sens):
+        outboxes = MMSOutbox.objects.filter(phone__in=phones)
+        pending = outboxes.filter(status=MMSOutbox.PENDING).count()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            while drain_outbox(pool, 20, 5):
+                pass
+        elapsed = time.perf_counter() - started
+        sent = outboxes.filter(status=MMSOutbox.SENT).count()
+        self.stdout.write('mms outbox: {} pending -> {} sent in {:.2f}s (fake SENS MMS calls: {})'.format(
+            pending, sent, elapsed, sens.calls['MMS']))
+
+    @staticmethod
+    def _seed(run_id, project_count, reward_count):
+        now = datetime.datetime.now()
+        owner = User.objects.create_user(phone='bench-funnel-{}'.format(run_id))
+        brand = Brand.objects.create(name='bench')
+        order = (Item.objects.order_by('-order').values_list('order', flat=True).first() or 0) + 1
+        item = Item.objects.create(order=order, brand=brand, name='bench', short_name='bench', price=4000,
+                                   won_thumbnail=SimpleUploadedFile('won.jpg', _jpg()))
+        image = _jpg()
+        projects = []
+        for i in range(project_count):
+            project = Project.objects.create(name='bench', project_hash_key='bench{}x{}'.format(run_id, i),
+                                             owner=owner, start_at=now - datetime.timedelta(minutes=1),
+                                             dead_at=now + datetime.timedelta(days=1), winner_count=reward_count,
+                                             status=True, is_active=True)
+            logic = UserSelectLogic.objects.create(kind=UserSelectLogic.Percentage, project=project)
+            PercentageResult.objects.bulk_create([PercentageResult(percentage=100, logic=logic)
+                                                  for _ in range(reward_count)])
+            for _ in range(reward_count):
+                product = Product.objects.create(project=project, item=item, price=item.price)
+                Reward.objects.create(product=product, due_date='2099-12-31',
+                                      reward_img=SimpleUploadedFile('reward.jpg', image))
+            projects.append(project)
+        return owner, projects, brand, item
+
+    @staticmethod
+    def _cleanup(owner, brand, phones):
+        MMSOutbox.objects.filter(phone__in=phones).delete()
+        validators = DeviceMetaInfo.objects.filter(user_agent='bench')
+        validators.delete()
+        RespondentPhoneConfirm.objects.filter(phone__in=phones).delete()
+        owner.delete()
+        brand.delete()
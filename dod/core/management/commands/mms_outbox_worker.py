@@ -0,0 +1,31 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.sms.outbox import drain_outbox, requeue_stale_sending
+
+
+class Command(BaseCommand):
+    help = '당첨 MMS 발송 대기열(MMSOutbox)을 꺼내서 발송합니다. 실패시 backoff 후 재시도합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='동시에 발송하는 스레드 수')
+        parser.add_argument('--batch', type=int, default=20, help='한번에 꺼내는 outbox 개수')
+        parser.add_argument('--max-attempts', type=int, default=5, help='최대 발송 시도 횟수. 넘으면 MMSSendLog 생성')
+        parser.add_argument('--poll-interval', type=float, default=2, help='대기열이 비었을 때 다시 확인하는 간격(초)')
+        parser.add_argument('--once', action='store_true', help='대기열을 한번 비우고 종료합니다. (cron 용)')
+
+    def handle(self, *args, **options):
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                close_old_connections()
+                requeue_stale_sending()
+                sent = drain_outbox(pool, options['batch'], options['max_attempts'])
+                if sent:
+                    self.stdout.write('processed: {}'.format(sent))
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
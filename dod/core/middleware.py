@@ -1,6 +1,13 @@
+import logging
+import time
+from contextlib import ExitStack
 from re import sub
+
+from django.db import connections
 from rest_framework.authtoken.models import Token
 
+logger = logging.getLogger('core.request')
+
 
 class OrganizationMiddleware(object):
     from rest_framework.authtoken.models import Token
@@ -14,3 +21,70 @@ class OrganizationMiddleware(object):
             except Token.DoesNotExist:
                 pass
             #This is now the correct user
+
+
+class QueryCounter(object):
+    """
+    connection.execute_wrapper 로 등록하여 쿼리 수와 db 시간을 셉니다. (DEBUG 와 관계없이 동작)
+    """
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+def get_query_budget(view_func, method):
+    """
+    view class 의 query_budgets 에서 이번 요청의 쿼리 예산을 찾습니다.
+    ViewSet 은 action 이름, APIView 는 http method(소문자)를 key 로 사용합니다.
+    ex) query_budgets = {'list': 2, 'respondent_confirm': 30}
+    """
+    budgets = getattr(getattr(view_func, 'cls', None), 'query_budgets', None)
+    if not budgets:
+        return None
+    method = method.lower()
+    actions = getattr(view_func, 'actions', None) or {}
+    return budgets.get(actions.get(method, method))
+
+
+class QueryBudgetMiddleware(object):
+    """
+    요청마다 view 별 쿼리 수, db 시간, 전체 시간을 response header 와 log(core.request)로 남깁니다.
+    X-Query-Count, X-Query-Budget(선언된 경우), Server-Timing: db;dur=<ms>, total;dur=<ms>
+    예산을 넘으면 warning 으로 남기고, 테스트에서는 core.testing 으로 확인합니다.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        budget = getattr(request, '_query_budget', None)
+        response['X-Query-Count'] = counter.count
+        if budget is not None:
+            response['X-Query-Budget'] = budget
+        response['Server-Timing'] = 'db;dur={:.1f}, total;dur={:.1f}'.format(counter.duration * 1000, total * 1000)
+
+        match = getattr(request, 'resolver_match', None)
+        over_budget = budget is not None and counter.count > budget
+        logger.log(logging.WARNING if over_budget else logging.INFO,
+                   'view=%s method=%s status=%s queries=%d budget=%s db_ms=%.1f total_ms=%.1f',
+                   match.view_name if match else '-', request.method, response.status_code,
+                   counter.count, budget if budget is not None else '-', counter.duration * 1000, total * 1000)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = get_query_budget(view_func, request.method)
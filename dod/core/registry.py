@@ -0,0 +1,55 @@
+import hashlib
+import threading
+import time
+
+# 다른 서버(프로세스)에서 staff 가 수정한 내용은 이 간격으로 확인해서 반영합니다.
+RECHECK_SECONDS = 5
+
+
+class FingerprintedRegistry(object):
+    """
+    자주 읽고 드물게 바뀌는 테이블을 프로세스 안에 들고 있는 registry 의 base class 입니다.
+    RECHECK_SECONDS 마다 fetch_fingerprint(ex: 개수, 마지막 수정시간) 만 확인하고, 바뀌었을 때만 load 로 다시 읽습니다.
+    같은 프로세스에서 수정하면 signal 에서 invalidate 를 호출해서 바로 다시 읽습니다.
+    subclass 는 fetch_fingerprint, load 를 구현하고 값을 읽기 전에 refresh 를 호출합니다.
+    """
+    recheck_seconds = RECHECK_SECONDS
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._checked_at = None
+
+    def fetch_fingerprint(self):
+        raise NotImplementedError
+
+    def load(self):
+        """
+        테이블을 다시 읽어서 registry 의 값을 바꿉니다. (lock 안에서 호출됩니다.)
+        """
+        raise NotImplementedError
+
+    def invalidate(self):
+        self._checked_at = None
+        self._fingerprint = None
+
+    def refresh(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.recheck_seconds:
+            return
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.recheck_seconds:
+                return
+            fingerprint = self.fetch_fingerprint()
+            if fingerprint != self._fingerprint:
+                self.load()
+                self._fingerprint = fingerprint
+            self._checked_at = now
+
+    @property
+    def version(self):
+        """
+        지금 읽어둔 내용의 version 입니다. fingerprint 로 만들기 때문에 다른 프로세스에서도 같은 내용이면 같은 값입니다.
+        """
+        self.refresh()
+        return hashlib.md5(repr(self._fingerprint).encode('utf-8')).hexdigest()[:12]
@@ -0,0 +1,170 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.loader import load_credential
+
+logger = logging.getLogger(__name__)
+
+SENS_API_URL = 'https://sens.apigw.ntruss.com'
+SENS_TIMEOUT = (3, 10)  # (connect, read)
+SENS_MAX_RETRIES = 2
+SENS_POOL_SIZE = 10
+
+# 최근 호출 latency 는 이 개수만큼만 들고 있습니다. (percentile 계산용)
+METRICS_WINDOW = 1000
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class SENSMetrics(object):
+    """
+    SENS 호출별 latency 를 기록합니다. 프로세스 단위로 쌓이며 snapshot() 으로 확인합니다.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.failures = 0
+            self.total_ms = 0.0
+            self.max_ms = 0.0
+            self.recent = deque(maxlen=METRICS_WINDOW)
+
+    def record(self, elapsed_ms, success):
+        with self._lock:
+            self.calls += 1
+            if not success:
+                self.failures += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            self.recent.append(elapsed_ms)
+
+    def snapshot(self):
+        with self._lock:
+            recent = sorted(self.recent)
+            calls = self.calls
+            failures = self.failures
+            total_ms = self.total_ms
+            max_ms = self.max_ms
+
+        def percentile(pct):
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, int(len(recent) * pct / 100))]
+
+        return {
+            'calls': calls,
+            'failures': failures,
+            'avg_ms': round(total_ms / calls, 2) if calls else 0.0,
+            'p50_ms': round(percentile(50), 2),
+            'p99_ms': round(percentile(99), 2),
+            'max_ms': round(max_ms, 2),
+        }
+
+
+class SENSClient(object):
+    """
+    ncloud SENS API client 입니다. (SMS/LMS/MMS, 알림톡)
+    credential, secret key 는 처음 사용할 때 한번만 읽고, 프로세스마다 keep-alive session 을 하나씩 사용합니다.
+    """
+    def __init__(self, credential_key, uri_format):
+        self.credential_key = credential_key
+        self.uri_format = uri_format
+        self.metrics = SENSMetrics()
+        self._lock = threading.Lock()
+        self._credential = None
+        self._secret_key = None
+        self._session = None
+        self._session_pid = None
+
+    @property
+    def credential(self):
+        if self._credential is None:
+            credential = load_credential(self.credential_key)
+            self._secret_key = bytes(credential['secret_key'], 'UTF-8')
+            self._credential = credential
+        return self._credential
+
+    @property
+    def uri(self):
+        return self.uri_format.format(self.credential['serviceId'])
+
+    def _make_session(self):
+        max_retries = _setting('SENS_MAX_RETRIES', SENS_MAX_RETRIES)
+        # 연결 실패와 SENS 가 처리하지 않았다고 확실한 응답(429, 503)만 재시도합니다.
+        # 요청이 전달된 뒤의 read timeout 과 502, 504 는 SENS 가 이미 발송했을 수 있어 재시도하지 않습니다.
+        retry = Retry(total=max_retries, connect=max_retries, read=0, status=max_retries,
+                      status_forcelist=(429, 503), allowed_methods=frozenset(['POST']),
+                      backoff_factor=0.2, raise_on_status=False)
+        pool_size = _setting('SENS_POOL_SIZE', SENS_POOL_SIZE)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    @property
+    def session(self):
+        # fork 된 worker 에서 부모의 socket 을 같이 쓰지 않도록 pid 가 바뀌면 새로 만듭니다.
+        pid = os.getpid()
+        if self._session is None or self._session_pid != pid:
+            with self._lock:
+                if self._session is None or self._session_pid != pid:
+                    self._session = self._make_session()
+                    self._session_pid = pid
+        return self._session
+
+    def make_signature(self, uri, timestamp):
+        access_key = self.credential['access_key']
+        string_to_sign = "POST " + uri + "\n" + timestamp + "\n" + access_key
+        string_hmac = hmac.new(self._secret_key, bytes(string_to_sign, 'UTF-8'), digestmod=hashlib.sha256).digest()
+        return base64.b64encode(string_hmac).decode('UTF-8')
+
+    def post(self, body):
+        """
+        body 를 발송합니다.
+        :return: status code, 요청 자체가 실패하면 (timeout, 연결 실패 등) 예외 class 이름
+        """
+        uri = self.uri
+        timestamp = str(int(time.time() * 1000))
+        headers = {
+            'Content-Type': 'application/json; charset=utf-8',
+            'x-ncp-apigw-timestamp': timestamp,
+            'x-ncp-iam-access-key': self.credential['access_key'],
+            'x-ncp-apigw-signature-v2': self.make_signature(uri, timestamp)
+        }
+        api_url = _setting('SENS_API_URL', SENS_API_URL) + uri
+        timeout = _setting('SENS_TIMEOUT', SENS_TIMEOUT)
+
+        started = time.perf_counter()
+        try:
+            response = self.session.post(api_url, headers=headers, data=json.dumps(body), timeout=timeout)
+            code = response.status_code
+        except requests.RequestException as e:
+            code = e.__class__.__name__
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        success = code == 202
+        self.metrics.record(elapsed_ms, success)
+        logger.info('sens %s %s %.1fms', self.credential_key, code, elapsed_ms)
+        return code
+
+
+sms_client = SENSClient('sms', '/sms/v2/services/{}/messages')
+alim_client = SENSClient('alim', '/alimtalk/v2/services/{}/messages')
@@ -0,0 +1,81 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from core.sms.utils import LMSV1Manager
+
+# SENS 는 한 요청에 최대 100명까지 받습니다.
+CHUNK_SIZE = 100
+
+
+class RateLimiter(object):
+    """
+    초당 rate 번 이하로만 통과시킵니다. 여러 스레드에서 같이 사용합니다.
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next_at = time.monotonic()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            wait_seconds = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+
+
+def _send_chunk(messages, content_setter, limiter):
+    limiter.wait()
+    lms_manager = LMSV1Manager()
+    content_setter(lms_manager, messages[0]['content'])
+    return lms_manager.send_lms_messages(messages)
+
+
+def send_lms_campaign(queryset, build_message, content_setter, chunk_size=CHUNK_SIZE, workers=4, rate=5):
+    """
+    queryset(send 필드가 있는 model) 중 아직 보내지 않은(send=False) 사람들에게 LMS 를 보냅니다.
+    chunk_size 명씩 묶어서 한번에 요청하고, chunk 들은 workers 개의 스레드에서 초당 rate 번 이하로 보냅니다.
+    발송된 chunk 는 바로 send=True 로 bulk update 하기 때문에, 중간에 죽어도 다시 실행하면 남은 사람부터 이어서 보냅니다.
+    (죽는 순간 발송중이던 chunk 는 다시 보내질 수 있습니다.)
+    :param build_message: row -> 보낼 내용
+    :param content_setter: (LMSV1Manager, 내용) -> 제목 등 manager 설정. 예) LMSV1Manager.alert_agree_content
+    :return: (발송 성공 수, 실패 수)
+    """
+    model = queryset.model
+    limiter = RateLimiter(rate)
+    sent = 0
+    failed = 0
+
+    def checkpoint(done):
+        nonlocal sent, failed
+        for future in done:
+            ids = in_flight.pop(future)
+            try:
+                success = future.result()
+            except Exception:
+                success = False
+            if success:
+                # db 작업은 호출한 스레드에서만 합니다.
+                model.objects.filter(id__in=ids).update(send=True)
+                sent += len(ids)
+            else:
+                failed += len(ids)
+
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        last_id = 0
+        while True:
+            chunk = list(queryset.filter(send=False, id__gt=last_id).order_by('id')[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+            messages = [{'to': row.phone, 'content': build_message(row)} for row in chunk]
+            future = pool.submit(_send_chunk, messages, content_setter, limiter)
+            in_flight[future] = [row.id for row in chunk]
+            if len(in_flight) >= workers * 2:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                checkpoint(done)
+        checkpoint(wait(in_flight).done)
+    return sent, failed
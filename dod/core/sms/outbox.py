@@ -0,0 +1,103 @@
+import datetime
+from concurrent.futures import as_completed
+
+from django.db.models import F
+
+from core.sms.utils import MMSV1Manager
+from logs.models import MMSOutbox, MMSSendLog
+
+# 재시도 간격: 30초, 1분, 2분, 4분 ... 최대 30분
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 60 * 30
+
+# worker 가 죽어서 발송중(SENDING)으로 남은 건은 이 시간 이후 다시 발송대기로 돌립니다.
+STALE_SENDING_SECONDS = 60 * 10
+
+
+def enqueue_winner_mms(phone, brand, item_name, item_url, due_date, mms_payload_id=None):
+    return MMSOutbox.objects.create(kind=MMSOutbox.WINNER, phone=phone, brand=brand, item_name=item_name,
+                                    item_url=item_url, due_date=due_date, mms_payload_id=mms_payload_id)
+
+
+def enqueue_custom_upload_mms(phone, item_url, mms_payload_id=None):
+    return MMSOutbox.objects.create(kind=MMSOutbox.CUSTOM_UPLOAD, phone=phone, item_name='직접 업로드',
+                                    item_url=item_url, mms_payload_id=mms_payload_id)
+
+
+def requeue_stale_sending():
+    stale_at = datetime.datetime.now() - datetime.timedelta(seconds=STALE_SENDING_SECONDS)
+    return MMSOutbox.objects.filter(status=MMSOutbox.SENDING, updated_at__lt=stale_at)\
+        .update(status=MMSOutbox.PENDING, next_attempt_at=datetime.datetime.now())
+
+
+def claim_batch(batch_size):
+    """
+    발송할 차례인 outbox 를 batch_size 만큼 SENDING 으로 점유하고 점유한 id list 를 리턴합니다.
+    status 조건부 update 로 점유하기 때문에 worker 를 여러개 띄워도 같은 건을 중복 발송하지 않습니다.
+    """
+    now = datetime.datetime.now()
+    candidates = MMSOutbox.objects.filter(status=MMSOutbox.PENDING, next_attempt_at__lte=now)\
+        .order_by('next_attempt_at').values_list('id', flat=True)[:batch_size]
+    claimed = []
+    for outbox_id in candidates:
+        if MMSOutbox.objects.filter(id=outbox_id, status=MMSOutbox.PENDING)\
+                .update(status=MMSOutbox.SENDING, attempts=F('attempts') + 1, updated_at=now):
+            claimed.append(outbox_id)
+    return claimed
+
+
+def send_outbox_mms(outbox):
+    mms_manager = MMSV1Manager()
+    if outbox.kind == MMSOutbox.CUSTOM_UPLOAD:
+        mms_manager.set_custom_upload_content()
+    elif outbox.kind == MMSOutbox.MONITORED:
+        mms_manager.set_monitored_content(outbox.brand, outbox.item_name, outbox.due_date)
+    else:
+        mms_manager.set_content(outbox.brand, outbox.item_name, outbox.due_date)
+    image_body = outbox.mms_payload.body if outbox.mms_payload else None
+    return mms_manager.send_mms(phone=outbox.phone, image_url=outbox.item_url, image_body=image_body)
+
+
+def record_result(outbox, success, code, max_attempts):
+    if success:
+        MMSOutbox.objects.filter(id=outbox.id).update(status=MMSOutbox.SENT, last_code='')
+        return
+
+    code = str(code)[:40]
+    if outbox.attempts >= max_attempts:
+        MMSOutbox.objects.filter(id=outbox.id).update(status=MMSOutbox.FAILED, last_code=code)
+        # 최종 실패 : 기존과 동일하게 MMSSendLog 생성 -> slack 알림 & staff 재발송
+        if outbox.kind == MMSOutbox.CUSTOM_UPLOAD:
+            MMSSendLog.objects.create(code=code, phone=outbox.phone, item_name=outbox.item_name,
+                                      item_url=outbox.item_url)
+        else:
+            MMSSendLog.objects.create(code=code, phone=outbox.phone, item_name=outbox.item_name,
+                                      item_url=outbox.item_url, due_date=outbox.due_date, brand=outbox.brand)
+        return
+
+    delay = min(RETRY_BASE_SECONDS * 2 ** (outbox.attempts - 1), RETRY_MAX_SECONDS)
+    next_attempt_at = datetime.datetime.now() + datetime.timedelta(seconds=delay)
+    MMSOutbox.objects.filter(id=outbox.id).update(status=MMSOutbox.PENDING, last_code=code,
+                                                  next_attempt_at=next_attempt_at)
+
+
+def drain_outbox(pool, batch_size, max_attempts):
+    """
+    발송할 차례인 outbox 를 한 batch 꺼내서 pool(ThreadPoolExecutor) 에서 동시에 발송합니다.
+    db 작업은 호출한 스레드에서만 하고, pool 에서는 SENS 요청만 합니다.
+    :return: 처리한 outbox 개수
+    """
+    claimed = claim_batch(batch_size)
+    if not claimed:
+        return 0
+
+    outboxes = MMSOutbox.objects.filter(id__in=claimed).select_related('mms_payload')
+    futures = {pool.submit(send_outbox_mms, outbox): outbox for outbox in outboxes}
+    for future in as_completed(futures):
+        outbox = futures[future]
+        try:
+            success, code = future.result()
+        except Exception as e:
+            success, code = False, e.__class__.__name__
+        record_result(outbox, success, code, max_attempts)
+    return len(futures)
@@ -0,0 +1,98 @@
+import base64
+import hashlib
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from core.sms.transcoder import transcode_to_mms_jpg, MMSImageError
+from products.models import MMSImagePayload
+
+# storage 에서 원본 이미지를 받지 못했을 때 (payload 없이 발송시 다시 변환합니다.)
+IMAGE_READ_ERRORS = (OSError, BotoCoreError, ClientError)
+
+
+def build_mms_payload(image_bytes):
+    """
+    원본 이미지를 MMS 로 보낼 수 있는 base64 jpg 로 변환하여 저장합니다.
+    이미 같은 이미지(hash)로 만든 payload 가 있다면 그대로 리턴합니다.
+    :return: MMSImagePayload, 변환할 수 없는 이미지면 None (발송시 다시 변환)
+    """
+    content_hash = hashlib.sha256(image_bytes).hexdigest()
+    payload = MMSImagePayload.objects.filter(content_hash=content_hash).first()
+    if payload:
+        return payload
+
+    try:
+        jpg = transcode_to_mms_jpg(image_bytes)
+    except MMSImageError:
+        return None
+
+    payload, _ = MMSImagePayload.objects.get_or_create(
+        content_hash=content_hash,
+        defaults={'body': base64.b64encode(jpg).decode('utf-8'), 'size': len(jpg)})
+    return payload
+
+
+def image_content_hash(image):
+    """
+    업로드된 파일의 sha256 (build_mms_payload 와 같은 hash) 을 chunk 단위로 읽어서 만듭니다.
+    """
+    content_hash = hashlib.sha256()
+    image.seek(0)
+    for chunk in image.chunks():
+        content_hash.update(chunk)
+    image.seek(0)
+    return content_hash.hexdigest()
+
+
+def find_mms_payloads(content_hashes):
+    """
+    :return: {content_hash: MMSImagePayload} 이미 만들어둔 payload 를 한번의 쿼리로 찾습니다.
+    """
+    return MMSImagePayload.objects.in_bulk(set(content_hashes), field_name='content_hash')
+
+
+def transcode_mms_payload(image_bytes):
+    """
+    db 를 사용하지 않는 변환 단계만 합니다. (thread pool 에서 사용)
+    :return: jpg bytes, 변환할 수 없는 이미지면 None
+    """
+    try:
+        return transcode_to_mms_jpg(image_bytes)
+    except MMSImageError:
+        return None
+
+
+def save_mms_payloads(jpgs):
+    """
+    transcode_mms_payload 로 변환한 {content_hash: jpg} 를 한번에 저장합니다.
+    동시에 다른 요청이 같은 이미지를 저장했으면 그 payload 를 사용합니다.
+    :return: {content_hash: MMSImagePayload}
+    """
+    if not jpgs:
+        return {}
+    MMSImagePayload.objects.bulk_create(
+        [MMSImagePayload(content_hash=content_hash, body=base64.b64encode(jpg).decode('utf-8'), size=len(jpg))
+         for content_hash, jpg in jpgs.items()],
+        ignore_conflicts=True)
+    return find_mms_payloads(jpgs.keys())
+
+
+def attach_mms_payload(instance, field_name, image_bytes=None):
+    """
+    Reward.reward_img, CustomGifticon.gifticon_img 처럼 기프티콘 이미지를 가진 instance 에 payload 를 연결합니다.
+    :param image_bytes: 업로드 직후라면 pre_save 에서 읽어둔 bytes 를 넘겨주세요.
+                        없으면 storage 에서 이미지를 다시 받습니다. (IMAGE_READ_ERRORS 가 발생할 수 있음)
+    """
+    if image_bytes is None:
+        image = getattr(instance, field_name)
+        if not image:
+            return None
+        image.open('rb')
+        try:
+            image_bytes = image.read()
+        finally:
+            image.close()
+    payload = build_mms_payload(image_bytes)
+    type(instance).objects.filter(pk=instance.pk).update(mms_payload=payload)
+    instance.mms_payload = payload
+    return payload
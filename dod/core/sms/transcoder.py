@@ -0,0 +1,67 @@
+from io import BytesIO
+
+import requests
+from PIL import Image
+
+# SENS MMS 이미지 제한 : jpg, 300KB 이하, 1500 x 1440 이하
+MMS_IMAGE_MAX_BYTES = 300 * 1024
+MMS_IMAGE_MAX_SIZE = (1500, 1440)
+
+# 크기 제한을 넘으면 quality 를 먼저 낮추고, 그래도 넘으면 해상도를 줄입니다.
+JPG_QUALITIES = (90, 80, 70, 60)
+RESIZE_SCALES = (1.0, 0.8, 0.64, 0.5, 0.4)
+
+FETCH_TIMEOUT = (3, 10)
+
+
+class MMSImageError(Exception):
+    """
+    이미지를 받을 수 없거나 MMS 크기 제한에 맞게 변환할 수 없는 경우
+    """
+    pass
+
+
+def fetch_image(image_url):
+    """
+    이미지를 메모리로 받습니다. (파일로 저장하지 않음)
+    """
+    try:
+        response = requests.get(image_url, timeout=FETCH_TIMEOUT)
+    except requests.RequestException as e:
+        raise MMSImageError('fetch failed: {}'.format(e.__class__.__name__))
+    if response.status_code != 200:
+        raise MMSImageError('fetch failed: {}'.format(response.status_code))
+    return response.content
+
+
+def transcode_to_mms_jpg(image_bytes, max_bytes=MMS_IMAGE_MAX_BYTES):
+    """
+    이미지를 MMS 로 보낼 수 있는 jpg 로 변환합니다.
+    이미 제한에 맞는 jpg 는 그대로 리턴하고, 아니면 quality -> 해상도 순으로 줄여가며 max_bytes 이하로 맞춥니다.
+    모든 작업은 메모리 안에서만 하기 때문에 여러 스레드/프로세스에서 동시에 호출해도 안전합니다.
+    """
+    try:
+        image = Image.open(BytesIO(image_bytes))
+        image.load()
+    except OSError:
+        raise MMSImageError('invalid image')
+
+    max_width, max_height = MMS_IMAGE_MAX_SIZE
+    fits_size = image.width <= max_width and image.height <= max_height
+    if image.format == 'JPEG' and image.mode == 'RGB' and fits_size and len(image_bytes) <= max_bytes:
+        return image_bytes
+
+    image = image.convert('RGB')
+    image.thumbnail(MMS_IMAGE_MAX_SIZE)
+    for scale in RESIZE_SCALES:
+        if scale == 1.0:
+            resized = image
+        else:
+            resized = image.resize((max(1, int(image.width * scale)), max(1, int(image.height * scale))),
+                                   Image.LANCZOS)
+        for quality in JPG_QUALITIES:
+            buffer = BytesIO()
+            resized.save(buffer, format='JPEG', quality=quality, optimize=True)
+            if buffer.tell() <= max_bytes:
+                return buffer.getvalue()
+    raise MMSImageError('too large')
@@ -1,17 +1,11 @@
-import os
 import string
-import time
-from PIL import Image
 import random
-import json
 from accounts.models import PhoneConfirm
-from core.sms.signature import time_stamp, make_signature
+from core.sens import sms_client
+from core.sms.transcoder import fetch_image, transcode_to_mms_jpg, MMSImageError
 from projects.models import Project
 from respondent.models import RespondentPhoneConfirm, Respondent, TestRespondentPhoneConfirm
-from ..loader import load_credential
-import requests
 import base64
-from PIL import Image
 
 # class SMSManager():
 #     """
@@ -79,7 +73,7 @@ class SMSV2Manager():
         self.body = {
             "type": "SMS",
             "contentType": "COMM",
-            "from": load_credential("sms")["_from"], # 발신번호
+            "from": sms_client.credential["_from"], # 발신번호
             "content": "",  # 기본 메시지 내용
             "messages": [{"to": ""}],
         }
@@ -134,27 +128,8 @@ class SMSV2Manager():
         self.body['content'] = message
 
     def send_sms(self, phone):
-        sms_dic = load_credential("sms")
-        access_key = sms_dic['access_key']
-        url = "https://sens.apigw.ntruss.com"
-        uri = "/sms/v2/services/" + sms_dic['serviceId'] + "/messages"
-        api_url = url + uri
-        timestamp = str(int(time.time() * 1000))
-        string_to_sign = "POST " + uri + "\n" + timestamp + "\n" + access_key
-        signature = make_signature(string_to_sign)
-
-        headers = {
-            'Content-Type': 'application/json; charset=utf-8',
-            'x-ncp-apigw-timestamp': timestamp,
-            'x-ncp-iam-access-key': access_key,
-            'x-ncp-apigw-signature-v2': signature
-        }
         self.body['messages'][0]['to'] = phone
-        request = requests.post(api_url, headers=headers, data=json.dumps(self.body))
-        if request.status_code == 202:
-            return True
-        else:
-            return False
+        return sms_client.post(self.body) == 202
 
 
 class MMSV1Manager():
@@ -167,7 +142,7 @@ class MMSV1Manager():
         self.body = {
             "type": "MMS",
             "contentType": "COMM",
-            "from": load_credential("sms")["_from"], # 발신번호
+            "from": sms_client.credential["_from"], # 발신번호
             "content": "당첨을 축하합니다.",  # 기본 메시지 내용
             "messages": [{"to": ""}],
             "files": [{"name": "string", "body": "string"}]
@@ -198,57 +173,26 @@ class MMSV1Manager():
                                "https://bit.ly/3jQkj3C"\
             .format(brand, product_name, due_date)
 
-    def _convert_png_to_jpg(self):
-        pass
-
-    def send_mms(self, phone, image_url):
-        sms_dic = load_credential("sms")
-        access_key = sms_dic['access_key']
-        url = "https://sens.apigw.ntruss.com"
-        uri = "/sms/v2/services/" + sms_dic['serviceId'] + "/messages"
-        api_url = url + uri
-        timestamp = str(int(time.time() * 1000))
-        string_to_sign = "POST " + uri + "\n" + timestamp + "\n" + access_key
-        signature = make_signature(string_to_sign)
-
-        headers = {
-            'Content-Type': 'application/json; charset=utf-8',
-            'x-ncp-apigw-timestamp': timestamp,
-            'x-ncp-iam-access-key': access_key,
-            'x-ncp-apigw-signature-v2': signature
-        }
-
-        try:
-            # for except duplicated image
-            os.remove('gift.jpg')
-        except:
-            pass
-
-        # download gift.jpg from url
-        extension = image_url.split('.')[-1]
-        file_name = 'gift.{}'.format(extension)
-        if extension == 'jpeg':
-            file_name = 'gift.jpg'
-        os.system("curl " + image_url + " > {}".format(file_name))
-
-        # transfer png to jpg
-        if extension not in ['jpg', 'jpeg']:
-            im = Image.open(file_name)
-            rgb_im = im.convert('RGB')
-            rgb_im.save('gift.jpg')
-
-        with open("gift.jpg", "rb") as image_file:
-            data = base64.b64encode(image_file.read())
+    def send_mms(self, phone, image_url, image_body=None):
+        """
+        image_body(MMSImagePayload.body) 가 있으면 이미지를 다시 받아서 변환하지 않고 그대로 발송합니다.
+        """
+        if image_body is None:
+            # 메모리에서 받아서 변환 (gift.jpg 파일을 쓰지 않아 동시 발송시에도 이미지가 섞이지 않음)
+            try:
+                jpg = transcode_to_mms_jpg(fetch_image(image_url))
+            except MMSImageError as e:
+                return False, str(e)[:40]
+            image_body = base64.b64encode(jpg).decode('utf-8')
 
         self.body['messages'][0]['to'] = phone
         self.body['files'][0]['name'] = 'gift.jpg'
-        self.body['files'][0]['body'] = data.decode('utf-8')
-        request = requests.post(api_url, headers=headers, data=json.dumps(self.body))
-
-        if request.status_code == 202:
+        self.body['files'][0]['body'] = image_body
+        code = sms_client.post(self.body)
+        if code == 202:
             return True, ''
         else:
-            return False, request.status_code
+            return False, code
 
 
 class LMSV1Manager():
@@ -260,7 +204,7 @@ class LMSV1Manager():
         self.body = {
             "type": "LMS",
             "contentType": "COMM",
-            "from": load_credential("sms")["_from"], # 발신번호
+            "from": sms_client.credential["_from"], # 발신번호
             "content": "",  # 기본 메시지 내용
             "subject": "",  # 기본 메세지 제목
             "messages": [{"to": ""}],
@@ -271,24 +215,15 @@ class LMSV1Manager():
         self.body['subject'] = "추첨번호 파기 안내"
 
     def send_lms(self, phone):
-        sms_dic = load_credential("sms")
-        access_key = sms_dic['access_key']
-        url = "https://sens.apigw.ntruss.com"
-        uri = "/sms/v2/services/" + sms_dic['serviceId'] + "/messages"
-        api_url = url + uri
-        timestamp = str(int(time.time() * 1000))
-        string_to_sign = "POST " + uri + "\n" + timestamp + "\n" + access_key
-        signature = make_signature(string_to_sign)
-
-        headers = {
-            'Content-Type': 'application/json; charset=utf-8',
-            'x-ncp-apigw-timestamp': timestamp,
-            'x-ncp-iam-access-key': access_key,
-            'x-ncp-apigw-signature-v2': signature
-        }
         self.body['messages'][0]['to'] = phone
-        request = requests.post(api_url, headers=headers, data=json.dumps(self.body))
-        if request.status_code == 202:
-            return True
-        else:
-            return False
\ No newline at end of file
+        return sms_client.post(self.body) == 202
+
+    def send_lms_messages(self, messages):
+        """
+        여러명에게 한번의 요청으로 발송합니다. (SENS 최대 100명)
+        :param messages: [{"to": phone, "content": content}, ...] 사람마다 내용을 다르게 보낼 수 있습니다.
+        """
+        if not self.body['content']:
+            self.body['content'] = messages[0]['content']
+        self.body['messages'] = messages
+        return sms_client.post(self.body) == 202
@@ -0,0 +1,22 @@
+from products.catalog import item_catalog
+
+
+class QueryBudgetTestMixin(object):
+    """
+    QueryBudgetMiddleware 가 남긴 header 로 view 의 query_budgets 를 넘지 않았는지 확인합니다.
+    N+1 이 생기면 배포 전에 테스트에서 실패하도록 데이터를 여러개 만든 뒤에 호출해주세요.
+    """
+    def assertWithinQueryBudget(self, response):
+        path = response.wsgi_request.path
+        budget = response.get('X-Query-Budget')
+        self.assertIsNotNone(budget, '{} 의 view 에 query_budgets 가 선언되지 않았습니다.'.format(path))
+        count = int(response['X-Query-Count'])
+        self.assertLessEqual(count, int(budget), '{} 쿼리 {}개 (예산 {}개)'.format(path, count, budget))
+
+    def warm_item_catalog(self):
+        """
+        실행중인 서버처럼 상품 catalog 를 미리 읽어둡니다. (재확인 쿼리는 RECHECK_SECONDS 마다 1번)
+        Item 을 만들거나 바꾼 뒤에 호출해주세요.
+        """
+        item_catalog.invalidate()
+        item_catalog.refresh()
@@ -5,3 +5,24 @@ def get_client_ip(request):
     else:
         ip = request.META.get('REMOTE_ADDR')
     return ip
+
+
+def normalize_phone(phone):
+    """
+    '010-1234-5678', '+82 10 1234 5678' -> '01012345678'
+    """
+    digits = ''.join(c for c in str(phone) if c.isdigit())
+    if digits.startswith('82') and len(digits) > 10:
+        digits = '0' + digits[2:]
+    return digits
+
+
+def percentile(values, pct):
+    """
+    벤치마크 결과용 percentile (values 가 비어있으면 0)
+    """
+    if not values:
+        return 0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
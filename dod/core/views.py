@@ -3,7 +3,7 @@ import random
 import string
 
 import requests
-from django.db import transaction, OperationalError
+from django.db import transaction
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import action
@@ -16,13 +16,18 @@ from rest_framework.views import APIView
 from rest_framework.authtoken.models import Token
 from accounts.models import PhoneConfirm, User
 from accounts.serializers import SMSSignupPhoneCheckSerializer, SMSSignupPhoneConfirmSerializer
+from core.sms.outbox import enqueue_winner_mms, enqueue_custom_upload_mms
 from core.sms.utils import SMSV2Manager, MMSV1Manager
 from core.tools import get_client_ip
 from django.conf import settings
-from logic.models import DateTimeLotteryResult, PercentageResult
+from logic.claims import claim_percentage_slot, claim_lottery_time
+from logic.models import UserSelectLogic
 from logs.models import MMSSendLog
-from projects.models import Project
-from products.models import Product, Reward, Item
+from projects.cache import get_project_snapshot
+from projects.counters import bump_counter, defer_counters
+from products.catalog import item_catalog
+from products.models import Product, CustomGifticon
+from products.sampler import claim_reward, claim_custom_gifticon
 from respondent.models import RespondentPhoneConfirm, Respondent, TestRespondentPhoneConfirm, AlertAgreeRespondent
 from respondent.serializers import SMSRespondentPhoneCheckSerializer, RespondentCreateSerializer, \
     SMSRespondentPhoneConfirmSerializer, TestRespondentCreateSerializer
@@ -35,6 +40,7 @@ class SMSViewSet(viewsets.GenericViewSet):
     sms 전송시 공통으로 사용하는 viewset
     """
     permission_classes = [AllowAny]
+    query_budgets = {'respondent_send': 8, 'respondent_confirm': 30}
 
     def get_serializer_class(self):
         if self.action == 'send':
@@ -101,7 +107,7 @@ class SMSViewSet(viewsets.GenericViewSet):
             phone = serializer.validated_data['phone']
             sms_manager = SMSV2Manager()
             sms_manager.set_respondent_content()
-            project = Project.objects.filter(project_hash_key=data.get('project_key')).last()
+            project = get_project_snapshot(data.get('project_key'))
             sms_manager.create_respondent_send_instance(phone=phone, project=project)
 
             if not sms_manager.send_sms(phone=phone):
@@ -115,10 +121,12 @@ class SMSViewSet(viewsets.GenericViewSet):
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
     @transaction.atomic
+    @defer_counters()  # ProjectCounter 갱신은 commit 직전에 한번만 합니다.
     @action(methods=['post'], detail=False)
     def respondent_confirm(self, request, *args, **kwargs):
         """
         설문자 인증번호 인증 api입니다. 인증시 서버에서 5-10초후 reward MMS를 발송합니다.
+        (당첨시 MMSOutbox 만 생성하고, 발송은 mms_outbox_worker 가 합니다.)
         api: api/v1/sms/respondent_confirm
         method: POST
         전화번호, 인증번호 와 url에서 파싱한 project_key와 validator를 담아서 보내주어야 합니다.
@@ -133,15 +141,16 @@ class SMSViewSet(viewsets.GenericViewSet):
         serializer = self.get_serializer(data=data)
         if not serializer.is_valid(raise_exception=True):
             return Response(status=status.HTTP_400_BAD_REQUEST)
-        if not Project.objects.filter(project_hash_key=data.get('project_key')).exists():
-            return Response(status=status.HTTP_404_NOT_FOUND)
         self.data = serializer.validated_data
-        self._set_project()
+        self.project = get_project_snapshot(self.data.get('project_key'))
+        if not self.project:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        self._set_phone_confirm()
 
-        if self.project.kind in [Project.TEST, Project.ONBOARDING] or not self.project.status:
+        if self.project.is_test:
 
             self._create_test_respondent()
-            won_thumbnail = Item.objects.get(order=999).won_thumbnail.url
+            won_thumbnail = item_catalog.custom_upload_item.won_thumbnail_url
 
             return Response({'id': self.project.id,
                              'is_win': True,
@@ -149,56 +158,49 @@ class SMSViewSet(viewsets.GenericViewSet):
                              }, status=status.HTTP_200_OK)
 
         self._create_respondent()
+        self.gifticon = None
+        self.reward = None
         item_name = ''
         won_thumbnail = ''
         if self.is_win:
-            if self.project.custom_gifticons.exists():
+            if CustomGifticon.objects.filter(project_id=self.project.id).exists():
                 # UPDATED 20210725 직접 업로드
                 self._set_custom_gifticon()
-                phone = self.data.get('phone')
-                item_url = self.gifticon.gifticon_img.url
-                item_name = '직접 업로드'
-
-                if type(item_url) is tuple:
-                    item_url = ''.join(item_url)
-
-                mms_manager = MMSV1Manager()
-                mms_manager.set_custom_upload_content()
-                success, code = mms_manager.send_mms(phone=phone, image_url=item_url)
-                if not success:
-                    MMSSendLog.objects.create(code=code, phone=phone, item_name=item_name, item_url=item_url)
-
-                self.gifticon.winner_id = self.respondent.id
-                self.gifticon.save()
-                won_thumbnail = self.gifticon.item.won_thumbnail.url
-
             else:
                 # UPDATED 20210725 구매
                 self._set_random_reward()
 
-                phone = self.data.get('phone')
-                brand = self.reward.product.item.brand.name
-                item_name = self.reward.product.item.name
-                item_url = self.reward.reward_img.url
-                due_date = self.reward.due_date
+        if self.gifticon:
+            phone = self.data.get('phone')
+            item_url = self.gifticon.gifticon_img.url
+            item_name = '직접 업로드'
+
+            if type(item_url) is tuple:
+                item_url = ''.join(item_url)
 
-                if type(item_url) is tuple:
-                    item_url = ''.join(item_url)
+            # 발송은 commit 이후 mms_outbox_worker 가 합니다.
+            enqueue_custom_upload_mms(phone=phone, item_url=item_url,
+                                      mms_payload_id=self.gifticon.mms_payload_id)
+            won_thumbnail = item_catalog.get(self.gifticon.item_id).won_thumbnail_url
 
-                if type(item_name) is tuple:
-                    item_name = ''.join(item_name)
+        elif self.reward:
+            phone = self.data.get('phone')
+            brand = self.reward.product.item.brand.name
+            item_name = self.reward.product.item.name
+            item_url = self.reward.reward_img.url
+            due_date = self.reward.due_date
 
-                mms_manager = MMSV1Manager()
-                mms_manager.set_content(brand, item_name, due_date)
-                success, code = mms_manager.send_mms(phone=phone, image_url=item_url)
-                if not success:
-                    MMSSendLog.objects.create(code=code, phone=phone, item_name=item_name, item_url=item_url,
-                                              due_date=due_date, brand=brand)
+            if type(item_url) is tuple:
+                item_url = ''.join(item_url)
 
-                self.reward.winner_id = self.respondent.id
-                self.reward.save()
-                item_name = self.reward.product.item.short_name
-                won_thumbnail = self.reward.product.item.won_thumbnail.url
+            if type(item_name) is tuple:
+                item_name = ''.join(item_name)
+
+            # 발송은 commit 이후 mms_outbox_worker 가 합니다.
+            enqueue_winner_mms(phone=phone, brand=brand, item_name=item_name, item_url=item_url,
+                               due_date=due_date, mms_payload_id=self.reward.mms_payload_id)
+            item_name = self.reward.product.item.short_name
+            won_thumbnail = item_catalog.get(self.reward.product.item_id).won_thumbnail_url
 
         return Response({'id': self.project.id,
                          'is_win': self.is_win,
@@ -208,26 +210,23 @@ class SMSViewSet(viewsets.GenericViewSet):
                          }, status=status.HTTP_200_OK)
 
     def _set_custom_gifticon(self):
-        custom_gifticons = self.project.custom_gifticons.filter(winner_id__isnull=True)
-        self.gifticon = random.choices(custom_gifticons)[0]
-
-    def _set_random_reward(self): # TODO: 에러날경우 패스 혹은 문의하기로
-        reward_queryset = Reward.objects.filter(winner_id__isnull=True) \
-            .select_related('product', 'product__item', 'product__project', 'product__item__brand')
-        remain_rewards = reward_queryset.filter(product__project=self.project)
-        remain_rewards_id = list(remain_rewards.values_list('id', flat=True))
-        remain_rewards_price = list(remain_rewards.values_list('product__item__price', flat=True))
-        reward_weight = list(map(lambda x: round(1 / x * (sum(remain_rewards_price) / len(remain_rewards_price)))
-                            , remain_rewards_price))
-        random_reward_id_by_weight = random.choices(remain_rewards_id, weights=reward_weight)[0]
-        self.reward = reward_queryset.get(id=random_reward_id_by_weight)
-
-    def _set_project(self):
-        project_queryset = Project.objects.filter(project_hash_key=self.data.get('project_key'))\
-            .prefetch_related('respondents', 'respondents__phone_confirm', 'custom_gifticons')
-
-        self.project = project_queryset.get(project_hash_key=self.data.get('project_key'))
-        if self.project.kind in [Project.TEST, Project.ONBOARDING] or not self.project.status:
+        self.gifticon = claim_custom_gifticon(self.project.id, self.respondent.id)
+        if not self.gifticon:
+            self._cancel_win()
+
+    def _set_random_reward(self):
+        self.reward = claim_reward(self.project.id, self.respondent.id)
+        if not self.reward:
+            self._cancel_win()
+
+    def _cancel_win(self):
+        # 당첨 슬롯은 남았지만 기프티콘이 모두 당첨된 경우 꽝 처리합니다.
+        self.is_win = False
+        Respondent.objects.filter(id=self.respondent.id).update(is_win=False)
+        bump_counter(self.project.id, won_respondent_count=-1)
+
+    def _set_phone_confirm(self):
+        if self.project.is_test:
             self.phone_confirm = TestRespondentPhoneConfirm.objects.filter(phone=self.data.get('phone'),
                                                                            confirm_key=self.data.get('confirm_key'),
                                                                            is_confirmed=True).last()
@@ -238,58 +237,46 @@ class SMSViewSet(viewsets.GenericViewSet):
 
     def _create_respondent(self):
         self.is_win = self._am_i_winner()
-        data = {'project': self.project.id,
-                'phone_confirm': self.phone_confirm.id,
+        data = {'phone_confirm': self.phone_confirm.id,
                 'is_win': self.is_win}
 
         serializer = RespondentCreateSerializer(data=data)
         serializer.is_valid(raise_exception=True)
-        self.respondent = serializer.save()
+        self.respondent = serializer.save(project_id=self.project.id)
 
     def _create_test_respondent(self):
-        data = {'project': self.project.id,
-                'phone_confirm': self.phone_confirm.id,
+        data = {'phone_confirm': self.phone_confirm.id,
                 'is_win': True}
 
         serializer = TestRespondentCreateSerializer(data=data)
         serializer.is_valid(raise_exception=True)
-        self.respondent = serializer.save()
+        self.respondent = serializer.save(project_id=self.project.id)
 
     def _am_i_winner(self):
         # 프로젝트 생성자는 무조건 꽝!
-        if self.phone_confirm.phone == self.project.owner.phone:
+        if self.phone_confirm.phone == self.project.owner_phone:
             return False
 
-        if self.project.select_logics.last().kind == 1:
+        select_logic = UserSelectLogic.objects.filter(project_id=self.project.id).last()
+        if select_logic.kind == 1:
             # BEFORE v2 update
 
-            if self.project.products.filter(rewards__isnull=True).exists():
+            if Product.objects.filter(project_id=self.project.id, rewards__isnull=True).exists():
                 # staff 업로드 하지 않았다면 꽝
                 return False
 
-            self.lucky_times = self.project.select_logics.last().lottery_times.filter(is_used=False)
+            self.lucky_times = select_logic.lottery_times.filter(is_used=False)
             now = datetime.datetime.now()
             self.valid_lucky_times = self.lucky_times.filter(lucky_time__lte=now)
             if not self.valid_lucky_times.exists():
                 # 당첨 안된 경우
                 return False
             else:
-                try:
-                    with transaction.atomic(using='default'):
-                        vlt = DateTimeLotteryResult.objects.select_for_update(nowait=True)\
-                            .filter(logic__project=self.project).filter(is_used=False, lucky_time__lte=now).first()
-                        vlt.is_used = True
-                        vlt.save()
-                        val = True
-                except OperationalError:
-                    val = False
-                except DateTimeLotteryResult.DoesNotExist:
-                    val = False
-                return val
-
-        elif self.project.select_logics.last().kind == 3:
+                return claim_lottery_time(self.project.id, now) is not None
+
+        elif select_logic.kind == 3:
             # UPDATED v2 : percentage
-            self.left_percentages = self.project.select_logics.last().percentages.filter(is_used=False)
+            self.left_percentages = select_logic.percentages.filter(is_used=False)
             if not self.left_percentages.exists():
                 # 추첨 다 됨
                 return False
@@ -300,19 +287,8 @@ class SMSViewSet(viewsets.GenericViewSet):
                 if not result[0]:
                     return False
                 else:
-                    try:
-                        # 만약 동시에 호출하여 연속 접속자가 당첨인 경우, db lock걸어 중복 전송 방지
-                        with transaction.atomic(using='default'):
-                            vlt = PercentageResult.objects.select_for_update(nowait=True) \
-                                .filter(logic__project=self.project).filter(is_used=False).first()
-                            vlt.is_used = True
-                            vlt.save()
-                            val = True
-                    except OperationalError:
-                        val = False
-                    except PercentageResult.DoesNotExist:
-                        val = False
-                    return val
+                    # 동시에 여러명이 당첨되어도 각자 다른 슬롯을 점유 (lock 대기, 당첨 유실 없음)
+                    return claim_percentage_slot(self.project.id) is not None
 
 
 class SendMMSAPIView(APIView):
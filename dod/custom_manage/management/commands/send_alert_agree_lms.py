@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from custom_manage.utils import send_alert_agree_sms
+
+
+class Command(BaseCommand):
+    help = '전화번호 파기 및 알림 신청 안내 LMS 를 발송합니다. 중단된 경우 다시 실행하면 남은 사람부터 이어서 보냅니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--phone', help='해당 번호로만 테스트 발송합니다.')
+        parser.add_argument('--workers', type=int, default=4, help='동시에 요청하는 스레드 수')
+        parser.add_argument('--rate', type=float, default=5, help='초당 최대 요청 수 (요청당 최대 100명)')
+
+    def handle(self, *args, **options):
+        sent, failed = send_alert_agree_sms(phone=options['phone'], workers=options['workers'],
+                                            rate=options['rate'])
+        self.stdout.write('sent: {}, failed: {}'.format(sent, failed))
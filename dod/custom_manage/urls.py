@@ -1,7 +1,7 @@
 from django.urls import path, include
 
 from custom_manage.views import reset_pw, AutoSendLeftMMSAPIView, ProjectDeadLinkNotification, \
-    RespondentCheckMonitoring, UserCheckMonitoring
+    RespondentCheckMonitoring, UserCheckMonitoring, CumulativeDrawsCountReconcileAPIView
 
 app_name = 'custom_manage'
 
@@ -12,4 +12,5 @@ urlpatterns = [
     path('deadline_send_sms/', ProjectDeadLinkNotification.as_view()),
     path('respondent_monitor/', RespondentCheckMonitoring.as_view()),
     path('user_monitor/', UserCheckMonitoring.as_view()),
+    path('reconcile_draw_count/', CumulativeDrawsCountReconcileAPIView.as_view()),
 ]
\ No newline at end of file
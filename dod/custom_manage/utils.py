@@ -2,6 +2,7 @@ import datetime
 import random
 import string
 
+from core.sms.campaign import send_lms_campaign
 from core.sms.utils import LMSV1Manager
 from projects.models import Project
 from respondent.models import AlertAgreeRespondent
@@ -11,7 +12,12 @@ def generate_random_key(length=10):
     return ''.join(random.choices(string.digits + string.ascii_letters, k=length))
 
 
-def send_alert_agree_sms(phone=None):
+def send_alert_agree_sms(phone=None, workers=4, rate=5):
+    """
+    phone 이 있으면 해당 번호로 테스트 발송하고, 없으면 어제 이후 마감된 추첨 응답자 전체에게 발송합니다.
+    전체 발송은 100명씩 묶어서 보내며, 중간에 중단되어도 다시 실행하면 보내지 않은 사람(send=False)부터 이어서 보냅니다.
+    :return: (발송 성공 수, 실패 수)
+    """
     if phone:
         phone = str(phone)
         respondent = AlertAgreeRespondent.objects.create(phone=phone, key=generate_random_key())
@@ -21,7 +27,8 @@ def send_alert_agree_sms(phone=None):
         if lms_manager.send_lms(phone=respondent.phone):
             respondent.send = True
             respondent.save()
-        print('test END')
+            return 1, 0
+        return 0, 1
     else:
         yesterday = datetime.datetime.now().date() - datetime.timedelta(days=1)
         projects = Project.objects.filter(dead_at__gte=yesterday, is_active=True, kind=Project.NORMAL)
@@ -32,19 +39,8 @@ def send_alert_agree_sms(phone=None):
         alert_respondent_list = [AlertAgreeRespondent(phone=i, key=generate_random_key()) for i in new_respondent_list]
         AlertAgreeRespondent.objects.bulk_create(alert_respondent_list)
 
-        count = 0
-        for respondent in AlertAgreeRespondent.objects.filter(send=False):
-            message = set_message(respondent)
-            lms_manager = LMSV1Manager()
-            lms_manager.alert_agree_content(message)
-            if lms_manager.send_lms(phone=respondent.phone):
-                respondent.send = True
-                respondent.save()
-
-            print('process: {}'.format(count))
-            count = count + 1
-
-        print('SEND FIN')
+        return send_lms_campaign(AlertAgreeRespondent.objects.all(), set_message,
+                                 LMSV1Manager.alert_agree_content, workers=workers, rate=rate)
 
 
 def set_message(respondent):
@@ -15,7 +15,9 @@ from core.sms.utils import MMSV1Manager, SMSV2Manager
 from core.tools import get_client_ip
 from logs.models import MMSSendLog
 from products.models import Reward
+from projects.counters import bump_counter
 from projects.models import Project, ProjectMonitoringLog
+from respondent.counters import reconcile_total_count
 from respondent.models import RespondentPhoneConfirm, AlertAgreeRespondent
 from .forms import PostForm
 from .loader import load_credential
@@ -60,7 +62,8 @@ class AutoSendLeftMMSAPIView(APIView):
         total_left_rewards = 0
         total_succeed_mms = 0
         for project in project_qs:
-            left_rewards = Reward.objects.filter(winner_id__isnull=True, product__project=project)
+            left_rewards = Reward.objects.filter(winner_id__isnull=True, product__project=project)\
+                .select_related('mms_payload')
             if left_rewards.exists():
                 left_count = left_rewards.count()
                 total_left_rewards = total_left_rewards + left_count
@@ -79,9 +82,11 @@ class AutoSendLeftMMSAPIView(APIView):
                         if type(item_name) is tuple:
                             item_name = ''.join(item_name)
 
+                        image_body = reward.mms_payload.body if reward.mms_payload else None
+
                         mms_manager = MMSV1Manager()
                         mms_manager.set_monitored_content(brand, item_name, due_date)
-                        success, code = mms_manager.send_mms(phone=winner, image_url=item_url)
+                        success, code = mms_manager.send_mms(phone=winner, image_url=item_url, image_body=image_body)
                         if not success:
                             MMSSendLog.objects.create(code=code, phone=winner, item_name=item_name, item_url=item_url,
                                                       due_date=due_date, brand=brand)
@@ -89,11 +94,12 @@ class AutoSendLeftMMSAPIView(APIView):
                             total_succeed_mms = total_succeed_mms + 1
                         reward.winner_id = new_winners[i][1]
                         reward.save()
+                        bump_counter(project.id, used_reward_count=1)
                 except:
                     pass
             elif project.custom_gifticons.filter(winner_id__isnull=True).exists():
                 # UPDATED 20210727 custom gifticon
-                left_gifticons = project.custom_gifticons.filter(winner_id__isnull=True)
+                left_gifticons = project.custom_gifticons.filter(winner_id__isnull=True).select_related('mms_payload')
                 left_count = left_gifticons.count()
                 total_left_rewards = total_left_rewards + left_count
                 phone_list = list(project.respondents.filter(is_win=False).
@@ -108,15 +114,18 @@ class AutoSendLeftMMSAPIView(APIView):
                         if type(item_url) is tuple:
                             item_url = ''.join(item_url)
 
+                        image_body = gifticon.mms_payload.body if gifticon.mms_payload else None
+
                         mms_manager = MMSV1Manager()
                         mms_manager.set_custom_upload_content()
-                        success, code = mms_manager.send_mms(phone=winner, image_url=item_url)
+                        success, code = mms_manager.send_mms(phone=winner, image_url=item_url, image_body=image_body)
                         if not success:
                             MMSSendLog.objects.create(code=code, phone=winner, item_name=item_name, item_url=item_url)
                         else:
                             total_succeed_mms = total_succeed_mms + 1
                         gifticon.winner_id = new_winners[i][1]
                         gifticon.save()
+                        bump_counter(project.id, used_custom_gifticon_count=1)
                 except:
                     pass
 
@@ -165,6 +174,19 @@ class ProjectDeadLinkNotification(APIView):
         return Response(status=status.HTTP_200_OK)
 
 
+class CumulativeDrawsCountReconcileAPIView(APIView):
+    """
+    랜딩페이지 누적 추첨수(RespondentTotalCount)를 실제 Respondent 수와 맞춥니다. (every 1 hour)
+    """
+
+    def get(self, request, *args, **kwargs):
+        if 'python-requests' not in request.META.get('HTTP_USER_AGENT', ""):
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+
+        stored, actual = reconcile_total_count()
+        return Response({'stored': stored, 'actual': actual}, status=status.HTTP_200_OK)
+
+
 class RespondentCheckMonitoring(APIView):
 
     def post(self, request, *args, **kwargs):
@@ -28,8 +28,6 @@ ALLOWED_HOSTS = ['13.209.225.239',
                  '172.31.6.130',
                  '172.30.1.26']
 
-INTERNAL_IPS = ('172.30.1.18')
-
 # Application definition
 INSTALLED_APPS = [
     'django.contrib.auth',
@@ -64,7 +62,6 @@ THIRD_APPS = [
     'pymysql',
     # 'wpadmin',
     'storages',
-    'debug_toolbar',
     'crispy_forms',
     # 'django_crontab'
 ]
@@ -81,7 +78,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'dod.urls'
@@ -191,6 +188,10 @@ MEDIA_LOCATION = 'media'
 MEDIA_URL = "https://%s/%s/" % (AWS_S3_HOST, MEDIA_LOCATION)
 
 DEFAULT_FILE_STORAGE = 'dod.storage.CustomS3Boto3Storage'
+# dod.storage.CustomS3Boto3Storage 가 모든 업로드에서 같이 쓰는 boto3 client 의 connection pool 크기
+AWS_S3_MAX_POOL_CONNECTIONS = 20
+# 직접 업로드한 기프티콘을 동시에 올리는 thread 수 (products.uploads)
+CUSTOM_UPLOAD_WORKERS = 8
 
 STATIC_ROOT = "https://%s/statics/" % AWS_S3_CUSTOM_DOMAIN
 MEDIA_ROOT = "https://%s/media/" % AWS_S3_CUSTOM_DOMAIN
@@ -241,4 +242,42 @@ APPEND_SLASH = True
 CRISPY_TEMPLATE_PACK = 'bootstrap4'
 
 
-FILE_UPLOAD_MAX_MEMORY_SIZE = 50242880
+# 이보다 큰 업로드는 메모리 대신 임시파일로 받습니다. (기프티콘 이미지는 storage 에 바로 올리는 것을 권장 : products.direct_uploads)
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440
+
+
+# SENS (ncloud SMS/MMS/알림톡) : core.sens.SENSClient
+SENS_API_URL = 'https://sens.apigw.ntruss.com'
+SENS_TIMEOUT = (3, 10)  # (connect, read) 초
+SENS_MAX_RETRIES = 2
+SENS_POOL_SIZE = 10
+
+
+# 서버(프로세스)별 메모리 캐시 : core.content_cache, respondent.counters
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dod',
+    }
+}
+# 다른 서버에서 수정된 내용은 최대 이 시간(초)까지 이전 내용을 내려줄 수 있습니다.
+CONTENT_CACHE_TIMEOUT = 60 * 5
+
+
+# core.middleware.QueryBudgetMiddleware 의 요청별 쿼리 수/시간 log
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.request': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -1,7 +1,31 @@
+import os
+import threading
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from storages.backends.s3boto3 import S3Boto3Storage
-import os
-from tempfile import SpooledTemporaryFile
+
+# 업로드는 요청 thread(또는 products.uploads 의 thread pool)에서 바로 PUT 하고, 파일별로 thread 를 더 만들지 않습니다.
+UPLOAD_TRANSFER_CONFIG = TransferConfig(use_threads=False)
+
+
+class _KeepOpenFile(object):
+    """
+    s3transfer 는 업로드가 끝나면 넘겨받은 파일을 닫습니다. storage.save 뒤에도 호출한 쪽이 파일을 읽을 수 있도록
+    close 만 무시하고 나머지는 원래 파일로 넘깁니다.
+    """
+    def __init__(self, file):
+        self._file = file
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def close(self):
+        pass
 
 
 class MediaStorage(S3Boto3Storage):
@@ -13,33 +37,85 @@ class StaticStorage(S3Boto3Storage):
 
 
 class CustomS3Boto3Storage(S3Boto3Storage):
-
-    location = settings.MEDIA_LOCATION
-
     """
-    This is our custom version of S3Boto3Storage that fixes a bug in boto3 where the passed in file is closed upon upload.
-    https://github.com/boto/boto3/issues/929
-    https://github.com/matthewwithanm/django-imagekit/issues/391
-    https://github.com/jschneier/django-storages/issues/382#issuecomment-377174808
+    업로드할 때 프로세스 안의 모든 thread 가 boto3 client 하나(connection pool 공유)를 사용합니다.
+    django-storages 기본 동작은 thread 마다 session/resource 를 새로 만들어서, 여러장을 동시에 올리면
+    thread 마다 credential 로딩과 TLS 연결을 다시 합니다. (boto3 client 는 thread-safe)
+    업로드 파일은 복사하지 않고 그대로 읽어서 올립니다. boto3(s3transfer) 가 올린 파일을 닫기 때문에
+    _KeepOpenFile 로 감싸서 넘기고, 저장 뒤에도 원래 파일은 열린 채로 둡니다.
     """
+    location = settings.MEDIA_LOCATION
+
+    _client = None
+    _client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        cls = CustomS3Boto3Storage
+        if cls._client is None:
+            with cls._client_lock:
+                if cls._client is None:
+                    config = self.config.merge(Config(
+                        max_pool_connections=getattr(settings, 'AWS_S3_MAX_POOL_CONNECTIONS', 10),
+                        retries={'max_attempts': 3, 'mode': 'standard'},
+                    ))
+                    cls._client = boto3.session.Session().client(
+                        's3',
+                        aws_access_key_id=self.access_key,
+                        aws_secret_access_key=self.secret_key,
+                        aws_session_token=self.security_token,
+                        region_name=self.region_name,
+                        use_ssl=self.use_ssl,
+                        endpoint_url=self.endpoint_url,
+                        config=config,
+                        verify=self.verify,
+                    )
+        return cls._client
+
+    def _save(self, name, content):
+        cleaned_name = self._clean_name(name)
+        name = self._normalize_name(cleaned_name)
+        params = self._get_write_parameters(name, content)
+
+        if (self.gzip and
+                params['ContentType'] in self.gzip_content_types and
+                'ContentEncoding' not in params):
+            content = self._compress_content(content)
+            params['ContentEncoding'] = 'gzip'
 
-    def _save_content(self, obj, content, parameters):
-        """
-        We create a clone of the content file as when this is passed to boto3 it wrongly closes
-        the file upon upload where as the storage backend expects it to still be open
-        """
-        # Seek our content back to the start
         content.seek(0, os.SEEK_SET)
+        self.client.upload_fileobj(_KeepOpenFile(content), self.bucket_name, name, ExtraArgs=params, Config=UPLOAD_TRANSFER_CONFIG)
+        return cleaned_name
 
-        # Create a temporary file that will write to disk after a specified size
-        content_autoclose = SpooledTemporaryFile()
+    def exists(self, name):
+        name = self._normalize_name(self._clean_name(name))
+        try:
+            self.client.head_object(Bucket=self.bucket_name, Key=name)
+            return True
+        except ClientError:
+            return False
 
-        # Write our original content into our copy that will be closed by boto3
-        content_autoclose.write(content.read())
+    def presigned_upload(self, name, content_type, expires_in, max_bytes):
+        """
+        클라이언트가 서버를 거치지 않고 name 으로 바로 업로드할 수 있는 presigned POST 를 만듭니다.
+        content type 과 크기(max_bytes 이하)는 S3 가 policy 로 검사합니다.
+        :return: {'method', 'url', 'fields'} fields 를 form 에 넣고 마지막에 file 을 붙여서 POST 합니다.
+        """
+        fields = {'Content-Type': content_type}
+        conditions = [{'Content-Type': content_type}, ['content-length-range', 1, max_bytes]]
+        if self.default_acl:
+            fields['acl'] = self.default_acl
+            conditions.append({'acl': self.default_acl})
+        post = self.client.generate_presigned_post(
+            self.bucket_name, self._normalize_name(self._clean_name(name)),
+            Fields=fields, Conditions=conditions, ExpiresIn=expires_in)
+        return {'method': 'POST', 'url': post['url'], 'fields': post['fields']}
 
-        # Upload the object which will auto close the content_autoclose instance
-        super(CustomS3Boto3Storage, self)._save_content(obj, content_autoclose, parameters)
 
-        # Cleanup if this is fixed upstream our duplicate should always close
-        if not content_autoclose.closed:
-            content_autoclose.close()
\ No newline at end of file
+class LocalDirectUploadStorage(FileSystemStorage):
+    """
+    로컬/테스트용 presigned upload 대용입니다. 업로드 대상으로 MEDIA_URL 경로만 알려주기 때문에
+    클라이언트 대신 파일을 storage 에 직접 저장한 뒤 finalize 를 호출합니다.
+    """
+    def presigned_upload(self, name, content_type, expires_in, max_bytes):
+        return {'method': 'PUT', 'url': self.url(name), 'fields': {}}
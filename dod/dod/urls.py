@@ -21,7 +21,6 @@ from board.views import CumulativeDrawsCountAPIView
 from core.views import SendMMSAPIView
 from custom_manage.sites import superadmin_panel, staff_panel
 from custom_manage.views import AutoSendLeftMMSAPIView, AgreeAlertOKView
-from django.conf import settings
 
 from notice.views import TestGoogleFormsAPIView
 from payment.views import pay_test
@@ -67,12 +66,3 @@ urlpatterns = [
     path('alim/<slug:slug>', AgreeAlertOKView.as_view()),
 
 ]
-if settings.DEBUG:
-    import debug_toolbar
-    urlpatterns += [
-        path('__debug__/', include(debug_toolbar.urls)),
-
-        # For django versions before 2.0:
-        # url(r'^__debug__/', include(debug_toolbar.urls)),
-
-    ]
\ No newline at end of file
@@ -0,0 +1 @@
+default_app_config = 'logic.apps.LogicConfig'
@@ -0,0 +1,60 @@
+import random
+
+from django.db import connection, transaction
+
+from logic.models import UserSelectLogic, PercentageResult, DateTimeLotteryResult
+
+# conditional update 방식에서 한번에 가져오는 후보 슬롯 수
+CLAIM_CANDIDATES = 10
+
+
+def _claim_slot(queryset):
+    """
+    queryset(is_used=False 인 당첨 슬롯들) 중 하나를 점유(is_used=True)하고 점유한 슬롯의 id를 리턴합니다.
+    남은 슬롯이 없으면 None 을 리턴합니다.
+
+    이전에는 select_for_update(nowait=True) 로 첫번째 슬롯을 잡았기 때문에,
+    동시에 당첨된 응답자는 lock 을 얻지 못해 OperationalError -> 꽝 처리가 되었습니다. (당첨 유실)
+    * SKIP LOCKED 를 지원하는 db(MySQL 8, PostgreSQL)는 다른 요청이 잡고 있는 슬롯을 건너뛰고 다음 슬롯을 잡습니다.
+    * 지원하지 않는 db 는 'is_used=False 인 경우에만 update' 하는 단일 쿼리로 점유하고, 실패하면 다음 후보로 넘어갑니다.
+    두 방식 모두 N명이 동시에 당첨되면 N개의 서로 다른 슬롯을 점유합니다.
+    * SKIP LOCKED 가 join 된 테이블(UserSelectLogic)의 lock 까지 보지 않도록 logic 은 subquery(logic__in)로 걸러야 합니다.
+    """
+    model = queryset.model
+    queryset = queryset.filter(is_used=False).order_by('id')
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic(using='default'):
+            slot_id = queryset.select_for_update(skip_locked=True).values_list('id', flat=True).first()
+            if slot_id is None:
+                return None
+            model.objects.filter(id=slot_id).update(is_used=True)
+            return slot_id
+
+    while True:
+        candidates = list(queryset.values_list('id', flat=True)[:CLAIM_CANDIDATES])
+        if not candidates:
+            return None
+        # 동시 요청끼리 같은 후보에 몰리지 않도록 섞어서 시도
+        random.shuffle(candidates)
+        for slot_id in candidates:
+            if model.objects.filter(id=slot_id, is_used=False).update(is_used=True):
+                return slot_id
+
+
+def claim_percentage_slot(project):
+    """
+    확률 로직(UserSelectLogic.kind=3)의 당첨 슬롯(PercentageResult) 하나를 점유합니다.
+    :return: 점유한 PercentageResult id, 남은 슬롯이 없으면 None
+    """
+    logics = UserSelectLogic.objects.filter(project=project)
+    return _claim_slot(PercentageResult.objects.filter(logic__in=logics))
+
+
+def claim_lottery_time(project, now):
+    """
+    [DEPRECATED] 시간 로직(UserSelectLogic.kind=1)의 당첨 시간(DateTimeLotteryResult) 하나를 점유합니다.
+    :return: 점유한 DateTimeLotteryResult id, 남은 시간이 없으면 None
+    """
+    logics = UserSelectLogic.objects.filter(project=project)
+    return _claim_slot(DateTimeLotteryResult.objects.filter(logic__in=logics, lucky_time__lte=now))
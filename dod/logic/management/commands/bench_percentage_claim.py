@@ -0,0 +1,120 @@
+import datetime
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction, OperationalError
+
+from accounts.models import User
+from core.tools import percentile
+from logic.claims import claim_percentage_slot
+from logic.models import UserSelectLogic, PercentageResult
+from projects.models import Project
+
+
+def _legacy_nowait_claim(project):
+    """
+    이전 _am_i_winner 의 점유 방식입니다. (비교용)
+    lock 을 얻지 못하면 당첨을 꽝으로 처리합니다.
+    """
+    try:
+        with transaction.atomic(using='default'):
+            vlt = PercentageResult.objects.select_for_update(nowait=True) \
+                .filter(logic__project=project).filter(is_used=False).first()
+            if vlt is None:
+                return None
+            vlt.is_used = True
+            vlt.save()
+            return vlt.id
+    except OperationalError:
+        return None
+
+
+class Command(BaseCommand):
+    help = '하나의 프로젝트에 여러 스레드로 동시에 당첨 슬롯 점유를 시도하고, 점유된 슬롯 수를 기대값과 비교합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--slots', type=int, default=100, help='생성할 당첨 슬롯(PercentageResult) 수')
+        parser.add_argument('--threads', type=int, default=32, help='동시에 점유를 시도하는 스레드 수')
+        parser.add_argument('--attempts', type=int, default=5, help='스레드당 점유 시도 횟수')
+        parser.add_argument('--hold-ms', type=int, default=20,
+                            help='점유 후 transaction 을 유지하는 시간(ms). respondent_confirm 의 나머지 처리 시간을 흉내냅니다.')
+        parser.add_argument('--mode', choices=['claim', 'nowait'], default='claim',
+                            help='claim: logic.claims 사용, nowait: 이전 select_for_update(nowait=True) 방식')
+        parser.add_argument('--keep', action='store_true', help='벤치마크 데이터를 삭제하지 않습니다.')
+
+    def handle(self, *args, **options):
+        owner, project = self._seed(options['slots'])
+        claim = claim_percentage_slot if options['mode'] == 'claim' else _legacy_nowait_claim
+        hold = options['hold_ms'] / 1000
+        barrier = threading.Barrier(options['threads'])
+        lock = threading.Lock()
+        results = []
+        latencies = []
+        errors = []
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(options['attempts']):
+                    try:
+                        with transaction.atomic(using='default'):
+                            started = time.perf_counter()
+                            slot_id = claim(project)
+                            elapsed = time.perf_counter() - started
+                            if hold:
+                                time.sleep(hold)
+                    except OperationalError as e:
+                        with lock:
+                            errors.append(e)
+                        continue
+                    with lock:
+                        results.append(slot_id)
+                        latencies.append(elapsed)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        total_time = time.perf_counter() - started
+
+        claimed = [slot_id for slot_id in results if slot_id is not None]
+        distinct = set(claimed)
+        expected = min(options['slots'], len(results) + len(errors))
+        used = PercentageResult.objects.filter(logic__project=project, is_used=True).count()
+
+        self.stdout.write('mode: {}'.format(options['mode']))
+        self.stdout.write('threads: {} / attempts: {} / slots: {}'.format(
+            options['threads'], len(results) + len(errors), options['slots']))
+        self.stdout.write('expected slots: {}'.format(expected))
+        self.stdout.write('claimed slots: {} (distinct {}, duplicated {})'.format(
+            len(claimed), len(distinct), len(claimed) - len(distinct)))
+        self.stdout.write('used slots in db: {}'.format(used))
+        self.stdout.write('lost wins: {}'.format(expected - len(distinct)))
+        self.stdout.write('db errors: {}'.format(len(errors)))
+        self.stdout.write('claim latency p50: {:.2f}ms / p99: {:.2f}ms'.format(
+            percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000))
+        self.stdout.write('elapsed: {:.2f}s'.format(total_time))
+
+        if not options['keep']:
+            owner.delete()
+
+    @staticmethod
+    def _seed(slots):
+        now = datetime.datetime.now()
+        owner = User.objects.create_user(phone='bench-{}'.format(int(time.time() * 1000)))
+        project = Project.objects.create(name='bench',
+                                         project_hash_key='bench{}'.format(owner.id),
+                                         owner=owner,
+                                         start_at=now,
+                                         dead_at=now + datetime.timedelta(days=1),
+                                         winner_count=slots,
+                                         status=True,
+                                         is_active=True)
+        logic = UserSelectLogic.objects.create(kind=UserSelectLogic.Percentage, project=project)
+        PercentageResult.objects.bulk_create([PercentageResult(percentage=100, logic=logic) for _ in range(slots)])
+        return owner, project
@@ -0,0 +1,35 @@
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from logic.models import DODAveragePercentage, PercentageResult
+
+AVERAGE_PERCENTAGE_CACHE_KEY = 'logic:dod_average_percentage'
+
+
+def get_dod_average_percentage():
+    """
+    가장 최근에 등록한 dod 평균 당첨확률(%)입니다. staff 가 수정하면 signal 로 캐시를 지웁니다.
+    다른 서버(프로세스)에서 수정된 값은 CONTENT_CACHE_TIMEOUT 이후에 반영됩니다.
+    """
+    average = cache.get(AVERAGE_PERCENTAGE_CACHE_KEY)
+    if average is None:
+        average = DODAveragePercentage.objects.order_by('id').values_list('average_percentage', flat=True).last()
+        if average is not None:
+            cache.set(AVERAGE_PERCENTAGE_CACHE_KEY, average, settings.CONTENT_CACHE_TIMEOUT)
+    return average
+
+
+def invalidate_dod_average_percentage():
+    cache.delete(AVERAGE_PERCENTAGE_CACHE_KEY)
+
+
+def create_percentage_results(logic, count):
+    """
+    당첨 슬롯 count 개의 확률을 한번에 뽑아서 bulk_create 합니다.
+    각 슬롯은 dod 평균확률 +- 1% 안에서 0.1% 단위로 고르게 뽑습니다.
+    """
+    average = int(round(get_dod_average_percentage() * 10))
+    percentages = np.random.randint(abs(average - 10), abs(average + 10) + 1, size=count) / 10
+    return PercentageResult.objects.bulk_create(
+        [PercentageResult(percentage=round(float(percentage), 2), logic=logic) for percentage in percentages])
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from logic.models import DODAveragePercentage
+from logic.percentages import invalidate_dod_average_percentage
+
+
+@receiver([post_save, post_delete], sender=DODAveragePercentage)
+def reset_dod_average_percentage(sender, **kwargs):
+    invalidate_dod_average_percentage()
@@ -1,10 +1,18 @@
 from django.contrib import admin
 from custom_manage.sites import staff_panel
-from logs.models import MMSSendLog
+from logs.models import MMSSendLog, MMSOutbox
 
 
 class MMSSendLogsStaffAdmin(admin.ModelAdmin):
     list_display = ['pk', 'code', 'phone', 'item_name', 'created_at', 'resend']
 
 
+class MMSOutboxStaffAdmin(admin.ModelAdmin):
+    list_display = ['pk', 'kind', 'status', 'phone', 'item_name', 'attempts', 'last_code',
+                    'next_attempt_at', 'created_at']
+    list_filter = ['status', 'kind']
+    search_fields = ['phone']
+
+
 staff_panel.register(MMSSendLog, MMSSendLogsStaffAdmin)
+staff_panel.register(MMSOutbox, MMSOutboxStaffAdmin)
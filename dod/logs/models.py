@@ -1,3 +1,5 @@
+import datetime
+
 from django.db import models
 
 
@@ -11,3 +13,50 @@ class MMSSendLog(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     resend = models.BooleanField(default=False)
+
+
+class MMSOutbox(models.Model):
+    """
+    당첨 MMS 발송 대기열입니다.
+    당첨 처리와 같은 transaction 안에서 생성되고, 당첨이 commit 된 이후 mms_outbox_worker 가 꺼내서 발송합니다.
+    최종 발송 실패시 MMSSendLog 를 생성합니다. (Staff 재발송 / slack 알림)
+    """
+    WINNER = 1
+    CUSTOM_UPLOAD = 2
+    MONITORED = 3
+    KINDS = (
+        (WINNER, '구매 기프티콘 당첨'),
+        (CUSTOM_UPLOAD, '직접 업로드 기프티콘 당첨'),
+        (MONITORED, '재추첨 당첨'),
+    )
+
+    PENDING = 0
+    SENDING = 1
+    SENT = 2
+    FAILED = -1
+    STATUS = (
+        (PENDING, '발송대기'),
+        (SENDING, '발송중'),
+        (SENT, '발송완료'),
+        (FAILED, '발송실패'),
+    )
+
+    kind = models.IntegerField(choices=KINDS, default=WINNER)
+    status = models.IntegerField(choices=STATUS, default=PENDING)
+    phone = models.CharField(max_length=30)
+    brand = models.CharField(max_length=30, null=True)
+    item_name = models.CharField(max_length=100)
+    item_url = models.URLField()
+    due_date = models.CharField(max_length=30, null=True)
+    mms_payload = models.ForeignKey('products.MMSImagePayload', null=True, blank=True, on_delete=models.SET_NULL,
+                                    help_text='미리 변환해둔 이미지가 있으면 item_url 대신 사용합니다.')
+    attempts = models.IntegerField(default=0, help_text='발송 시도 횟수')
+    last_code = models.CharField(max_length=40, blank=True, default='', help_text='마지막 발송 실패 코드')
+    next_attempt_at = models.DateTimeField(default=datetime.datetime.now, help_text='이 시간 이후에 발송(재시도)합니다.')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
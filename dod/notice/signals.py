@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.content_cache import bump_content_version, NOTICE
+from notice.models import LinkCopyNotice, MainPageDodExplanation, FAQLink, NoticeLink, SuggestionLink, ContactLink, \
+    TestGoogleFormsUrl
+
+
+@receiver([post_save, post_delete], sender=LinkCopyNotice)
+@receiver([post_save, post_delete], sender=MainPageDodExplanation)
+@receiver([post_save, post_delete], sender=FAQLink)
+@receiver([post_save, post_delete], sender=NoticeLink)
+@receiver([post_save, post_delete], sender=SuggestionLink)
+@receiver([post_save, post_delete], sender=ContactLink)
+@receiver([post_save, post_delete], sender=TestGoogleFormsUrl)
+def bump_notice_content_version(sender, **kwargs):
+    bump_content_version(NOTICE)
@@ -1,11 +1,11 @@
 from django.shortcuts import render
 
 # Create your views here.
-from rest_framework import viewsets, mixins, status
+from rest_framework import viewsets, mixins
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from core.content_cache import content_response, NOTICE
 from notice.models import MainPageDodExplanation, FAQLink, NoticeLink, SuggestionLink, PrivacyPolicyLink, \
     TermsOfServiceLink, ContactLink, TestGoogleFormsUrl
 from notice.serializers import DodExplanationSerializer, ThirdPartyMenuListSerializer, FAQMenuSerializer, \
@@ -25,8 +25,8 @@ class DodExplanationAPIView(viewsets.GenericViewSet,
         """
         api : api/v1/dod-explanation/
         """
-
-        return super(DodExplanationAPIView, self).list(request, args, kwargs)
+        return content_response(request, 'dod_explanation', [NOTICE],
+                                lambda: self.get_serializer(self.get_queryset(), many=True).data)
 
 
 class ThirdPartyMenuListAPIView(viewsets.GenericViewSet,
@@ -36,25 +36,15 @@ class ThirdPartyMenuListAPIView(viewsets.GenericViewSet,
     permission_classes = [IsAuthenticated]
 
     def list(self, request, *args, **kwargs):
-        faq = None if not FAQLink.objects.filter(is_active=True).exists()\
-            else FAQLink.objects.filter(is_active=True).last()
-
-        notice = None if not NoticeLink.objects.filter(is_active=True).exists()\
-            else NoticeLink.objects.filter(is_active=True).last()
-
-        suggestion = None if not SuggestionLink.objects.filter(is_active=True).exists()\
-            else SuggestionLink.objects.filter(is_active=True).last()
+        return content_response(request, 'third_party_menu', [NOTICE], self._menu_data)
 
-        contact = None if not ContactLink.objects.filter(is_active=True).exists() \
-            else ContactLink.objects.filter(is_active=True).last()
-
-        menu_list = [faq, contact, suggestion, notice]
+    def _menu_data(self):
         menu_data = []
-        for menu in menu_list:
+        for model in [FAQLink, ContactLink, SuggestionLink, NoticeLink]:
+            menu = model.objects.filter(is_active=True).last()
             if menu:
                 menu_data.append(self._meta_serializer(menu))
-
-        return Response(menu_data, status=status.HTTP_200_OK)
+        return menu_data
 
     def _meta_serializer(self, obj):
         val = {'icon_src': obj.icon.url,
@@ -78,5 +68,9 @@ class TestGoogleFormsAPIView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request, *args, **kwargs):
+        return content_response(request, 'test_google_forms', [NOTICE], self._forms_url)
+
+    @staticmethod
+    def _forms_url():
         url = TestGoogleFormsUrl.objects.filter(is_active=True).last().forms_url
-        return Response({'url': url}, status=status.HTTP_200_OK)
+        return {'url': url}
@@ -2,7 +2,7 @@ from django.contrib import admin
 
 from custom_manage.sites import staff_panel
 from payment.models import UserDepositLog, DepositWithoutBankbookShortCutLink, DepositWithoutBankbookQRimage, \
-    DepositWithoutBankbookNotice, Payment, PaymentErrorLog
+    DepositWithoutBankbookNotice, Payment, PaymentErrorLog, ProjectPriceLedger, ProjectPriceLedgerLine
 
 
 class PaymentStaffAdmin(admin.ModelAdmin):
@@ -62,9 +62,21 @@ class DepositWithoutBankbookNoticeStaffAdmin(admin.ModelAdmin):
     list_editable = ['is_active']
 
 
+class ProjectPriceLedgerLineInline(admin.TabularInline):
+    model = ProjectPriceLedgerLine
+    extra = 0
+
+
+class ProjectPriceLedgerStaffAdmin(admin.ModelAdmin):
+    list_display = ['pk', 'project', 'total_price', 'updated_at']
+    search_fields = ['project__project_hash_key']
+    inlines = [ProjectPriceLedgerLineInline]
+
+
 staff_panel.register(UserDepositLog, UserDepositLogStaffAdmin)
 staff_panel.register(DepositWithoutBankbookShortCutLink, DepositWithoutBankbookShortCutLinkStaffAdmin)
 staff_panel.register(DepositWithoutBankbookQRimage, DepositWithoutBankbookQRimageStaffAdmin)
 staff_panel.register(DepositWithoutBankbookNotice, DepositWithoutBankbookNoticeStaffAdmin)
 staff_panel.register(Payment, PaymentStaffAdmin)
 staff_panel.register(PaymentErrorLog, PaymentErrorLogStaffAdmin)
+staff_panel.register(ProjectPriceLedger, ProjectPriceLedgerStaffAdmin)
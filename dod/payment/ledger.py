@@ -0,0 +1,57 @@
+from django.db import IntegrityError, transaction
+
+from payment.models import ProjectPriceLedger, ProjectPriceLedgerLine
+
+
+def _ledger_lines(project):
+    """
+    프로젝트 상품을 한번의 쿼리로 읽어서 item 별 (item_id, item_name, unit_price, count) 로 묶습니다.
+    결제 연동 이전 상품은 price 가 0 이므로 item 가격을 사용합니다.
+    """
+    rows = project.products.order_by('id').values_list('item_id', 'item__name', 'price', 'item__price', 'count')
+    lines = {}
+    for item_id, item_name, price, item_price, count in rows:
+        unit_price = price or item_price
+        key = (item_id, unit_price)
+        if key in lines:
+            lines[key][3] += count
+        else:
+            lines[key] = [item_id, item_name, unit_price, count]
+    return lines.values()
+
+
+@transaction.atomic
+def record_project_price(project):
+    """
+    상품을 생성/변경한 뒤 호출합니다. 프로젝트의 장부를 현재 상품 기준으로 다시 기록합니다.
+    """
+    lines = [ProjectPriceLedgerLine(item_id=item_id, item_name=item_name, unit_price=unit_price,
+                                    count=count, price=unit_price * count)
+             for item_id, item_name, unit_price, count in _ledger_lines(project)]
+    total_price = sum(line.price for line in lines)
+    ledger, created = ProjectPriceLedger.objects.select_for_update()\
+        .get_or_create(project_id=project.id, defaults={'total_price': total_price})
+    if not created:
+        ledger.lines.all().delete()
+        ledger.total_price = total_price
+        ledger.save(update_fields=['total_price', 'updated_at'])
+    for line in lines:
+        line.ledger = ledger
+    ProjectPriceLedgerLine.objects.bulk_create(lines)
+    project.price_ledger = ledger
+    return ledger
+
+
+def get_price_ledger(project):
+    """
+    project.price_ledger 를 리턴합니다. 없으면(기존 데이터) 현재 상품으로 만듭니다.
+    목록에서는 select_related('price_ledger') 로 같이 읽어야 프로젝트마다 쿼리하지 않습니다.
+    """
+    try:
+        return project.price_ledger
+    except ProjectPriceLedger.DoesNotExist:
+        try:
+            return record_project_price(project)
+        except IntegrityError:
+            # 동시에 다른 요청이 먼저 만든 경우
+            return ProjectPriceLedger.objects.get(project_id=project.id)
@@ -2,6 +2,7 @@ from django.conf import settings
 from django.db import models
 from ckeditor_uploader.fields import RichTextUploadingField
 # Create your models here.
+from products.models import Item
 from projects.models import Project
 
 
@@ -102,6 +103,33 @@ class UserDepositLog(models.Model):
             project.save()
 
 
+class ProjectPriceLedger(models.Model):
+    """
+    프로젝트 결제금액 장부입니다.
+    상품을 생성/변경할 때(project create, add_gifticons, update) 상품별 금액과 합계를 저장하고,
+    결제금액 확인(check_price)과 프로젝트 조회시에는 total_price 만 읽습니다.
+    """
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, related_name='price_ledger')
+    total_price = models.IntegerField(default=0, help_text='lines 의 price 합계입니다.')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = '프로젝트 결제금액'
+
+
+class ProjectPriceLedgerLine(models.Model):
+    """
+    장부의 상품(item)별 금액입니다. unit_price 는 상품 생성 당시 결제금액(Product.price)입니다.
+    """
+    ledger = models.ForeignKey(ProjectPriceLedger, on_delete=models.CASCADE, related_name='lines')
+    item = models.ForeignKey(Item, null=True, on_delete=models.SET_NULL)
+    item_name = models.CharField(max_length=50)
+    unit_price = models.IntegerField()
+    count = models.IntegerField()
+    price = models.IntegerField(help_text='unit_price * count')
+
+
 class DepositWithoutBankbook(models.Model):
     """
     무통장 입금 계좌 안내 모델입니다.
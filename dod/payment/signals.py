@@ -1,9 +1,10 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
+from core.content_cache import bump_content_version, PAYMENT
 from core.slack import deposit_temp_slack_message
 from core.sms.utils import SMSV2Manager
-from payment.models import UserDepositLog
+from payment.models import UserDepositLog, DepositWithoutBankbookShortCutLink, DepositWithoutBankbookQRimage
 
 
 @receiver(post_save, sender=UserDepositLog)
@@ -18,3 +19,9 @@ def user_deposit_log_send_sms(sender, **kwargs):
     #         sms_manager.send_sms(phone=phone)
     #     except:
     #         pass
+
+
+@receiver([post_save, post_delete], sender=DepositWithoutBankbookShortCutLink)
+@receiver([post_save, post_delete], sender=DepositWithoutBankbookQRimage)
+def bump_payment_content_version(sender, **kwargs):
+    bump_content_version(PAYMENT)
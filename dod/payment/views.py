@@ -9,8 +9,10 @@ from rest_framework import viewsets, mixins, status
 from rest_framework import exceptions
 from rest_framework.decorators import authentication_classes, action
 
+from core.content_cache import content_response, PAYMENT
 from core.slack import deposit_success_slack_message, payment_slack_message
 from payment.Bootpay import BootpayApi
+from payment.ledger import get_price_ledger
 from payment.loader import load_credential
 from payment.models import DepositWithoutBankbookShortCutLink, DepositWithoutBankbookQRimage, Payment, PaymentErrorLog
 from payment.serializers import PaymentSerializer, PayformSerializer, PaymentConfirmSerializer, PaymentDoneSerialzier, \
@@ -27,10 +29,14 @@ class DepositInfoAPIView(viewsets.GenericViewSet, mixins.ListModelMixin):
         api : api/v1/deposit-info/
         return : {'qr_code', 'url'}
         """
+        return content_response(request, 'deposit_info', [PAYMENT], self._deposit_info)
+
+    @staticmethod
+    def _deposit_info():
         url = DepositWithoutBankbookShortCutLink.objects.filter(is_active=True).last().link
         qr_code = DepositWithoutBankbookQRimage.objects.filter(is_active=True).last().qr_img.url
-        return Response({'qr_code': qr_code,
-                         'url': url}, status=status.HTTP_200_OK)
+        return {'qr_code': qr_code,
+                'url': url}
 
 
 class DepositSuccessAPIView(viewsets.GenericViewSet, mixins.RetrieveModelMixin):
@@ -360,7 +366,7 @@ class PaymentViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin):
             raise exceptions.NotAcceptable(detail='결제자 정보가 다릅니다.')
 
     def check_price(self):
-        price = sum(list(self.products.values_list('price', flat=True)))
+        price = get_price_ledger(self.project).total_price
         if int(self.data['price']) != int(price):
             raise exceptions.NotAcceptable(detail='가격을 확인해주시길 바랍니다.')
 
@@ -0,0 +1,75 @@
+from collections import namedtuple
+
+from django.db.models import Count, Max
+
+from core.registry import FingerprintedRegistry
+from products.derivatives import derivative_urls, item_derivative_sources, variant_url, THUMBNAIL_WIDTH, \
+    WON_THUMBNAIL_WIDTH, LOGO_WIDTH
+from products.models import Item
+
+# 직접 업로드(custom gifticon) 및 온보딩에 사용하는 대표 Item 의 order
+CUSTOM_UPLOAD_ITEM_ORDER = 999
+
+CatalogItem = namedtuple('CatalogItem', ['id', 'order', 'name', 'short_name', 'price', 'origin_price', 'is_active',
+                                         'brand_id', 'brand_name',
+                                         'thumbnail_url', 'won_thumbnail_url', 'brand_logo_url'])
+
+
+class ItemCatalog(FingerprintedRegistry):
+    """
+    Item(+Brand) 전체를 이미지 url 까지 만들어서 프로세스 안에 들고 있습니다.
+    이미지 url 은 변환이 끝난 작은 webp(products.derivatives)가 있으면 그 url 을 사용합니다. (변환이 끝나면 Item 수정시간이 바뀜)
+    Item 의 (개수, 마지막 수정시간, 브랜드 마지막 수정시간) 이 바뀌었을 때만 다시 읽습니다.
+    """
+    def __init__(self):
+        super(ItemCatalog, self).__init__()
+        self._items = {}
+        self._items_by_order = {}
+
+    def fetch_fingerprint(self):
+        info = Item.objects.aggregate(count=Count('id'), updated_at=Max('updated_at'),
+                                      brand_updated_at=Max('brand__updated_at'))
+        return info['count'], info['updated_at'], info['brand_updated_at']
+
+    def load(self):
+        rows = list(Item.objects.select_related('brand'))
+        derivatives = derivative_urls([source for item in rows for source in item_derivative_sources(item)])
+        items = [CatalogItem(id=item.id, order=item.order, name=item.name, short_name=item.short_name,
+                             price=item.price, origin_price=item.origin_price, is_active=item.is_active,
+                             brand_id=item.brand_id, brand_name=item.brand.name,
+                             thumbnail_url=variant_url(derivatives, item.thumbnail.name, THUMBNAIL_WIDTH),
+                             won_thumbnail_url=variant_url(derivatives, item.won_thumbnail.name, WON_THUMBNAIL_WIDTH),
+                             brand_logo_url=variant_url(derivatives, item.brand_logo.name, LOGO_WIDTH))
+                 for item in rows]
+        self._items = {item.id: item for item in items}
+        self._items_by_order = {item.order: item for item in items}
+
+    @property
+    def state(self):
+        """
+        :return: (version, 마지막 수정시간) 상품 이미지 url 을 내려주는 응답의 ETag, Last-Modified 에 사용합니다.
+        """
+        version = self.version
+        updated_at = [at for at in self._fingerprint[1:] if at]
+        return version, max(updated_at) if updated_at else None
+
+    def get(self, item_id):
+        """
+        :return: CatalogItem, 없으면 None
+        """
+        self.refresh()
+        return self._items.get(int(item_id))
+
+    def get_by_order(self, order):
+        self.refresh()
+        return self._items_by_order.get(order)
+
+    @property
+    def custom_upload_item(self):
+        item = self.get_by_order(CUSTOM_UPLOAD_ITEM_ORDER)
+        if item is None:
+            raise Item.DoesNotExist('order={} Item 이 없습니다.'.format(CUSTOM_UPLOAD_ITEM_ORDER))
+        return item
+
+
+item_catalog = ItemCatalog()
@@ -0,0 +1,153 @@
+import datetime
+import os
+from concurrent.futures import as_completed
+from io import BytesIO
+
+from PIL import Image, ImageOps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+
+from core.content_cache import bump_content_version, PRODUCTS
+from products.models import ImageDerivative, Item, CustomGifticon
+from projects.counters import touch_counter
+
+# 용도별 width (원본이 더 작으면 줄이지 않고 webp 로만 변환합니다.)
+THUMBNAIL_WIDTH = 320  # 상품 목록, 기프티콘 그리드
+WON_THUMBNAIL_WIDTH = 720  # 당첨 결과 페이지
+LOGO_WIDTH = 160
+
+WEBP_QUALITY = 80
+
+# worker 가 죽어서 변환중(BUILDING)으로 남은 건은 이 시간 이후 다시 변환대기로 돌립니다.
+STALE_BUILDING_SECONDS = 60 * 10
+
+
+def derivative_name(source, width):
+    root, _ = os.path.splitext(source)
+    return '{}.w{}.webp'.format(root, width)
+
+
+def request_derivatives(sources):
+    """
+    :param sources: [(원본 이미지 이름, width), ...] 이름이 비어있으면 건너뜁니다.
+    이미 요청된 (source, width) 는 무시하고 한번의 insert 로 변환대기를 만듭니다.
+    """
+    derivatives = [ImageDerivative(source=source, width=width) for source, width in sources if source]
+    if derivatives:
+        ImageDerivative.objects.bulk_create(derivatives, ignore_conflicts=True)
+
+
+def item_derivative_sources(item):
+    return [(item.thumbnail.name, THUMBNAIL_WIDTH),
+            (item.won_thumbnail.name, WON_THUMBNAIL_WIDTH),
+            (item.brand_logo.name, LOGO_WIDTH)]
+
+
+def derivative_urls(sources):
+    """
+    :param sources: [(원본 이미지 이름, width), ...]
+    :return: {(원본 이미지 이름, width): 변환된 이미지 url} 변환이 끝난 것만 한번의 쿼리로 찾습니다.
+    """
+    names = {source for source, _ in sources if source}
+    if not names:
+        return {}
+    rows = ImageDerivative.objects.filter(source__in=names, status=ImageDerivative.DONE)\
+        .values_list('source', 'width', 'name')
+    return {(source, width): default_storage.url(name) for source, width, name in rows}
+
+
+def variant_url(derivatives, source, width):
+    """
+    derivative_urls 의 결과에서 변환된 이미지 url 을 찾고, 없으면 원본 url 을 리턴합니다.
+    """
+    if not source:
+        return None
+    return derivatives.get((source, width)) or default_storage.url(source)
+
+
+def render_webp(image_bytes, width):
+    """
+    width 이하로 줄인 webp 를 만듭니다. 메모리 안에서만 작업합니다.
+    """
+    image = Image.open(BytesIO(image_bytes))
+    image = ImageOps.exif_transpose(image)
+    has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    if image.width > width:
+        image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, format='WEBP', quality=WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def build_derivative(derivative):
+    """
+    pool 에서 실행합니다. (db 를 사용하지 않음)
+    :return: 저장된 이름
+    """
+    with default_storage.open(derivative.source, 'rb') as source:
+        image_bytes = source.read()
+    content = ContentFile(render_webp(image_bytes, derivative.width))
+    content.content_type = 'image/webp'
+    return default_storage.save(derivative_name(derivative.source, derivative.width), content)
+
+
+def requeue_stale_building():
+    stale_at = datetime.datetime.now() - datetime.timedelta(seconds=STALE_BUILDING_SECONDS)
+    return ImageDerivative.objects.filter(status=ImageDerivative.BUILDING, updated_at__lt=stale_at)\
+        .update(status=ImageDerivative.PENDING, updated_at=datetime.datetime.now())
+
+
+def claim_batch(batch_size):
+    """
+    변환대기 중 batch_size 만큼 BUILDING 으로 점유합니다. (여러 worker 가 같은 이미지를 변환하지 않음)
+    """
+    now = datetime.datetime.now()
+    candidates = ImageDerivative.objects.filter(status=ImageDerivative.PENDING)\
+        .order_by('id').values_list('id', flat=True)[:batch_size]
+    claimed = []
+    for derivative_id in candidates:
+        if ImageDerivative.objects.filter(id=derivative_id, status=ImageDerivative.PENDING)\
+                .update(status=ImageDerivative.BUILDING, updated_at=now):
+            claimed.append(derivative_id)
+    return claimed
+
+
+def build_pending_derivatives(pool, batch_size):
+    """
+    변환대기를 한 batch 꺼내서 pool(ThreadPoolExecutor) 에서 동시에 변환합니다.
+    db 작업은 호출한 스레드에서만 하고, pool 에서는 storage 읽기/쓰기와 변환만 합니다.
+    :return: 처리한 개수
+    """
+    claimed = claim_batch(batch_size)
+    if not claimed:
+        return 0
+
+    futures = {pool.submit(build_derivative, derivative): derivative
+               for derivative in ImageDerivative.objects.filter(id__in=claimed)}
+    built = []
+    for future in as_completed(futures):
+        derivative = futures[future]
+        try:
+            name = future.result()
+        except Exception:
+            # 원본이 없거나 이미지가 아니면 원본 url 을 계속 사용합니다.
+            ImageDerivative.objects.filter(id=derivative.id)\
+                .update(status=ImageDerivative.FAILED, updated_at=datetime.datetime.now())
+            continue
+        ImageDerivative.objects.filter(id=derivative.id)\
+            .update(status=ImageDerivative.DONE, name=name, updated_at=datetime.datetime.now())
+        built.append(derivative.source)
+    if built:
+        # 직접 업로드한 기프티콘이면 대시보드 gifticons 의 ETag 가 바뀌도록 프로젝트 counter version 을 올립니다.
+        project_ids = CustomGifticon.objects.filter(gifticon_img__in=built)\
+            .values_list('project_id', flat=True).distinct()
+        for project_id in project_ids:
+            touch_counter(project_id)
+        # 상품 이미지면 Item 수정시간을 바꿔서 다른 서버의 ItemCatalog 도 다시 읽게 하고, 캐시된 상품 목록도 다시 만듭니다.
+        # (대시보드 gifticons 의 ETag 도 item_catalog.state 로 바뀜)
+        Item.objects.filter(Q(thumbnail__in=built) | Q(won_thumbnail__in=built) | Q(brand_logo__in=built))\
+            .update(updated_at=datetime.datetime.now())
+        bump_content_version(PRODUCTS)
+    return len(futures)
@@ -0,0 +1,115 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core import signing
+from rest_framework import exceptions
+
+from products.derivatives import request_derivatives, THUMBNAIL_WIDTH
+from products.models import CustomGifticon, Product, Reward
+from projects.counters import bump_counter, touch_counter
+from projects.models import Project
+
+# 클라이언트가 storage 에 바로 올리는 기프티콘 이미지 (서버는 이미지 bytes 를 받지 않습니다.)
+# 1. upload target 요청 : upload_to 규칙으로 만든 이름마다 presigned upload 와 upload_key(서명)를 발급
+# 2. 클라이언트가 storage 에 업로드
+# 3. finalize : upload_key 를 검증하고 storage 에 올라간 파일만 row 로 생성 (upload_key 는 한번만 finalize 할 수 있음)
+UPLOAD_KEY_SALT = 'products.direct_uploads'
+UPLOAD_EXPIRES_IN = 60 * 60
+UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+IMAGE_CONTENT_TYPES = ('image/jpeg', 'image/png', 'image/gif')
+
+
+def _scope(field, instance_id):
+    # upload_key 는 발급받은 곳(프로젝트 또는 결제상품)에서만 finalize 할 수 있습니다.
+    return '{}:{}'.format(field.model._meta.label_lower, instance_id)
+
+
+def _upload_targets(field, instance, scope, files):
+    storage = field.storage
+    targets = []
+    for file in files:
+        name = field.generate_filename(instance, file['name'])
+        target = storage.presigned_upload(name, file['content_type'], UPLOAD_EXPIRES_IN, UPLOAD_MAX_BYTES)
+        target['upload_key'] = signing.dumps({'scope': scope, 'name': name}, salt=UPLOAD_KEY_SALT)
+        targets.append(target)
+    return targets
+
+
+def _uploaded_names(field, scope, upload_keys):
+    """
+    upload_key 를 검증하고 storage 에 실제로 올라간 이미지 이름들을 리턴합니다.
+    이미 row 로 생성된 이미지가 있으면(재시도, 중복 요청) 거절합니다.
+    같은 upload_key 로 동시에 finalize 하지 않도록 호출하는 쪽에서 발급받은 곳의 row 를 잠근 뒤에 호출해주세요.
+    """
+    names = []
+    for upload_key in upload_keys:
+        try:
+            value = signing.loads(upload_key, salt=UPLOAD_KEY_SALT, max_age=UPLOAD_EXPIRES_IN)
+        except signing.BadSignature:
+            raise exceptions.ValidationError({'upload_keys': '만료되었거나 올바르지 않은 upload_key 입니다.'})
+        if value['scope'] != scope:
+            raise exceptions.ValidationError({'upload_keys': '다른 곳에서 발급받은 upload_key 입니다.'})
+        names.append(value['name'])
+    if len(set(names)) != len(names):
+        raise exceptions.ValidationError({'upload_keys': '같은 upload_key 가 중복되었습니다.'})
+    if field.model.objects.filter(**{field.name + '__in': names}).exists():
+        raise exceptions.ValidationError({'upload_keys': '이미 등록된 upload_key 입니다.'})
+
+    # S3 는 파일마다 HEAD 요청이라 동시에 확인합니다.
+    workers = min(settings.CUSTOM_UPLOAD_WORKERS, len(names))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        uploaded = list(pool.map(field.storage.exists, names))
+    if not all(uploaded):
+        raise exceptions.ValidationError({'upload_keys': '아직 업로드되지 않은 이미지가 있습니다.'})
+    return names
+
+
+def custom_gifticon_upload_targets(project, item_id, files):
+    """
+    :param files: [{'name': 'a.jpg', 'content_type': 'image/jpeg'}, ...]
+    :return: [{'method', 'url', 'fields', 'upload_key'}, ...]
+    """
+    field = CustomGifticon._meta.get_field('gifticon_img')
+    instance = CustomGifticon(project=project, item_id=item_id)
+    return _upload_targets(field, instance, _scope(field, project.id), files)
+
+
+def finalize_custom_gifticons(project, item_id, upload_keys):
+    """
+    업로드된 이미지로 CustomGifticon 을 한번에 생성합니다.
+    MMS payload 는 만들지 않고(이미지를 받지 않기 때문에) 발송시 변환합니다.
+    transaction 안에서 호출해야 합니다. (프로젝트 row 를 잠금)
+    :return: 생성한 CustomGifticon list
+    """
+    list(Project.objects.select_for_update().filter(id=project.id).values_list('id', flat=True))
+    field = CustomGifticon._meta.get_field('gifticon_img')
+    names = _uploaded_names(field, _scope(field, project.id), upload_keys)
+    gifticons = CustomGifticon.objects.bulk_create(
+        [CustomGifticon(project=project, item_id=item_id, gifticon_img=name) for name in names])
+    # bulk_create 는 signal 을 보내지 않기 때문에 counter 와 썸네일 변환 요청을 직접 합니다.
+    bump_counter(project.id, custom_gifticon_count=len(gifticons))
+    request_derivatives([(name, THUMBNAIL_WIDTH) for name in names])
+    return gifticons
+
+
+def reward_upload_targets(product, files):
+    """
+    staff 가 결제상품(Product)의 실물 기프티콘(Reward) 이미지를 올릴 때 사용합니다.
+    """
+    field = Reward._meta.get_field('reward_img')
+    return _upload_targets(field, Reward(product=product), _scope(field, product.id), files)
+
+
+def finalize_rewards(product, upload_keys, due_date):
+    """
+    transaction 안에서 호출해야 합니다. (결제상품 row 를 잠금)
+    :return: 생성한 Reward list
+    """
+    list(Product.objects.select_for_update().filter(id=product.id).values_list('id', flat=True))
+    field = Reward._meta.get_field('reward_img')
+    names = _uploaded_names(field, _scope(field, product.id), upload_keys)
+    rewards = Reward.objects.bulk_create(
+        [Reward(product=product, reward_img=name, due_date=due_date) for name in names])
+    # 당첨자 없는 Reward 생성도 대시보드 내용이 바뀌기 때문에 version 을 올립니다.
+    touch_counter(product.project_id)
+    return rewards
@@ -0,0 +1,39 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from products.derivatives import build_pending_derivatives, requeue_stale_building, request_derivatives, \
+    item_derivative_sources, THUMBNAIL_WIDTH
+from products.models import Item, CustomGifticon
+
+
+class Command(BaseCommand):
+    help = '업로드된 상품/기프티콘 이미지의 작은 webp(ImageDerivative)를 요청 밖에서 만듭니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='동시에 변환하는 스레드 수')
+        parser.add_argument('--batch', type=int, default=20, help='한번에 꺼내는 변환대기 개수')
+        parser.add_argument('--poll-interval', type=float, default=5, help='변환대기가 비었을 때 다시 확인하는 간격(초)')
+        parser.add_argument('--once', action='store_true', help='변환대기를 한번 비우고 종료합니다. (cron 용)')
+        parser.add_argument('--backfill', action='store_true', help='기존 상품/기프티콘 이미지도 변환대기에 넣습니다.')
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            for item in Item.objects.all():
+                request_derivatives(item_derivative_sources(item))
+            names = CustomGifticon.objects.filter(winner_id__isnull=True).values_list('gifticon_img', flat=True)
+            request_derivatives([(name, THUMBNAIL_WIDTH) for name in names.iterator()])
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                close_old_connections()
+                requeue_stale_building()
+                built = build_pending_derivatives(pool, options['batch'])
+                if built:
+                    self.stdout.write('processed: {}'.format(built))
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
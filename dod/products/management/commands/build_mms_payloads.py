@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core.sms.payload import attach_mms_payload, IMAGE_READ_ERRORS
+from products.models import Reward, CustomGifticon
+
+
+class Command(BaseCommand):
+    help = '아직 당첨되지 않은 기프티콘 중 MMS payload 가 없는 기프티콘의 payload 를 만듭니다. (기존 데이터용)'
+
+    def handle(self, *args, **options):
+        targets = [
+            (Reward.objects.filter(winner_id__isnull=True, mms_payload__isnull=True), 'reward_img'),
+            (CustomGifticon.objects.filter(winner_id__isnull=True, mms_payload__isnull=True), 'gifticon_img'),
+        ]
+        for queryset, field_name in targets:
+            built = 0
+            failed = 0
+            for instance in queryset.iterator():
+                try:
+                    payload = attach_mms_payload(instance, field_name)
+                except IMAGE_READ_ERRORS:
+                    payload = None
+                if payload:
+                    built += 1
+                else:
+                    failed += 1
+            self.stdout.write('{}: built {}, skipped {}'.format(queryset.model.__name__, built, failed))
@@ -39,7 +39,7 @@ def custom_gifticon_img_directory_path(instance, filename):
     ext = filename.split('.')[-1]
     return 'project/{}/custom_gifticon/{}/{}.{}'.format(
         instance.project.project_hash_key,
-        instance.item.id,
+        instance.item_id,
         generate_random_key(5),
         ext)
 
@@ -118,6 +118,48 @@ class Product(models.Model):
         )
 
 
+class MMSImagePayload(models.Model):
+    """
+    MMS 로 바로 보낼 수 있게 미리 변환해둔 기프티콘 이미지(base64 jpg)입니다.
+    Reward, CustomGifticon 이미지 업로드시 한번만 변환하며, 원본 이미지의 hash(sha256)로 저장하기 때문에
+    같은 이미지는 다시 변환하지 않습니다.
+    """
+    content_hash = models.CharField(max_length=64, unique=True, help_text='원본 이미지의 sha256')
+    body = models.TextField(help_text='base64로 인코딩한 jpg. SENS files.body 에 그대로 사용합니다.')
+    size = models.IntegerField(help_text='jpg 크기(byte)')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class ImageDerivative(models.Model):
+    """
+    상품 이미지, 직접 업로드한 기프티콘 이미지(source)를 width 이하로 줄여서 webp 로 저장한 이미지입니다.
+    업로드시 PENDING 으로 만들고, 요청 밖에서 build_image_derivatives 가 변환합니다. (products.derivatives)
+    변환이 끝나기 전에는 원본 url 을 사용합니다.
+    """
+    PENDING = 0
+    BUILDING = 1
+    DONE = 2
+    FAILED = 3
+
+    STATUS = [
+        (PENDING, '변환대기'),
+        (BUILDING, '변환중'),
+        (DONE, '변환완료'),
+        (FAILED, '변환실패'),
+    ]
+
+    source = models.CharField(max_length=255, help_text='원본 이미지의 storage 이름')
+    width = models.IntegerField()
+    name = models.CharField(max_length=255, blank=True, help_text='변환된 이미지의 storage 이름')
+    status = models.IntegerField(choices=STATUS, default=PENDING, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('source', 'width')
+        verbose_name_plural = '이미지 변환'
+
+
 class Reward(models.Model):
     """
     프로덕트에서 유저가 구매한 상품의 정보를 저장하는 모델입니다.
@@ -127,6 +169,8 @@ class Reward(models.Model):
     reward_img = models.ImageField(upload_to=reward_img_directory_path)
     winner_id = models.IntegerField(null=True, blank=True, help_text="당첨자(Respondent)의 id를 저장합니다.")
     due_date = models.CharField(max_length=30, default='')
+    mms_payload = models.ForeignKey(MMSImagePayload, null=True, blank=True, on_delete=models.SET_NULL,
+                                    help_text='reward_img 업로드시 생성됩니다.')
     # short_name = models.CharField()
 
     class Meta:
@@ -150,5 +194,7 @@ class CustomGifticon(models.Model):
     item = models.ForeignKey(Item, null=True, on_delete=models.SET_NULL, related_name='custom_gifticons', help_text='대표이미지 사용을 위함.')
     gifticon_img = models.ImageField(upload_to=custom_gifticon_img_directory_path)
     winner_id = models.IntegerField(null=True, blank=True, help_text="당첨자(Respondent)의 id를 저장합니다.")
+    mms_payload = models.ForeignKey(MMSImagePayload, null=True, blank=True, on_delete=models.SET_NULL,
+                                    help_text='gifticon_img 업로드시 생성됩니다.')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
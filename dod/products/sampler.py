@@ -0,0 +1,58 @@
+import random
+
+from products.models import Reward, CustomGifticon
+from projects.counters import bump_counter
+
+
+def _reward_weights(prices):
+    # 비싼 상품일수록 덜 당첨되도록 가격에 반비례하는 가중치 (평균 가격 상품 = 1)
+    average = sum(prices) / len(prices)
+    return [average / max(price, 1) for price in prices]
+
+
+def _claim(model, candidates, weights, winner_id):
+    """
+    candidates(id list) 중 weights 로 하나를 뽑아서 winner_id 가 비어있는 경우에만 winner_id 를 저장합니다.
+    동시에 다른 당첨자가 먼저 가져갔으면 해당 후보를 빼고 다시 뽑습니다. (db 를 다시 읽지 않음)
+    :return: 점유한 id, 모두 다른 당첨자가 가져갔으면 None
+    """
+    while candidates:
+        index = random.choices(range(len(candidates)), weights=weights)[0]
+        candidate_id = candidates[index]
+        if model.objects.filter(id=candidate_id, winner_id__isnull=True).update(winner_id=winner_id):
+            return candidate_id
+        del candidates[index]
+        del weights[index]
+    return None
+
+
+def claim_reward(project_id, winner_id):
+    """
+    프로젝트의 남은 Reward 중 하나를 가격 가중치로 뽑아서 winner_id(Respondent id)로 점유합니다.
+    후보는 (id, 가격) 한번의 쿼리로만 읽고, 점유는 조건부 update 로 하기 때문에 같은 Reward 가 두명에게 가지 않습니다.
+    :return: Reward (발송에 필요한 product, item, brand 포함), 남은 Reward 가 없으면 None
+    """
+    rows = Reward.objects.filter(product__project_id=project_id, winner_id__isnull=True)\
+        .order_by('id').values_list('id', 'product__item__price')
+    if not rows:
+        return None
+    candidates, prices = map(list, zip(*rows))
+    reward_id = _claim(Reward, candidates, _reward_weights(prices), winner_id)
+    if reward_id is None:
+        return None
+    bump_counter(project_id, used_reward_count=1)
+    return Reward.objects.select_related('product__item__brand', 'mms_payload').get(id=reward_id)
+
+
+def claim_custom_gifticon(project_id, winner_id):
+    """
+    직접 업로드한 기프티콘 중 하나를 같은 확률로 뽑아서 winner_id(Respondent id)로 점유합니다.
+    :return: CustomGifticon, 남은 기프티콘이 없으면 None
+    """
+    candidates = list(CustomGifticon.objects.filter(project_id=project_id, winner_id__isnull=True)
+                      .order_by('id').values_list('id', flat=True))
+    gifticon_id = _claim(CustomGifticon, candidates, [1] * len(candidates), winner_id)
+    if gifticon_id is None:
+        return None
+    bump_counter(project_id, used_custom_gifticon_count=1)
+    return CustomGifticon.objects.select_related('mms_payload').get(id=gifticon_id)
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from products.catalog import item_catalog
+from products.direct_uploads import IMAGE_CONTENT_TYPES
 from products.models import Product, Item, CustomGifticon
 
 
@@ -18,6 +20,47 @@ class ProductCreateSerializer(serializers.ModelSerializer):
         fields = ['project', 'item', 'price']
 
 
+class CustomGifticonUploadSerializer(serializers.Serializer):
+    """
+    직접 업로드한 기프티콘 이미지들을 한번에 검증합니다. 저장은 products.uploads 에서 합니다.
+    """
+    custom_upload = serializers.ListField(child=serializers.ImageField(), allow_empty=False)
+
+
+class DirectUploadFileSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=100)
+    content_type = serializers.ChoiceField(choices=IMAGE_CONTENT_TYPES)
+
+
+class DirectUploadTargetSerializer(serializers.Serializer):
+    """
+    storage 에 바로 올릴 이미지 목록입니다. (products.direct_uploads)
+    """
+    files = DirectUploadFileSerializer(many=True, allow_empty=False)
+
+
+class DirectUploadFinalizeSerializer(serializers.Serializer):
+    upload_keys = serializers.ListField(child=serializers.CharField(), allow_empty=False)
+
+
+class RewardUploadTargetSerializer(DirectUploadTargetSerializer):
+    product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.select_related('project', 'item'))
+
+
+class RewardUploadFinalizeSerializer(DirectUploadFinalizeSerializer):
+    product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.select_related('project'))
+    due_date = serializers.CharField(max_length=30)
+
+
+class ProductOrderSerializer(serializers.Serializer):
+    """
+    프로젝트 생성/수정시 주문한 상품 한 줄 {'item': item.id, 'count': 3} 입니다.
+    many=True 로 한번에 검증하고, Product 는 view 에서 bulk_create 합니다.
+    """
+    item = serializers.IntegerField()
+    count = serializers.IntegerField(min_value=0)
+
+
 class ProductSimpleDashboardSerializer(serializers.ModelSerializer):
     item_thumbnail = serializers.SerializerMethodField()
     remain_winner_count = serializers.SerializerMethodField()
@@ -28,8 +71,7 @@ class ProductSimpleDashboardSerializer(serializers.ModelSerializer):
         fields = ['id', 'item_thumbnail', 'remain_winner_count', 'winner_count']
 
     def get_item_thumbnail(self, obj):
-        item = obj.item
-        return item.thumbnail.url
+        return item_catalog.get(obj.item_id).thumbnail_url
 
     def get_remain_winner_count(self, obj):
         rewards = obj.rewards.filter(winner_id__isnull=False).count()
@@ -55,12 +97,11 @@ class ItemRetrieveSerializer(serializers.ModelSerializer):
             return obj.brand.name
 
     def get_thumbnail_image(self, obj):
-        if obj.thumbnail:
-            return obj.thumbnail.url
+        # 변환된 썸네일(webp)이 있으면 그 url (products.catalog)
+        return item_catalog.get(obj.id).thumbnail_url
 
     def get_logo_image(self, obj):
-        if obj.brand_logo:
-            return obj.brand_logo.url
+        return item_catalog.get(obj.id).brand_logo_url
 
     def get_discount_rate(self, obj):
         discount_rate = round((obj.origin_price - obj.price) / obj.origin_price * 100)
@@ -0,0 +1,62 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from core.content_cache import bump_content_version, PRODUCTS
+from core.sms.payload import attach_mms_payload
+from products.catalog import item_catalog
+from products.derivatives import request_derivatives, item_derivative_sources, THUMBNAIL_WIDTH
+from products.models import Brand, Item, Reward, CustomGifticon
+
+
+@receiver(pre_save, sender=Reward)
+@receiver(pre_save, sender=CustomGifticon)
+def mark_gifticon_img_uploaded(sender, instance, **kwargs):
+    # 이번 save 에서 새로 업로드된 이미지인지 (storage 에 저장되기 전이라 _committed=False)
+    image = instance.reward_img if sender is Reward else instance.gifticon_img
+    instance._gifticon_img_uploaded = bool(image) and not image._committed
+    instance._gifticon_img_bytes = None
+    if instance._gifticon_img_uploaded:
+        # storage 에 저장된 뒤에는 S3 에서 다시 받아야 하기 때문에 업로드된 파일을 미리 읽어둡니다.
+        try:
+            image.file.seek(0)
+            instance._gifticon_img_bytes = image.file.read()
+            image.file.seek(0)
+        except OSError:
+            pass
+
+
+@receiver(post_save, sender=CustomGifticon)
+def request_gifticon_derivatives(sender, instance, **kwargs):
+    # build_gifticon_mms_payload 보다 먼저 등록되어야 합니다. (_gifticon_img_uploaded 를 같이 사용)
+    if getattr(instance, '_gifticon_img_uploaded', False):
+        request_derivatives([(instance.gifticon_img.name, THUMBNAIL_WIDTH)])
+
+
+@receiver(post_save, sender=Reward)
+@receiver(post_save, sender=CustomGifticon)
+def build_gifticon_mms_payload(sender, instance, **kwargs):
+    """
+    기프티콘 이미지 업로드시 MMS 발송용 payload 를 한번만 만들어 둡니다.
+    당첨자 저장 등 이미지가 바뀌지 않은 save 에서는 다시 만들지 않습니다.
+    """
+    if not getattr(instance, '_gifticon_img_uploaded', False):
+        return
+    instance._gifticon_img_uploaded = False
+    image_bytes, instance._gifticon_img_bytes = instance._gifticon_img_bytes, None
+    if image_bytes is None:
+        # 업로드된 파일을 읽지 못했으면 payload 없이 발송시 변환합니다.
+        return
+    attach_mms_payload(instance, 'reward_img' if sender is Reward else 'gifticon_img', image_bytes)
+
+
+@receiver([post_save, post_delete], sender=Brand)
+@receiver([post_save, post_delete], sender=Item)
+def bump_products_content_version(sender, **kwargs):
+    bump_content_version(PRODUCTS)
+    item_catalog.invalidate()
+
+
+@receiver(post_save, sender=Item)
+def request_item_derivatives(sender, instance, **kwargs):
+    # 이미 요청된 이미지는 무시되기 때문에 이미지가 바뀐 경우에만 새로 변환됩니다.
+    request_derivatives(item_derivative_sources(instance))
@@ -1,3 +1,340 @@
-from django.test import TestCase
+import datetime
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+import boto3
+from PIL import Image
+from botocore.stub import Stubber
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from dod.storage import CustomS3Boto3Storage
+from logic.models import DODAveragePercentage
+from products import sampler
+from products.derivatives import render_webp, request_derivatives, claim_batch, build_pending_derivatives, \
+    derivative_urls, variant_url, THUMBNAIL_WIDTH
+from products.direct_uploads import UPLOAD_KEY_SALT
+from products.models import Brand, Item, Product, Reward, CustomGifticon, ImageDerivative
+from products.sampler import claim_reward, claim_custom_gifticon
+from products.uploads import create_custom_gifticons
+from projects.counters import get_counter
+from projects.models import Project
+
+
+def create_project_with_rewards(reward_count, prices=(4000, 10000)):
+    now = datetime.datetime.now()
+    owner = User.objects.create_user(phone='01000000000')
+    project = Project.objects.create(name='sampler', project_hash_key='sampler', owner=owner,
+                                     start_at=now, dead_at=now + datetime.timedelta(days=1))
+    brand = Brand.objects.create(name='brand')
+    items = [Item.objects.create(order=i, brand=brand, name='item{}'.format(i), price=price)
+             for i, price in enumerate(prices)]
+    for i in range(reward_count):
+        product = Product.objects.create(project=project, item=items[i % len(items)])
+        # 이미 업로드된 이미지로 취급 (storage 에 저장하지 않음)
+        Reward.objects.create(product=product, reward_img='test/reward.jpg')
+    return project
+
+
+class RewardSamplerTestCase(TestCase):
+
+    def test_claim_reward_sets_winner(self):
+        project = create_project_with_rewards(2)
+        reward = claim_reward(project.id, winner_id=1)
+        self.assertEqual(reward.winner_id, 1)
+        self.assertEqual(Reward.objects.filter(winner_id__isnull=True).count(), 1)
+
+    def test_claim_reward_returns_none_when_empty(self):
+        project = create_project_with_rewards(1)
+        self.assertIsNotNone(claim_reward(project.id, winner_id=1))
+        self.assertIsNone(claim_reward(project.id, winner_id=2))
+
+    def test_claim_retries_when_drawn_reward_is_taken(self):
+        project = create_project_with_rewards(2)
+        taken_id, left_id = Reward.objects.order_by('id').values_list('id', flat=True)
+        draws = []
+
+        def draw_first(population, weights):
+            if not draws:
+                # 뽑은 직후, 점유하기 전에 다른 당첨자가 먼저 가져간 상황
+                Reward.objects.filter(id=taken_id).update(winner_id=99)
+            draws.append(list(population))
+            return [0]
+
+        with mock.patch.object(sampler.random, 'choices', draw_first):
+            reward = claim_reward(project.id, winner_id=1)
+
+        self.assertEqual(reward.id, left_id)
+        self.assertEqual(len(draws), 2)
+        self.assertEqual(Reward.objects.get(id=taken_id).winner_id, 99)
+
+    def test_cheaper_reward_has_higher_weight(self):
+        self.assertEqual(sampler._reward_weights([1000, 3000]), [2.0, 2 / 3])
+
+
+class RewardSamplerConcurrencyTestCase(TransactionTestCase):
+    """
+    여러 당첨자가 동시에 뽑아도 같은 기프티콘이 두명에게 가지 않아야 합니다.
+    """
+    winners = 20
+    reward_count = 12
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # in-memory sqlite 는 동시 쓰기를 기다리지 않고 바로 table lock 에러를 냅니다.
+            self.skipTest('동시성 테스트는 파일 db 또는 MySQL 에서 실행합니다.')
+
+    def _run_concurrently(self, claim, project_id):
+        barrier = threading.Barrier(self.winners)
+        claimed = []
+        errors = []
+
+        def winner(winner_id):
+            try:
+                barrier.wait()
+                claimed.append(claim(project_id, winner_id))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=winner, args=(i + 1,)) for i in range(self.winners)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return [instance for instance in claimed if instance is not None]
+
+    def test_reward_never_assigned_twice(self):
+        project = create_project_with_rewards(self.reward_count)
+        claimed = self._run_concurrently(claim_reward, project.id)
+
+        self.assertEqual(len(claimed), self.reward_count)
+        self.assertEqual(len({reward.id for reward in claimed}), self.reward_count)
+        for reward in claimed:
+            self.assertEqual(Reward.objects.get(id=reward.id).winner_id, reward.winner_id)
+
+    def test_custom_gifticon_never_assigned_twice(self):
+        project = create_project_with_rewards(0)
+        for _ in range(self.reward_count):
+            CustomGifticon.objects.create(project=project, gifticon_img='test/custom.jpg')
+        claimed = self._run_concurrently(claim_custom_gifticon, project.id)
+
+        self.assertEqual(len(claimed), self.reward_count)
+        self.assertEqual(len({gifticon.id for gifticon in claimed}), self.reward_count)
+        self.assertEqual(len({gifticon.winner_id for gifticon in claimed}), self.reward_count)
+
+
+class DirectUploadTestCase(TestCase):
+    """
+    upload target 발급 -> storage 에 업로드 -> finalize 순서로 row 가 생성되어야 합니다.
+    storage 는 로컬 파일시스템으로 대신하고, 클라이언트 업로드는 storage 에 직접 저장합니다.
+    """
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='dod-direct-upload-')
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings = override_settings(DEFAULT_FILE_STORAGE='dod.storage.LocalDirectUploadStorage',
+                                     MEDIA_ROOT=media_root, MEDIA_URL='/media/')
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.project = create_project_with_rewards(0)
+        Item.objects.create(order=999, brand=Brand.objects.first(), name='custom', price=0)
+        DODAveragePercentage.objects.create(average_percentage=3)
+        self.client = APIClient()
+
+    def _upload(self, targets):
+        for target in targets:
+            name = signing.loads(target['upload_key'], salt=UPLOAD_KEY_SALT)['name']
+            Reward.reward_img.field.storage.save(name, ContentFile(b'image'))
+        return [target['upload_key'] for target in targets]
+
+    def test_custom_upload(self):
+        self.client.force_authenticate(self.project.owner)
+        files = [{'name': 'a.jpg', 'content_type': 'image/jpeg'}, {'name': 'b.png', 'content_type': 'image/png'}]
+        response = self.client.post('/api/v1/project/{}/custom_upload_targets/'.format(self.project.id),
+                                    {'files': files}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(target['url'].startswith('/media/project/{}/custom_gifticon/'.format(
+            self.project.project_hash_key)) for target in response.data))
+        upload_keys = [target['upload_key'] for target in response.data]
+
+        finalize_url = '/api/v1/project/{}/finalize_custom_upload/'.format(self.project.id)
+        # 아직 업로드하지 않음
+        response = self.client.post(finalize_url, {'upload_keys': upload_keys}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        self._upload(self.client.post('/api/v1/project/{}/custom_upload_targets/'.format(self.project.id),
+                                      {'files': files}, format='json').data)
+        response = self.client.post(finalize_url, {'upload_keys': upload_keys}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        upload_keys = self._upload(self.client.post('/api/v1/project/{}/custom_upload_targets/'.format(
+            self.project.id), {'files': files}, format='json').data)
+        response = self.client.post(finalize_url, {'upload_keys': upload_keys}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['winner_count'], 2)
+        self.assertEqual(CustomGifticon.objects.filter(project=self.project).count(), 2)
+        self.assertEqual(get_counter(Project.objects.get(id=self.project.id)).custom_gifticon_count, 2)
+
+    def test_finalize_is_single_use(self):
+        # 재시도/중복 요청으로 같은 이미지가 두번 등록되면 한 이미지가 두 당첨자에게 발송됩니다.
+        self.client.force_authenticate(self.project.owner)
+        upload_keys = self._upload(self.client.post(
+            '/api/v1/project/{}/custom_upload_targets/'.format(self.project.id),
+            {'files': [{'name': 'a.jpg', 'content_type': 'image/jpeg'}]}, format='json').data)
+        finalize_url = '/api/v1/project/{}/finalize_custom_upload/'.format(self.project.id)
+        self.assertEqual(self.client.post(finalize_url, {'upload_keys': upload_keys}, format='json').status_code, 201)
+        self.assertEqual(self.client.post(finalize_url, {'upload_keys': upload_keys}, format='json').status_code, 400)
+        self.assertEqual(CustomGifticon.objects.filter(project=self.project).count(), 1)
+        self.assertEqual(get_counter(Project.objects.get(id=self.project.id)).custom_gifticon_count, 1)
+        self.assertEqual(Project.objects.get(id=self.project.id).winner_count, 1)
+
+        product = Product.objects.create(project=self.project, item=Item.objects.get(order=0))
+        self.client.force_authenticate(User.objects.create_user(phone='01011112222', is_staff=True))
+        upload_keys = self._upload(self.client.post(
+            '/api/v1/reward_uploads/targets/',
+            {'product': product.id, 'files': [{'name': 'a.jpg', 'content_type': 'image/jpeg'}]}, format='json').data)
+        data = {'product': product.id, 'due_date': '2099.12.31', 'upload_keys': upload_keys}
+        self.assertEqual(self.client.post('/api/v1/reward_uploads/finalize/', data, format='json').status_code, 201)
+        self.assertEqual(self.client.post('/api/v1/reward_uploads/finalize/', data, format='json').status_code, 400)
+        self.assertEqual(Reward.objects.filter(product=product).count(), 1)
+
+    def test_upload_key_is_bound_to_project(self):
+        other = Project.objects.create(name='other', project_hash_key='other', owner=self.project.owner,
+                                       start_at=self.project.start_at, dead_at=self.project.dead_at)
+        self.client.force_authenticate(self.project.owner)
+        upload_keys = self._upload(self.client.post(
+            '/api/v1/project/{}/custom_upload_targets/'.format(other.id),
+            {'files': [{'name': 'a.jpg', 'content_type': 'image/jpeg'}]}, format='json').data)
+        response = self.client.post('/api/v1/project/{}/finalize_custom_upload/'.format(self.project.id),
+                                    {'upload_keys': upload_keys}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_reward_upload_requires_staff(self):
+        product = Product.objects.create(project=self.project, item=Item.objects.get(order=0))
+        data = {'product': product.id, 'files': [{'name': 'a.jpg', 'content_type': 'image/jpeg'}]}
+        self.client.force_authenticate(self.project.owner)
+        self.assertEqual(self.client.post('/api/v1/reward_uploads/targets/', data, format='json').status_code, 403)
+
+        self.client.force_authenticate(User.objects.create_user(phone='01011112222', is_staff=True))
+        upload_keys = self._upload(self.client.post('/api/v1/reward_uploads/targets/', data, format='json').data)
+        response = self.client.post('/api/v1/reward_uploads/finalize/',
+                                    {'product': product.id, 'due_date': '2099.12.31', 'upload_keys': upload_keys},
+                                    format='json')
+        self.assertEqual(response.status_code, 201)
+        reward = Reward.objects.get(product=product)
+        self.assertTrue(reward.reward_img.name.startswith('project/{}/item/'.format(self.project.project_hash_key)))
+
+
+def image_bytes(size, mode='RGB', color='red', fmt='PNG'):
+    image = BytesIO()
+    Image.new(mode, size, color).save(image, format=fmt)
+    return image.getvalue()
+
+
+def png_upload(name, color):
+    return SimpleUploadedFile(name, image_bytes((50, 50), color=color), content_type='image/png')
+
+
+class S3CustomUploadTestCase(TestCase):
+    """
+    boto3(s3transfer) 의 upload_fileobj 는 올린 파일을 닫기 때문에, CustomS3Boto3Storage 로 올린 뒤에도
+    업로드된 이미지로 MMS payload 를 만들 수 있어야 합니다. S3 는 Stubber 로 대신합니다.
+    """
+    def setUp(self):
+        client = boto3.session.Session().client('s3', aws_access_key_id='test', aws_secret_access_key='test',
+                                                region_name='ap-northeast-2')
+        self.stubber = Stubber(client)
+        self.stubber.activate()
+        self.addCleanup(self.stubber.deactivate)
+        storage = CustomS3Boto3Storage(bucket_name='test', access_key='test', secret_key='test',
+                                       region_name='ap-northeast-2')
+        for patcher in (mock.patch.object(CustomS3Boto3Storage, '_client', client),
+                        mock.patch.object(CustomGifticon._meta.get_field('gifticon_img'), 'storage', storage)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.project = create_project_with_rewards(0)
+
+    def test_custom_upload_builds_payload(self):
+        images = [png_upload('a.png', 'red'), png_upload('b.png', 'blue')]
+        for _ in images:
+            self.stubber.add_response('put_object', {})
+        gifticons = create_custom_gifticons(self.project, Item.objects.first().id, images)
+        self.stubber.assert_no_pending_responses()
+        self.assertEqual(CustomGifticon.objects.filter(project=self.project, mms_payload__isnull=False).count(), 2)
+        self.assertTrue(all(gifticon.gifticon_img.name.endswith('.png') for gifticon in gifticons))
+
+    def test_save_keeps_file_open(self):
+        image = png_upload('a.png', 'red')
+        self.stubber.add_response('put_object', {})
+        CustomGifticon._meta.get_field('gifticon_img').storage.save('test/a.png', image)
+        self.assertFalse(image.closed)
+
+
+class ImageDerivativeTestCase(TestCase):
+    """
+    변환대기(ImageDerivative) -> build_pending_derivatives 로 webp 를 만들고, 변환 전에는 원본 url 을 사용해야 합니다.
+    storage 는 로컬 파일시스템으로 대신합니다.
+    """
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='dod-derivative-')
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings = override_settings(DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+                                     MEDIA_ROOT=media_root, MEDIA_URL='/media/')
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def _build(self):
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            return build_pending_derivatives(pool, 10)
+
+    def test_render_webp_resizes_to_width(self):
+        image = Image.open(BytesIO(render_webp(image_bytes((640, 400)), THUMBNAIL_WIDTH)))
+        self.assertEqual((image.format, image.size, image.mode), ('WEBP', (320, 200), 'RGB'))
+
+        # 원본이 더 작으면 줄이지 않고, 투명도는 유지합니다.
+        image = Image.open(BytesIO(render_webp(image_bytes((100, 80), 'RGBA', (0, 0, 0, 0)), THUMBNAIL_WIDTH)))
+        self.assertEqual((image.size, image.mode), ((100, 80), 'RGBA'))
+
+    def test_claim_batch_claims_once(self):
+        request_derivatives([('test/{}.png'.format(i), THUMBNAIL_WIDTH) for i in range(3)] + [('', THUMBNAIL_WIDTH)])
+        self.assertEqual(ImageDerivative.objects.count(), 3)
+        first = claim_batch(2)
+        second = claim_batch(5)
+        self.assertEqual((len(first), len(second)), (2, 1))
+        self.assertFalse(set(first) & set(second))
+        self.assertEqual(claim_batch(5), [])
+        self.assertEqual(ImageDerivative.objects.filter(status=ImageDerivative.BUILDING).count(), 3)
+
+    def test_build_marks_failed_sources(self):
+        good = default_storage.save('test/good.png', ContentFile(image_bytes((640, 400))))
+        broken = default_storage.save('test/broken.png', ContentFile(b'not an image'))
+        request_derivatives([(good, THUMBNAIL_WIDTH), (broken, THUMBNAIL_WIDTH), ('test/missing.png', THUMBNAIL_WIDTH)])
+        self.assertEqual(self._build(), 3)
+        statuses = dict(ImageDerivative.objects.values_list('source', 'status'))
+        self.assertEqual(statuses, {good: ImageDerivative.DONE, broken: ImageDerivative.FAILED,
+                                    'test/missing.png': ImageDerivative.FAILED})
+        self.assertEqual(self._build(), 0)
+
+    def test_variant_url_falls_back_to_original(self):
+        source = default_storage.save('test/thumbnail.png', ContentFile(image_bytes((640, 400))))
+        request_derivatives([(source, THUMBNAIL_WIDTH)])
+        sources = [(source, THUMBNAIL_WIDTH)]
+        self.assertEqual(variant_url(derivative_urls(sources), source, THUMBNAIL_WIDTH), '/media/test/thumbnail.png')
+        self.assertIsNone(variant_url({}, '', THUMBNAIL_WIDTH))
+
+        self._build()
+        self.assertEqual(variant_url(derivative_urls(sources), source, THUMBNAIL_WIDTH),
+                         '/media/test/thumbnail.w320.webp')
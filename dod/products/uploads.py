@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from core.sms.payload import image_content_hash, find_mms_payloads, transcode_mms_payload, save_mms_payloads
+from products.derivatives import request_derivatives, THUMBNAIL_WIDTH
+from products.models import CustomGifticon
+from projects.counters import bump_counter
+
+
+def _upload(field, gifticon, image, transcode):
+    """
+    thread pool 에서 실행합니다. (db 를 사용하지 않음)
+    변환은 storage 에 저장하기 전에 합니다. (저장 후에는 storage 에 따라 파일이 닫혀 있을 수 있음)
+    :return: (저장된 이미지 이름, MMS 용 jpg 또는 None)
+    """
+    jpg = None
+    if transcode:
+        image.seek(0)
+        jpg = transcode_mms_payload(image.read())
+        image.seek(0)
+    name = field.storage.save(field.generate_filename(gifticon, image.name), image, max_length=field.max_length)
+    return name, jpg
+
+
+def create_custom_gifticons(project, item_id, images):
+    """
+    직접 업로드한 기프티콘 이미지들을 thread pool 에서 동시에 storage 에 올리고 CustomGifticon 을 한번에 생성합니다.
+    전체 업로드 시간이 이미지 수에 비례하지 않고 가장 느린 업로드 정도가 되도록 합니다.
+    MMS payload 는 처음 보는 이미지만 업로드와 같이 변환합니다.
+    bulk_create 는 signal 을 보내지 않기 때문에 payload 연결, counter, 썸네일 변환 요청은 여기서 직접 합니다.
+    :return: 생성한 CustomGifticon list
+    """
+    field = CustomGifticon._meta.get_field('gifticon_img')
+    gifticons = [CustomGifticon(project=project, item_id=item_id) for _ in images]
+    hashes = [image_content_hash(image) for image in images]
+    payloads = find_mms_payloads(hashes)
+
+    # 같은 이미지를 여러장 올린 경우 한번만 변환합니다.
+    seen = set(payloads)
+    transcodes = []
+    for content_hash in hashes:
+        transcodes.append(content_hash not in seen)
+        seen.add(content_hash)
+
+    workers = min(settings.CUSTOM_UPLOAD_WORKERS, len(images))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_upload, field, gifticon, image, transcode)
+                   for gifticon, image, transcode in zip(gifticons, images, transcodes)]
+        results = [future.result() for future in futures]
+
+    payloads.update(save_mms_payloads({content_hash: jpg for content_hash, (_, jpg) in zip(hashes, results)
+                                       if jpg is not None}))
+    for gifticon, content_hash, (name, _) in zip(gifticons, hashes, results):
+        gifticon.gifticon_img = name
+        gifticon.mms_payload = payloads.get(content_hash)
+    CustomGifticon.objects.bulk_create(gifticons)
+    bump_counter(project.id, custom_gifticon_count=len(gifticons))
+    request_derivatives([(gifticon.gifticon_img.name, THUMBNAIL_WIDTH) for gifticon in gifticons])
+    return gifticons
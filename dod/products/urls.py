@@ -1,12 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ItemListViewSet
+from .views import ItemListViewSet, RewardUploadViewSet
 
 app_name = 'products'
 
 
 router = DefaultRouter()
 router.register('products', ItemListViewSet, basename='products')
+router.register('reward_uploads', RewardUploadViewSet, basename='reward-uploads')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,11 +1,16 @@
 from django.shortcuts import render
 
 # Create your views here.
-from rest_framework import viewsets, mixins
-from rest_framework.permissions import AllowAny
+from django.db import transaction
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.response import Response
 
+from core.content_cache import content_response, PRODUCTS
+from products.direct_uploads import reward_upload_targets, finalize_rewards
 from products.models import Item
-from products.serializers import ItemRetrieveSerializer
+from products.serializers import ItemRetrieveSerializer, RewardUploadTargetSerializer, RewardUploadFinalizeSerializer
 
 
 class ItemListViewSet(mixins.ListModelMixin,
@@ -15,4 +20,48 @@ class ItemListViewSet(mixins.ListModelMixin,
     serializer_class = ItemRetrieveSerializer
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        """
+        api: api/v1/products/
+        상품 목록은 staff 가 수정할 때만 바뀌기 때문에 캐시된 내용을 내려줍니다.
+        """
+        return content_response(request, 'item_list', [PRODUCTS],
+                                lambda: self.get_serializer(self.get_queryset(), many=True).data)
+
     # TODO : project 생성페이지 리뉴얼
+
+
+class RewardUploadViewSet(viewsets.GenericViewSet):
+    """
+    staff 가 결제상품의 실물 기프티콘(Reward) 이미지를 서버를 거치지 않고 storage 에 바로 올릴 때 사용합니다.
+    """
+    permission_classes = [IsAdminUser]
+
+    @action(methods=['post'], detail=False)
+    def targets(self, request, *args, **kwargs):
+        """
+        api: api/v1/reward_uploads/targets
+        method : POST
+        :data: {'product': product.id, 'files': [{'name': 'a.jpg', 'content_type': 'image/jpeg'}, ...]}
+        :return: [{'method', 'url', 'fields', 'upload_key'}, ...]
+        """
+        serializer = RewardUploadTargetSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        targets = reward_upload_targets(serializer.validated_data['product'], serializer.validated_data['files'])
+        return Response(targets, status=status.HTTP_200_OK)
+
+    @transaction.atomic
+    @action(methods=['post'], detail=False)
+    def finalize(self, request, *args, **kwargs):
+        """
+        api: api/v1/reward_uploads/finalize
+        method : POST
+        :data: {'product': product.id, 'due_date': '2021.12.31', 'upload_keys': ['...', '...']}
+        :return: {'product', 'count'}
+        """
+        serializer = RewardUploadFinalizeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        product = serializer.validated_data['product']
+        rewards = finalize_rewards(product, serializer.validated_data['upload_keys'],
+                                   serializer.validated_data['due_date'])
+        return Response({'product': product.id, 'count': len(rewards)}, status=status.HTTP_201_CREATED)
@@ -0,0 +1,49 @@
+import time
+from collections import namedtuple
+
+from projects.models import Project
+
+# 다른 프로세스에서 저장한 변경은 signal 로 지울 수 없으므로 이 시간이 지나면 다시 읽습니다.
+SNAPSHOT_TTL_SECONDS = 30
+SNAPSHOT_MAX_SIZE = 5000
+
+_SNAPSHOT_FIELDS = ('id', 'project_hash_key', 'kind', 'status', 'is_active', 'start_at', 'dead_at', 'owner__phone')
+
+_snapshots = {}
+
+
+class ProjectSnapshot(namedtuple('ProjectSnapshot', ['id', 'project_hash_key', 'kind', 'status', 'is_active',
+                                                     'start_at', 'dead_at', 'owner_phone'])):
+    """
+    응답자 쪽 api 에서 사용하는 project 정보 (read only)
+    """
+    __slots__ = ()
+
+    @property
+    def is_test(self):
+        # 테스트, 온보딩, 활성화 전(작성자 테스트) 추첨
+        return self.kind in [Project.TEST, Project.ONBOARDING] or not self.status
+
+
+def get_project_snapshot(project_hash_key):
+    """
+    project_hash_key 로 ProjectSnapshot 을 리턴합니다. 없으면 None
+    프로세스 안에 캐싱하기 때문에 캐시가 있으면 쿼리하지 않고, 없으면 owner 까지 한번의 쿼리로 읽습니다.
+    """
+    now = time.monotonic()
+    cached = _snapshots.get(project_hash_key)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    row = Project.objects.filter(project_hash_key=project_hash_key).values_list(*_SNAPSHOT_FIELDS).first()
+    if row is None:
+        return None
+    if len(_snapshots) >= SNAPSHOT_MAX_SIZE:
+        _snapshots.clear()
+    snapshot = ProjectSnapshot(*row)
+    _snapshots[project_hash_key] = (now + SNAPSHOT_TTL_SECONDS, snapshot)
+    return snapshot
+
+
+def invalidate_project_snapshot(project_hash_key):
+    _snapshots.pop(project_hash_key, None)
@@ -0,0 +1,182 @@
+import datetime
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from products.models import Product, Reward, CustomGifticon
+from projects.models import Project, ProjectCounter
+from respondent.models import Respondent, TestRespondent
+
+COUNTER_FIELDS = ('respondent_count', 'test_respondent_count', 'won_respondent_count', 'product_count',
+                  'used_reward_count', 'custom_gifticon_count', 'used_custom_gifticon_count')
+
+
+def _count_subquery(queryset, project_field):
+    return Coalesce(Subquery(queryset.order_by().values(project_field).annotate(count=Count('id')).values('count')), 0)
+
+
+def annotate_actual_counts(queryset):
+    """
+    Project queryset 에 실제 테이블에서 센 값을 'actual_<field>' 로 annotate 합니다. (counter 비교/복구용)
+    """
+    project = OuterRef('pk')
+    return queryset.annotate(
+        actual_respondent_count=_count_subquery(
+            Respondent.objects.filter(project=project), 'project'),
+        actual_test_respondent_count=_count_subquery(
+            TestRespondent.objects.filter(project=project), 'project'),
+        actual_won_respondent_count=_count_subquery(
+            Respondent.objects.filter(project=project, is_win=True), 'project'),
+        actual_product_count=_count_subquery(
+            Product.objects.filter(project=project), 'project'),
+        actual_used_reward_count=_count_subquery(
+            Reward.objects.filter(product__project=project, winner_id__isnull=False), 'product__project'),
+        actual_custom_gifticon_count=_count_subquery(
+            CustomGifticon.objects.filter(project=project), 'project'),
+        actual_used_custom_gifticon_count=_count_subquery(
+            CustomGifticon.objects.filter(project=project, winner_id__isnull=False), 'project'),
+    )
+
+
+def actual_counts(project):
+    return {field: getattr(project, 'actual_' + field) for field in COUNTER_FIELDS}
+
+
+_deferred = threading.local()
+
+
+def _update_counter(project_id, updates):
+    updates.update(version=F('version') + 1, updated_at=timezone.now())
+    ProjectCounter.objects.filter(project_id=project_id).update(**updates)
+
+
+@contextmanager
+def defer_counters():
+    """
+    블록 안의 bump_counter/touch_counter 를 모아두었다가 블록이 끝날 때 프로젝트마다 한번의 UPDATE 로 반영합니다.
+    ProjectCounter 는 프로젝트마다 row 가 하나라서, transaction 중간에 갱신하면 commit 까지 같은 프로젝트의 요청이 모두 기다립니다.
+    transaction 의 마지막에 끝나도록 transaction.atomic 안쪽에서 사용해주세요.
+    ex) with transaction.atomic(), defer_counters(): ...
+    """
+    if getattr(_deferred, 'deltas', None) is not None:
+        # 이미 모으는 중이면 바깥 블록에서 한번에 반영합니다.
+        yield
+        return
+    _deferred.deltas = defaultdict(lambda: defaultdict(int))
+    try:
+        yield
+        deltas = _deferred.deltas
+    finally:
+        _deferred.deltas = None
+    # 여러 프로젝트를 갱신할 때 lock 순서가 항상 같도록 id 순서로 반영합니다.
+    for project_id in sorted(deltas):
+        _update_counter(project_id, {field: F(field) + delta for field, delta in deltas[project_id].items() if delta})
+
+
+def bump_counter(project_id, **deltas):
+    """
+    ex) bump_counter(project.id, respondent_count=1, won_respondent_count=1)
+    F() 로 더하기 때문에 동시에 여러 요청이 갱신해도 값이 유실되지 않습니다.
+    counter 가 아직 없는 프로젝트(기존 데이터)는 건너뛰고, 처음 읽을 때 get_counter 가 실제 값으로 만듭니다.
+    """
+    deferred = getattr(_deferred, 'deltas', None)
+    if deferred is not None:
+        if any(deltas.values()):
+            for field, delta in deltas.items():
+                deferred[project_id][field] += delta
+        return
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if updates:
+        _update_counter(project_id, updates)
+
+
+def touch_counter(project_id):
+    """
+    집계값은 그대로지만 대시보드 내용이 바뀐 경우(프로젝트 수정, 기프티콘 이미지 추가 등) version 만 올립니다.
+    """
+    deferred = getattr(_deferred, 'deltas', None)
+    if deferred is not None:
+        # 더할 값 없이 프로젝트만 등록해두면 반영할 때 version 이 올라갑니다.
+        deferred.setdefault(project_id, defaultdict(int))
+        return
+    _update_counter(project_id, {})
+
+
+def rebuild_counter(project):
+    """
+    실제 값으로 counter 를 다시 계산하여 저장합니다.
+    """
+    project = annotate_actual_counts(Project.objects.filter(id=project.id)).get()
+    counts = actual_counts(project)
+    try:
+        with transaction.atomic():
+            counter, created = ProjectCounter.objects.update_or_create(project_id=project.id, defaults=counts)
+            if not created:
+                touch_counter(project.id)
+    except IntegrityError:
+        # 동시에 다른 요청이 먼저 만든 경우
+        counter = ProjectCounter.objects.get(project_id=project.id)
+    return counter
+
+
+def get_counter(project):
+    """
+    project.counter 를 리턴합니다. 없으면(기존 데이터) 실제 값으로 만듭니다.
+    목록에서는 select_related('counter') 로 같이 읽어야 프로젝트마다 쿼리하지 않습니다.
+    """
+    try:
+        return project.counter
+    except ProjectCounter.DoesNotExist:
+        return rebuild_counter(project)
+
+
+def _last_modified(*values):
+    values = [value for value in values if value]
+    return max(values) if values else None
+
+
+def dashboard_state(owner):
+    """
+    owner 의 대시보드 목록이 바뀌었는지 확인하는 (etag, last_modified) 를 한번의 쿼리로 만듭니다.
+    시작/마감 시간이 지나면 project_status 가 바뀌기 때문에 지나간 시작/마감 시간도 last_modified 에 포함합니다.
+    counter 가 없는 프로젝트가 있으면 None 을 리턴합니다. (조건부 요청을 처리하지 않음)
+    """
+    now = datetime.datetime.now()
+    active = Q(is_active=True)
+    state = Project.objects.filter(owner=owner).aggregate(
+        count=Count('id', filter=active),
+        missing=Count('id', filter=active & Q(counter__isnull=True)),
+        version=Sum('counter__version', filter=active),
+        ended=Count('id', filter=active & Q(dead_at__lte=now)),
+        started=Count('id', filter=active & Q(start_at__lte=now)),
+        updated_at=Max('counter__updated_at'),
+        last_dead_at=Max('dead_at', filter=active & Q(dead_at__lte=now)),
+        last_start_at=Max('start_at', filter=active & Q(start_at__lte=now)),
+    )
+    if state['missing']:
+        return None
+    etag = '"dashboard-{count}-{version}-{ended}-{started}"'.format(**state)
+    return etag, _last_modified(state['updated_at'], state['last_dead_at'], state['last_start_at'])
+
+
+def project_dashboard_state(owner, project_id, name, content=None):
+    """
+    dashboard_state 의 프로젝트 하나 버전입니다. name 은 같은 프로젝트의 다른 응답(retrieve, gifticons)을 구분합니다.
+    content 는 counter 밖에서 바뀌는 내용의 (version, 마지막 수정시간) 입니다. ex) gifticons 의 상품 이미지는 item_catalog.state
+    프로젝트 또는 counter 가 없으면 None 을 리턴합니다.
+    """
+    now = datetime.datetime.now()
+    state = Project.objects.filter(id=project_id, owner=owner, is_active=True)\
+        .values_list('counter__version', 'counter__updated_at', 'start_at', 'dead_at').first()
+    if state is None or state[0] is None:
+        return None
+    version, updated_at, start_at, dead_at = state
+    content_version, content_updated_at = content or ('', None)
+    etag = '"{}-{}-{}-{}-{}{}"'.format(name, project_id, version, int(dead_at <= now), int(start_at <= now),
+                                      '-' + content_version if content_version else '')
+    return etag, _last_modified(updated_at, content_updated_at, *[at for at in (start_at, dead_at) if at <= now])
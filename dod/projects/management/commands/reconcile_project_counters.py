@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from projects.counters import COUNTER_FIELDS, annotate_actual_counts, actual_counts, rebuild_counter
+from projects.models import Project, ProjectCounter
+
+
+class Command(BaseCommand):
+    help = 'ProjectCounter 를 실제 응답자/기프티콘 수와 비교하여 다른 프로젝트를 출력하고 다시 계산합니다. ' \
+           '(counter 가 없는 기존 프로젝트는 새로 만듭니다.)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='출력만 하고 저장하지 않습니다.')
+
+    def handle(self, *args, **options):
+        projects = annotate_actual_counts(Project.objects.select_related('counter').order_by('id'))
+        checked = drifted = created = 0
+        for project in projects.iterator():
+            checked += 1
+            counts = actual_counts(project)
+            try:
+                counter = project.counter
+            except ProjectCounter.DoesNotExist:
+                created += 1
+                self.stdout.write('project {}: counter 없음'.format(project.id))
+            else:
+                diff = ['{} {} -> {}'.format(field, getattr(counter, field), counts[field])
+                        for field in COUNTER_FIELDS if getattr(counter, field) != counts[field]]
+                if not diff:
+                    continue
+                drifted += 1
+                self.stdout.write('project {}: {}'.format(project.id, ', '.join(diff)))
+            if not options['dry_run']:
+                # 비교하는 사이에 바뀐 값이 있을 수 있어서 다시 세서 저장합니다.
+                rebuild_counter(project)
+        self.stdout.write('checked: {}, drifted: {}, created: {}{}'.format(
+            checked, drifted, created, ' (dry run)' if options['dry_run'] else ''))
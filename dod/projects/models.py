@@ -19,7 +19,7 @@ class Project(models.Model):
     start_at = models.DateTimeField(help_text="프로젝트 실행일. 프로젝트가 시작되는 날짜와 시간을 입력해야합니다.")
     dead_at = models.DateTimeField(help_text="프로젝트 마감일. 중지시 dead_at을 현재시간으로")
     # project_url = models.URLField(help_text="referrer로 유효성 검증. 해당 Url 접속시 핸드폰 인증 화면으로")
-    project_hash_key = models.CharField(max_length=100)
+    project_hash_key = models.CharField(max_length=100, unique=True)
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='projects')
     status = models.BooleanField(default=False, help_text="상품이 결제 또는 업로드 되면 활성화 됨")
 
@@ -36,3 +36,22 @@ class ProjectMonitoringLog(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="monitoring_logs")
     draw_again = models.BooleanField(default=False, help_text='모니터링 이후 True, 매번 쿼리하지 않기 위해 사용합니다.')
     dead_line_notice = models.BooleanField(default=False, help_text='프로젝트 마감 알림 이후 True, 매번 쿼리하지 않기 위해 사용합니다.')
+
+
+class ProjectCounter(models.Model):
+    """
+    프로젝트별 응답자수, 당첨자수, 기프티콘 수 집계입니다. 대시보드/지난프로젝트/게시판에서 매번 count 하지 않기 위해 사용합니다.
+    응답자 생성, 당첨, 기프티콘 업로드/삭제, 재추첨 시 projects.counters 로 갱신하고,
+    reconcile_project_counters 명령으로 실제 값과 비교하여 복구합니다.
+    version, updated_at 은 대시보드 조건부 요청(ETag, Last-Modified)에 사용합니다.
+    """
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, related_name='counter')
+    respondent_count = models.IntegerField(default=0)
+    test_respondent_count = models.IntegerField(default=0)
+    won_respondent_count = models.IntegerField(default=0, help_text='is_win=True 인 Respondent 수')
+    product_count = models.IntegerField(default=0)
+    used_reward_count = models.IntegerField(default=0, help_text='winner_id 가 있는 Reward 수')
+    custom_gifticon_count = models.IntegerField(default=0)
+    used_custom_gifticon_count = models.IntegerField(default=0, help_text='winner_id 가 있는 CustomGifticon 수')
+    version = models.IntegerField(default=0, help_text='대시보드 내용이 바뀔 때마다 1씩 증가합니다. (ETag)')
+    updated_at = models.DateTimeField(auto_now=True)
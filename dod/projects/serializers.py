@@ -1,13 +1,18 @@
 from django.conf import settings
+from django.db.models import Count, Max, Min, Q
 from rest_framework import serializers
 import random
 import string
 import datetime
 
+from core.content_cache import get_content, NOTICE
 from notice.models import LinkCopyNotice, LinkCopyMessage
 from notice.serializers import LinkNoticeSerializer
-from products.models import Product, CustomGifticon, Item
+from payment.ledger import get_price_ledger
+from products.catalog import item_catalog
+from products.derivatives import derivative_urls, variant_url, THUMBNAIL_WIDTH
 from products.serializers import ProductSimpleDashboardSerializer
+from projects.counters import get_counter
 from projects.models import Project
 
 
@@ -74,21 +79,14 @@ class ProjectDepositInfoRetrieveSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'winner_count', 'total_price']
 
     def get_total_price(self, obj):
-        if obj.custom_gifticons.exists():
-            return 0
-        elif obj.products.exists():
-            products = obj.products.all()
-            total_price = 0
-            for product in products:
-                item_price = product.item.price
-                price = item_price * product.count
-                total_price = total_price + price
-            return total_price
-        else:
-            return 0
+        return get_price_ledger(obj).total_price
 
 
 class ProjectDashboardSerializer(serializers.ModelSerializer):
+    """
+    응답자수, 기프티콘 수는 ProjectCounter 에서 읽습니다.
+    annotate_queryset 으로 counter 를 같이 읽은 queryset 을 사용합니다. (프로젝트 수와 관계없이 한번의 쿼리)
+    """
     total_respondent = serializers.SerializerMethodField()
     start_at = serializers.SerializerMethodField()
     dead_at = serializers.SerializerMethodField()
@@ -101,11 +99,16 @@ class ProjectDashboardSerializer(serializers.ModelSerializer):
                   'start_at', 'dead_at',
                   'project_status', 'progress']
 
+    @staticmethod
+    def annotate_queryset(queryset):
+        return queryset.select_related('counter')
+
     def get_total_respondent(self, obj):
+        counter = get_counter(obj)
         if obj.kind in [Project.TEST, Project.ONBOARDING] or not obj.status:
-            count = obj.test_respondents.all().count()
+            count = counter.test_respondent_count
         else:
-            count = obj.respondents.all().count()
+            count = counter.respondent_count
         return count
 
     def get_start_at(self, obj):  # humanize
@@ -131,13 +134,13 @@ class ProjectDashboardSerializer(serializers.ModelSerializer):
         project = obj
         if not project.status:
             return 0
-        if project.custom_gifticons.exists():
-            total_count = project.custom_gifticons.all().count()
-            used_count = project.custom_gifticons.filter(winner_id__isnull=False).count()
+        counter = get_counter(project)
+        if counter.custom_gifticon_count:
+            total_count = counter.custom_gifticon_count
+            used_count = counter.used_custom_gifticon_count
         else:
-            project_qs = project.products.all().prefetch_related('rewards', 'rewards__winner_id')
-            total_count = project_qs.count()
-            used_count = project_qs.filter(rewards__winner_id__isnull=False).count()
+            total_count = counter.product_count
+            used_count = counter.used_reward_count
         if total_count == 0:
             total_count = 1
         progress = int(round(used_count / total_count, 2) * 100)
@@ -198,17 +201,24 @@ class ProjectLinkSerializer(serializers.ModelSerializer):
         # message = '{}\n{}'.format(message, url)
         return url
 
+    @staticmethod
+    def _link_notice_images():
+        images = {}
+        for kinds in [LinkCopyNotice.DESKTOP, LinkCopyNotice.MOBILE]:
+            link_notice = LinkCopyNotice.objects.filter(is_active=True, kinds=kinds).last()
+            images[kinds] = link_notice.image.url if link_notice.image else None
+        return images
+
+    def _link_notice_image(self, kinds):
+        images, _ = get_content('link_notice_images', [NOTICE], self._link_notice_images)
+        # json 으로 캐시되어 key 가 문자열입니다.
+        return images['{}'.format(kinds)]
+
     def get_pc_url(self, obj):
-        link_notice = LinkCopyNotice.objects.filter(is_active=True, kinds=1).last()
-        if link_notice.image:
-            return link_notice.image.url
-        return None
+        return self._link_notice_image(LinkCopyNotice.DESKTOP)
 
     def get_mobile_url(self, obj):
-        link_notice = LinkCopyNotice.objects.filter(is_active=True, kinds=2).last()
-        if link_notice.image:
-            return link_notice.image.url
-        return None
+        return self._link_notice_image(LinkCopyNotice.MOBILE)
 
 
 class PastProjectSerializer(serializers.ModelSerializer):
@@ -228,7 +238,7 @@ class PastProjectSerializer(serializers.ModelSerializer):
                   'total_price', 'end_winner_count']
 
     def get_total_respondent(self, obj):
-        count = obj.respondents.all().count()
+        count = get_counter(obj).respondent_count
         return count
 
     def get_start_at(self, obj):
@@ -238,16 +248,10 @@ class PastProjectSerializer(serializers.ModelSerializer):
         return obj.dead_at.strftime("%Y년 %m월 %d일")
 
     def get_total_price(self, obj):
-        products = obj.products.all()
-        total_price = 0
-        for product in products:
-            item_price = product.item.price
-            price = item_price * product.count
-            total_price = total_price + price
-        return total_price
+        return get_price_ledger(obj).total_price
 
     def get_end_winner_count(self, obj):
-        return obj.respondents.filter(is_win=True).count()
+        return get_counter(obj).won_respondent_count
 
 
 class ProjectGifticonSerializer(serializers.ModelSerializer):
@@ -259,9 +263,10 @@ class ProjectGifticonSerializer(serializers.ModelSerializer):
         fields = ['id', 'data', 'type']
 
     def project_type(self):
-        if self.obj.products.exists():
+        counter = get_counter(self.obj)
+        if counter.product_count:
             return 1
-        elif self.obj.custom_gifticons.exists() or self.obj.kind == Project.ONBOARDING:
+        elif counter.custom_gifticon_count or self.obj.kind == Project.ONBOARDING:
             return 2
         else:
             return 0
@@ -274,59 +279,65 @@ class ProjectGifticonSerializer(serializers.ModelSerializer):
         self.obj = obj
         project_type = self.project_type()
         if project_type == 1:  # pay
-            products_distinct_ids = self.obj.products.all().values_list('item__id', flat=True).distinct()
-            distinct_products = self.obj.products.filter(item__id__in=products_distinct_ids)
-            empty_dict = {}
-            for product in distinct_products:
-                empty_dict[product.item.id] = product
-            serializer = ProjectProductsGifticonsDetailSerializer(empty_dict.values(), many=True, context={'project': self.obj})
+            serializer = ProjectProductsGifticonsDetailSerializer(self.product_inventory(), many=True)
         else:  # custom upload or onboarding
             # UPDATED 20210829 onboarding
             if self.obj.kind == Project.ONBOARDING:
                 return [{"id": 1,
-                         "thumbnail": Item.objects.get(order=999).thumbnail.url,
+                         "thumbnail": item_catalog.custom_upload_item.thumbnail_url,
                          "is_used": False}]
             else:
-                custom_gifticons = self.obj.custom_gifticons.all()
-                serializer = ProjectCustomGifticonsDetailSerializer(custom_gifticons, many=True)
+                inventory = self.custom_gifticon_inventory()
+                derivatives = derivative_urls([(gifticon['gifticon_img'], THUMBNAIL_WIDTH) for gifticon in inventory])
+                serializer = ProjectCustomGifticonsDetailSerializer(inventory, many=True,
+                                                                    context={'derivatives': derivatives})
 
         return serializer.data
 
+    def product_inventory(self):
+        """
+        item 별 (대표 product id, 전체 수, 남은 수)를 한번의 GROUP BY 쿼리로 읽습니다. 썸네일은 item_catalog 에서 찾습니다.
+        id 는 item 의 마지막 product id, 순서는 item 의 첫 product 순서입니다.
+        """
+        return self.obj.products.values('item').annotate(
+            first_id=Min('id'),
+            product_id=Max('id'),
+            total_count=Count('id', distinct=True),
+            # 기존처럼 products LEFT JOIN rewards 에서 당첨자가 없는 row 를 셉니다. (아직 기프티콘이 없는 product 도 남은 수)
+            left_count=Count('id', filter=Q(rewards__isnull=True) | Q(rewards__winner_id__isnull=True)),
+        ).order_by('first_id')
 
-class ProjectProductsGifticonsDetailSerializer(serializers.ModelSerializer):
-    thumbnail = serializers.SerializerMethodField()
-    total_count = serializers.SerializerMethodField()
-    left_count = serializers.SerializerMethodField()
+    def custom_gifticon_inventory(self):
+        return list(self.obj.custom_gifticons.order_by('id').values('id', 'gifticon_img', 'winner_id'))
 
-    class Meta:
-        model = Product
-        fields = ['id', 'thumbnail', 'total_count', 'left_count']
 
-    def get_thumbnail(self, obj):
-        return obj.item.thumbnail.url
-
-    def get_total_count(self, obj):
-        project = self.context['project']
-        return project.products.filter(item__id=obj.item.id).count()
+class ProjectProductsGifticonsDetailSerializer(serializers.Serializer):
+    """
+    ProjectGifticonSerializer.product_inventory 의 item 별 집계를 받습니다.
+    """
+    id = serializers.IntegerField(source='product_id')
+    thumbnail = serializers.SerializerMethodField()
+    total_count = serializers.IntegerField()
+    left_count = serializers.IntegerField()
 
-    def get_left_count(self, obj):
-        project = self.context['project']
-        return project.products.filter(item__id=obj.item.id, rewards__winner_id__isnull=True).count()
+    def get_thumbnail(self, obj):
+        return item_catalog.get(obj['item']).thumbnail_url
 
 
-class ProjectCustomGifticonsDetailSerializer(serializers.ModelSerializer):
+class ProjectCustomGifticonsDetailSerializer(serializers.Serializer):
+    """
+    ProjectGifticonSerializer.custom_gifticon_inventory 의 values 를 받습니다.
+    그리드에는 원본 대신 변환된 썸네일(context['derivatives'])을 사용합니다.
+    """
+    id = serializers.IntegerField()
     thumbnail = serializers.SerializerMethodField()
     is_used = serializers.SerializerMethodField()
 
-    class Meta:
-        model = CustomGifticon
-        fields = ['id', 'thumbnail', 'is_used']
-
     def get_thumbnail(self, obj):
-        return obj.gifticon_img.url
+        return variant_url(self.context.get('derivatives', {}), obj['gifticon_img'], THUMBNAIL_WIDTH)
 
     def get_is_used(self, obj):
-        if obj.winner_id:
+        if obj['winner_id']:
             return True
         else:
             return False
@@ -341,7 +352,7 @@ class OnboardingGifticonsDetailSerializer(serializers.Serializer):
         fields = ['id', 'thumbnail', 'is_used']
 
     def get_thumbnail(self, obj):
-        url = Item.objects.get(order=999).thumbnail.url
+        url = item_catalog.custom_upload_item.thumbnail_url
         return url
 
     def get_is_used(self, obj):
@@ -0,0 +1,92 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from products.models import Product, Reward, CustomGifticon
+from projects.cache import invalidate_project_snapshot
+from projects.counters import bump_counter, touch_counter
+from projects.models import Project, ProjectCounter
+from respondent.models import Respondent, TestRespondent
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_project_snapshot_cache(sender, instance, **kwargs):
+    invalidate_project_snapshot(instance.project_hash_key)
+
+
+@receiver(post_save, sender=Project)
+def create_project_counter(sender, instance, created, **kwargs):
+    if created:
+        ProjectCounter.objects.create(project=instance)
+    else:
+        touch_counter(instance.id)
+
+
+@receiver(post_save, sender=Respondent)
+def count_created_respondent(sender, instance, created, **kwargs):
+    if created:
+        bump_counter(instance.project_id, respondent_count=1, won_respondent_count=int(instance.is_win))
+
+
+@receiver(post_delete, sender=Respondent)
+def count_deleted_respondent(sender, instance, **kwargs):
+    bump_counter(instance.project_id, respondent_count=-1, won_respondent_count=-int(instance.is_win))
+
+
+@receiver(post_save, sender=TestRespondent)
+def count_created_test_respondent(sender, instance, created, **kwargs):
+    if created:
+        bump_counter(instance.project_id, test_respondent_count=1)
+
+
+@receiver(post_delete, sender=TestRespondent)
+def count_deleted_test_respondent(sender, instance, **kwargs):
+    bump_counter(instance.project_id, test_respondent_count=-1)
+
+
+@receiver(post_save, sender=Product)
+def count_created_product(sender, instance, created, **kwargs):
+    if created:
+        bump_counter(instance.project_id, product_count=1)
+
+
+@receiver(post_delete, sender=Product)
+def count_deleted_product(sender, instance, **kwargs):
+    bump_counter(instance.project_id, product_count=-1)
+
+
+def _reward_project_id(reward):
+    return Product.objects.filter(id=reward.product_id).values_list('project_id', flat=True).first()
+
+
+@receiver(post_save, sender=Reward)
+def count_created_reward(sender, instance, created, **kwargs):
+    # 당첨자 점유는 sampler 에서 세고, 여기서는 당첨자가 지정된 채로 만들어진 경우만 셉니다.
+    if not created:
+        return
+    if instance.winner_id:
+        bump_counter(_reward_project_id(instance), used_reward_count=1)
+    else:
+        # 남은 기프티콘 수(대시보드 gifticons)가 바뀜
+        touch_counter(_reward_project_id(instance))
+
+
+@receiver(post_delete, sender=Reward)
+def count_deleted_reward(sender, instance, **kwargs):
+    if instance.winner_id:
+        bump_counter(_reward_project_id(instance), used_reward_count=-1)
+    else:
+        touch_counter(_reward_project_id(instance))
+
+
+@receiver(post_save, sender=CustomGifticon)
+def count_created_custom_gifticon(sender, instance, created, **kwargs):
+    if created:
+        bump_counter(instance.project_id, custom_gifticon_count=1,
+                     used_custom_gifticon_count=int(instance.winner_id is not None))
+
+
+@receiver(post_delete, sender=CustomGifticon)
+def count_deleted_custom_gifticon(sender, instance, **kwargs):
+    bump_counter(instance.project_id, custom_gifticon_count=-1,
+                 used_custom_gifticon_count=-int(instance.winner_id is not None))
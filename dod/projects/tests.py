@@ -1,3 +1,171 @@
-from django.test import TestCase
+import datetime
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 
-# Create your tests here.
+from PIL import Image
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from core.testing import QueryBudgetTestMixin
+from logic.models import DODAveragePercentage
+from products.derivatives import build_pending_derivatives
+from products.models import Brand, Item, Product, Reward, CustomGifticon
+from projects.counters import get_counter
+from projects.models import Project
+from respondent.models import Respondent, RespondentPhoneConfirm
+
+
+class ProjectDashboardQueryBudgetTestCase(QueryBudgetTestMixin, TestCase):
+    """
+    대시보드는 프로젝트, 응답자, 기프티콘 수와 관계없이 query_budgets 안에서 응답해야 합니다.
+    """
+    def setUp(self):
+        now = datetime.datetime.now()
+        owner = User.objects.create_user(phone='01000000000')
+        brand = Brand.objects.create(name='brand')
+        items = [Item.objects.create(order=i, brand=brand, name='item{}'.format(i), price=4000) for i in range(3)]
+        self.projects = []
+        for i in range(5):
+            project = Project.objects.create(name='dashboard', project_hash_key='dashboard{}'.format(i), owner=owner,
+                                             start_at=now - datetime.timedelta(days=1),
+                                             dead_at=now + datetime.timedelta(days=1), status=True, is_active=True)
+            for item in items:
+                product = Product.objects.create(project=project, item=item, count=2)
+                for _ in range(2):
+                    Reward.objects.create(product=product, reward_img='test/reward.jpg')
+            CustomGifticon.objects.create(project=project, gifticon_img='test/custom.jpg')
+            for j in range(3):
+                phone_confirm = RespondentPhoneConfirm.objects.create(phone='0101111{}{:03d}'.format(i, j),
+                                                                      confirm_key='1234', is_confirmed=True)
+                Respondent.objects.create(project=project, phone_confirm=phone_confirm)
+            self.projects.append(project)
+        self.warm_item_catalog()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=owner).key)
+
+    def test_list(self):
+        response = self.client.get('/api/v1/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), len(self.projects))
+        self.assertWithinQueryBudget(response)
+
+    def test_retrieve(self):
+        response = self.client.get('/api/v1/dashboard/{}/'.format(self.projects[0].id))
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+
+    def test_gifticons(self):
+        response = self.client.get('/api/v1/dashboard/{}/gifticons/'.format(self.projects[0].id))
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+
+    def test_gifticons_left_count_includes_products_without_rewards(self):
+        # 결제 후 실물 기프티콘(Reward)이 아직 업로드되지 않은 product 도 남은 수로 셉니다.
+        project = self.projects[0]
+        item = Item.objects.create(order=9, brand=Brand.objects.first(), name='waiting', price=4000)
+        for _ in range(3):
+            Product.objects.create(project=project, item=item, count=1)
+        reward = Reward.objects.filter(product__project=project).order_by('id').first()
+        Reward.objects.filter(id=reward.id).update(winner_id=1)
+        self.warm_item_catalog()
+
+        response = self.client.get('/api/v1/dashboard/{}/gifticons/'.format(project.id))
+        self.assertEqual(response.status_code, 200)
+        counts = [(row['total_count'], row['left_count']) for row in response.data['data']]
+        self.assertEqual(counts, [(1, 1), (1, 2), (1, 2), (3, 3)])
+        self.assertWithinQueryBudget(response)
+
+
+class ProjectOrderReplaceTestCase(TestCase):
+    """
+    주문을 바꿀 때 기존 product 수와 관계없이 ProjectCounter 는 한번만 갱신해야 합니다.
+    """
+    def setUp(self):
+        now = datetime.datetime.now()
+        owner = User.objects.create_user(phone='01000000000')
+        brand = Brand.objects.create(name='brand')
+        self.items = [Item.objects.create(order=i, brand=brand, name='item{}'.format(i), price=4000) for i in range(2)]
+        self.project = Project.objects.create(name='order', project_hash_key='order', owner=owner,
+                                              start_at=now, dead_at=now + datetime.timedelta(days=1))
+        DODAveragePercentage.objects.create(average_percentage=3)
+        self.client = APIClient()
+        self.client.force_authenticate(owner)
+
+    def _add_gifticons(self, item, count):
+        return self.client.post('/api/v1/project/{}/add_gifticons/'.format(self.project.id),
+                                {'items': [{'item': item.id, 'count': count}]}, format='json')
+
+    def test_replace_order_updates_counter_once(self):
+        self.assertEqual(self._add_gifticons(self.items[0], 200).status_code, 201)
+        with CaptureQueriesContext(connection) as context:
+            response = self._add_gifticons(self.items[1], 3)
+        self.assertEqual(response.status_code, 201)
+        counter_updates = [query for query in context.captured_queries
+                           if query['sql'].startswith('UPDATE') and 'projectcounter' in query['sql']]
+        self.assertEqual(len(counter_updates), 1)
+        self.assertEqual(get_counter(Project.objects.get(id=self.project.id)).product_count, 3)
+
+
+def png_file(name):
+    image = BytesIO()
+    Image.new('RGB', (640, 400), 'red').save(image, format='PNG')
+    return ContentFile(image.getvalue(), name=name)
+
+
+class ProjectGifticonsDerivativeTestCase(QueryBudgetTestMixin, TestCase):
+    """
+    썸네일 webp 변환이 끝나면 If-None-Match 로 확인하는 대시보드 gifticons 도 변환된 url 을 다시 내려줘야 합니다.
+    storage 는 로컬 파일시스템으로 대신합니다.
+    """
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='dod-dashboard-derivative-')
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings = override_settings(DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+                                     MEDIA_ROOT=media_root, MEDIA_URL='/media/')
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        now = datetime.datetime.now()
+        owner = User.objects.create_user(phone='01000000000')
+        brand = Brand.objects.create(name='brand')
+        item = Item.objects.create(order=1, brand=brand, name='item', price=4000, thumbnail=png_file('item.png'))
+        self.projects = []
+        for i in range(2):
+            self.projects.append(Project.objects.create(
+                name='derivative', project_hash_key='derivative{}'.format(i), owner=owner, start_at=now,
+                dead_at=now + datetime.timedelta(days=1), status=True, is_active=True))
+        Product.objects.create(project=self.projects[0], item=item, count=1)
+        CustomGifticon.objects.create(project=self.projects[1], gifticon_img=png_file('custom.png'))
+        self.warm_item_catalog()
+        self.client = APIClient()
+        self.client.force_authenticate(owner)
+
+    def _gifticons(self, project, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get('/api/v1/dashboard/{}/gifticons/'.format(project.id), **headers)
+
+    def test_etag_changes_after_build(self):
+        etags = []
+        for project in self.projects:
+            response = self._gifticons(project)
+            self.assertTrue(response.data['data'][0]['thumbnail'].endswith('.png'))
+            self.assertEqual(self._gifticons(project, response['ETag']).status_code, 304)
+            etags.append(response['ETag'])
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            self.assertEqual(build_pending_derivatives(pool, 10), 2)
+        # 다른 서버처럼 RECHECK_SECONDS 가 지나서 catalog 를 다시 확인한 상황
+        self.warm_item_catalog()
+
+        for project, etag in zip(self.projects, etags):
+            response = self._gifticons(project, etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.data['data'][0]['thumbnail'].endswith('.w320.webp'))
+            self.assertWithinQueryBudget(response)
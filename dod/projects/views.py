@@ -1,7 +1,8 @@
-import random
 from operator import itemgetter
 
 from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, AllowAny
@@ -10,17 +11,25 @@ import datetime
 from rest_framework.views import APIView
 from core.slack import deposit_temp_slack_message
 from payment.Bootpay import BootpayApi
+from payment.ledger import record_project_price, get_price_ledger
 from payment.loader import load_credential
 from payment.models import UserDepositLog, PaymentErrorLog
 from payment.serializers import PaymentCancelSerialzier
-from products.models import Item, CustomGifticon, Product
-from products.serializers import ProductCreateSerializer, CustomGifticonCreateSerializer
+from products.catalog import item_catalog
+from products.models import CustomGifticon, Product
+from products.direct_uploads import custom_gifticon_upload_targets, finalize_custom_gifticons
+from products.serializers import ProductCreateSerializer, CustomGifticonUploadSerializer, ProductOrderSerializer, \
+    DirectUploadTargetSerializer, DirectUploadFinalizeSerializer
+from products.uploads import create_custom_gifticons
+from projects.cache import invalidate_project_snapshot, get_project_snapshot
+from projects.counters import bump_counter, dashboard_state, project_dashboard_state, defer_counters
 from projects.models import Project, ProjectMonitoringLog
 from projects.serializers import ProjectCreateSerializer, ProjectDepositInfoRetrieveSerializer, ProjectUpdateSerializer, \
     ProjectDashboardSerializer, SimpleProjectInfoSerializer, ProjectLinkSerializer, PastProjectSerializer, \
     ProjectGifticonSerializer
 from random import sample
-from logic.models import UserSelectLogic, DateTimeLotteryResult, DODAveragePercentage, PercentageResult
+from logic.models import UserSelectLogic, DateTimeLotteryResult
+from logic.percentages import create_percentage_results
 from rest_framework import exceptions
 
 
@@ -118,23 +127,19 @@ class ProjectViewSet(viewsets.ModelViewSet):
             self.project.is_active = True
             self.project.save()
 
+        record_project_price(self.project)
         project_info_serializer = ProjectDepositInfoRetrieveSerializer(self.project)
         return Response(project_info_serializer.data, status=status.HTTP_201_CREATED)
 
     def _create_custom_gifticon(self):
-        item = Item.objects.get(order=999)
-
-        for img in self.custom_upload:
-            data = {
-                    'item': item.id,
-                    'project': self.project.id,
-                    'gifticon_img': img
-                }
-            serializer = CustomGifticonCreateSerializer(data=data)
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
+        item = item_catalog.custom_upload_item
+        serializer = CustomGifticonUploadSerializer(data={'custom_upload': self.custom_upload})
+        serializer.is_valid(raise_exception=True)
+        gifticons = create_custom_gifticons(self.project, item.id, serializer.validated_data['custom_upload'])
+        self._activate_custom_gifticons(len(gifticons))
 
-        self.project.winner_count = len(self.custom_upload)
+    def _activate_custom_gifticons(self, count):
+        self.project.winner_count = count
         self.project.status = True
         self.project.is_active = True
         self.project.save()
@@ -143,26 +148,24 @@ class ProjectViewSet(viewsets.ModelViewSet):
         items = self.data.get('items')
         if not items:
             return Response(status=status.HTTP_400_BAD_REQUEST)
-        winner_count = 0
-        for val in items:
-            winner_count += val.get('count')
-            item_id = val.get('item')
-            pay_price = Item.objects.get(pk=item_id).price
-
-            for i in range(val.get('count')):
-                # UPDATED 2021.07.04
-                # 결제가 붙으면서 업데이트함.
-                self.product_data = {
-                    'item': item_id,
-                    'project': self.project.id,
-                    'price': pay_price
-                }
-                serializer = ProductCreateSerializer(data=self.product_data)
-                serializer.is_valid(raise_exception=True)
-                serializer.save()
+        serializer = ProductOrderSerializer(data=items, many=True)
+        serializer.is_valid(raise_exception=True)
 
-        self.project.winner_count = winner_count
-        self.project.save()
+        # UPDATED 2021.07.04
+        # 결제가 붙으면서 상품 하나당 Product 하나씩 생성합니다. (수백개 주문도 insert 한번)
+        products = []
+        for val in serializer.validated_data:
+            item = item_catalog.get(val['item'])
+            if item is None:
+                raise exceptions.NotFound(detail='상품을 찾을 수 없습니다.')
+            products.extend(Product(project=self.project, item_id=item.id, price=item.price)
+                            for _ in range(val['count']))
+        Product.objects.bulk_create(products, batch_size=500)
+        # bulk_create 는 signal 을 보내지 않기 때문에 counter 를 직접 올립니다.
+        bump_counter(self.project.id, product_count=len(products))
+
+        self.project.winner_count = len(products)
+        self.project.save(update_fields=['winner_count', 'updated_at'])
 
     def _create_project_monitoring_log(self):
         ProjectMonitoringLog.objects.create(project=self.project)
@@ -173,24 +176,15 @@ class ProjectViewSet(viewsets.ModelViewSet):
     def _check_undefined_projects(self):
         user = self.request.user
         undefined_projects = user.projects.filter(is_active=True).filter(deposit_logs__depositor__isnull=True)
+        hash_keys = list(undefined_projects.values_list('project_hash_key', flat=True))
         undefined_projects.update(is_active=False)
+        for hash_key in hash_keys:
+            invalidate_project_snapshot(hash_key)
 
     def _calculate_total_price(self):
-        counts = self.project.products.all().values_list('count', flat=True)
-        if not all(i == 1 for i in counts):
-            # Before Payment
-            prices = self.project.products.all().values_list('item__price', flat=True)
-            mul_price = list(map(lambda x, y: x * y, counts, prices))
-            total_price = 0
-            for i in mul_price:
-                total_price += int(i)
-        else:
-            # UPDATED 2021.07.04
-            # Payment Attached
-            products_price = self.project.products.all().values_list('price', flat=True)
-            total_price = sum(products_price)
-
-        return total_price
+        # UPDATED 2021.07.04 Payment Attached
+        # 상품 생성/변경시 기록한 장부의 합계를 사용합니다.
+        return get_price_ledger(self.project).total_price
 
     def _generate_lucky_time(self):
         # project 생성과 동시에 당첨 logic 자동 생성
@@ -211,16 +205,8 @@ class ProjectViewSet(viewsets.ModelViewSet):
     def _generate_percentage(self):
         # UPDATED 20210725 logic -> percentage
         logic = UserSelectLogic.objects.create(kind=3, project=self.project)
-        total_counts = self.project.winner_count
-        dod_average_percentage = DODAveragePercentage.objects.last().average_percentage
-        average = dod_average_percentage * 10
-        for i in range(total_counts):
-            # dod 평균확률 +- 1%
-            percentage = round(random.randint(abs(average-10), abs(average+10))/1000*100, 2)
-            PercentageResult.objects.create(
-                percentage=percentage,
-                logic=logic
-            )
+        # dod 평균확률 +- 1%
+        create_percentage_results(logic, self.project.winner_count)
 
     def _last_day_random_hour(self):
         return sample(range(1, 25), 1)[0]
@@ -252,17 +238,67 @@ class ProjectViewSet(viewsets.ModelViewSet):
         self.files = request.FILES
         self.project = self.get_object()
 
-        if self.project.products.exists():
-            self.project.products.all().delete()
+        # 기존 주문 삭제(product 마다 post_delete)와 새 주문의 counter 갱신을 한번의 UPDATE 로 반영합니다.
+        with defer_counters():
+            if self.project.products.exists():
+                self.project.products.all().delete()
 
-        if self.files.get('custom_upload'):
-            self.custom_upload = self.files.pop('custom_upload')
-            self._create_custom_gifticon()
-            self._generate_percentage()
-        else:
-            self._create_products()
-            self._generate_percentage()
+            if self.files.get('custom_upload'):
+                self.custom_upload = self.files.pop('custom_upload')
+                self._create_custom_gifticon()
+            else:
+                self._create_products()
+        self._generate_percentage()
 
+        record_project_price(self.project)
+        project_info_serializer = ProjectDepositInfoRetrieveSerializer(self.project)
+        return Response(project_info_serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(methods=['post'], detail=True)
+    def custom_upload_targets(self, request, *args, **kwargs):
+        """
+        직접 업로드할 기프티콘 이미지를 서버를 거치지 않고 storage 에 바로 올리기 위한 upload target 을 발급합니다.
+        api: api/v1/project/<id>/custom_upload_targets
+        method : POST
+        :data: {'files': [{'name': 'a.jpg', 'content_type': 'image/jpeg'}, ...]}
+        :return: [{'method', 'url', 'fields', 'upload_key'}, ...]
+        * method 가 POST 이면 fields + file 을 multipart form 으로 url 에 올리고, 모두 올린 뒤 finalize_custom_upload 를 호출합니다.
+        """
+        project = self.get_object()
+        if project.owner != request.user:
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+        serializer = DirectUploadTargetSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        targets = custom_gifticon_upload_targets(project, item_catalog.custom_upload_item.id,
+                                                 serializer.validated_data['files'])
+        return Response(targets, status=status.HTTP_200_OK)
+
+    @transaction.atomic
+    @action(methods=['post'], detail=True)
+    def finalize_custom_upload(self, request, *args, **kwargs):
+        """
+        custom_upload_targets 로 storage 에 올린 이미지들로 기프티콘을 생성합니다. (add_gifticons 의 custom upload 와 동일)
+        api: api/v1/project/<id>/finalize_custom_upload
+        method : POST
+        :data: {'upload_keys': ['...', '...']}
+        :return: {'id', 'name', 'winner_count', 'total_price'}
+        """
+        self.project = self.get_object()
+        if self.project.owner != request.user:
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+        serializer = DirectUploadFinalizeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        with defer_counters():
+            if self.project.products.exists():
+                self.project.products.all().delete()
+
+            gifticons = finalize_custom_gifticons(self.project, item_catalog.custom_upload_item.id,
+                                                  serializer.validated_data['upload_keys'])
+            self._activate_custom_gifticons(len(gifticons))
+        self._generate_percentage()
+
+        record_project_price(self.project)
         project_info_serializer = ProjectDepositInfoRetrieveSerializer(self.project)
         return Response(project_info_serializer.data, status=status.HTTP_201_CREATED)
 
@@ -339,27 +375,30 @@ class ProjectViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         self.project = serializer.save()
 
-        if self.project.products.exists():
-            self.project.products.all().delete()
+        # 기존 주문 삭제(product 마다 post_delete)와 새 주문의 counter 갱신을 한번의 UPDATE 로 반영합니다.
+        with defer_counters():
+            if self.project.products.exists():
+                self.project.products.all().delete()
 
-        # UPDATED 20210725 custom upload
-        if self.files.get('custom_upload'):
-            self.custom_upload = self.files.pop('custom_upload')
-            self._create_custom_gifticon()
-            self._generate_percentage()
+            # UPDATED 20210725 custom upload
+            if self.files.get('custom_upload'):
+                self.custom_upload = self.files.pop('custom_upload')
+                self._create_custom_gifticon()
+                self._generate_percentage()
 
-        elif self.data.get('items'):
-            self._create_products()
-            # self._generate_lucky_time()  # [DEPRECATED] 20210725 not use lucky time
-            self._generate_percentage()
-            # self._check_undefined_projects() # UPDATED 20210725 not use deposit logs
+            elif self.data.get('items'):
+                self._create_products()
+                # self._generate_lucky_time()  # [DEPRECATED] 20210725 not use lucky time
+                self._generate_percentage()
+                # self._check_undefined_projects() # UPDATED 20210725 not use deposit logs
 
-        else:
-            # UPDATED 20210829 onboarding
-            # 상품 없어도 생성 됨
-            self.project.is_active = True
-            self.project.save()
+            else:
+                # UPDATED 20210829 onboarding
+                # 상품 없어도 생성 됨
+                self.project.is_active = True
+                self.project.save()
 
+        record_project_price(self.project)
         project_info_serializer = ProjectDepositInfoRetrieveSerializer(self.project)
         return Response(project_info_serializer.data, status=status.HTTP_206_PARTIAL_CONTENT)
 
@@ -513,16 +552,22 @@ class ProjectDashboardViewSet(viewsets.GenericViewSet,
     queryset = Project.objects.filter(is_active=True)
     serializer_class = ProjectDashboardSerializer
     pagination_class = None
+    # 인증(token) 쿼리 포함, 프로젝트 수와 관계없이 고정 (core.middleware.QueryBudgetMiddleware)
+    # gifticons 는 item_catalog 재확인(RECHECK_SECONDS 마다 1번) 포함
+    query_budgets = {'list': 3, 'retrieve': 3, 'gifticons': 5}
 
     def get_queryset(self):
         user = self.request.user
         queryset = self.queryset.filter(owner=user).order_by('-id')
+        if self.action in ['list', 'retrieve', 'gifticons']:
+            queryset = ProjectDashboardSerializer.annotate_queryset(queryset)
         return queryset
 
     def list(self, request, *args, **kwargs):
         """
         api: api/v1/dashboard/
         method: GET
+        ETag, Last-Modified 를 내려주며 바뀐 내용이 없으면 304 를 리턴합니다.
         :return
         [
           {"id", "name", "total_respondent", "progress",
@@ -534,28 +579,63 @@ class ProjectDashboardViewSet(viewsets.GenericViewSet,
         ]
 
         """
-        return super(ProjectDashboardViewSet, self).list(request, *args, **kwargs)
+        state = dashboard_state(request.user)
+        return self._conditional_response(request, state, super(ProjectDashboardViewSet, self).list,
+                                          request, *args, **kwargs)
 
     def retrieve(self, request, *args, **kwargs):
         """
         api: api/v1/dashboard/<pk>
         method: GET
         pagination 안됨(조회이기 떄문).
+        ETag, Last-Modified 를 내려주며 바뀐 내용이 없으면 304 를 리턴합니다.
         """
-        return super(ProjectDashboardViewSet, self).retrieve(request, args, kwargs)
+        state = project_dashboard_state(request.user, kwargs['pk'], 'retrieve')
+        return self._conditional_response(request, state, super(ProjectDashboardViewSet, self).retrieve,
+                                          request, args, kwargs)
 
     @action(methods=['get'], detail=True)
     def gifticons(self, request, *args, **kwargs):
+        """
+        api: api/v1/dashboard/<pk>/gifticons
+        method: GET
+        ETag, Last-Modified 를 내려주며 바뀐 내용이 없으면 304 를 리턴합니다.
+        상품 썸네일(webp 변환 등)이 바뀌어도 다시 내려주도록 item_catalog 의 state 도 ETag 에 포함합니다.
+        """
+        state = project_dashboard_state(request.user, kwargs['pk'], 'gifticons', item_catalog.state)
+        return self._conditional_response(request, state, self._gifticons)
+
+    def _gifticons(self):
         project = self.get_object()
         serializer = ProjectGifticonSerializer(project)
         return Response(serializer.data)
 
+    @staticmethod
+    def _conditional_response(request, state, render, *args, **kwargs):
+        """
+        state(etag, last_modified) 가 요청의 If-None-Match / If-Modified-Since 와 같으면 304,
+        다르면 render 결과에 ETag, Last-Modified 를 붙여서 리턴합니다. state 가 None 이면 render 만 합니다.
+        """
+        if state is None:
+            return render(*args, **kwargs)
+        etag, last_modified = state
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = render(*args, **kwargs)
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        # 브라우저가 캐시된 내용을 쓰기 전에 항상 다시 확인하도록 합니다.
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
 
 class PastProjectViewSet(viewsets.GenericViewSet,
                          mixins.ListModelMixin,
                          mixins.RetrieveModelMixin):
     permission_classes = [IsAuthenticated]
-    queryset = Project.objects.filter(is_active=True)
+    queryset = Project.objects.filter(is_active=True).select_related('counter', 'price_ledger')
     serializer_class = PastProjectSerializer
 
     def list(self, request, *args, **kwargs):
@@ -594,7 +674,7 @@ class ProjectValidCheckAPIView(APIView):
         """
         # TODO : Project check & validator check
         project_hash_key = kwargs['slug']
-        project = Project.objects.filter(project_hash_key=project_hash_key).last()
+        project = get_project_snapshot(project_hash_key)
         if not project:
             return Response(status=status.HTTP_404_NOT_FOUND)
         serializer = SimpleProjectInfoSerializer(project)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class RewardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'respondent'
+
+    def ready(self):
+        import respondent.signals
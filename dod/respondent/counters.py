@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from respondent.models import Respondent, RespondentTotalCount
+
+TOTAL_COUNT_PK = 1
+TOTAL_COUNT_CACHE_KEY = 'respondent:total_count'
+TOTAL_COUNT_CACHE_TIMEOUT = 60
+
+
+def bump_total_count(delta):
+    """
+    응답이 커밋된 뒤에 더합니다. 모든 응답이 같은 row 를 갱신하기 때문에 응답 transaction 동안 lock 을 잡지 않기 위함입니다.
+    """
+    transaction.on_commit(lambda: RespondentTotalCount.objects.filter(pk=TOTAL_COUNT_PK)
+                          .update(total_count=F('total_count') + delta))
+
+
+def reconcile_total_count():
+    """
+    실제 Respondent 수로 맞춥니다. (전체 count 를 하기 때문에 주기적인 작업에서만 사용합니다.)
+    :return: (저장되어 있던 값, 실제 값)
+    """
+    actual = Respondent.objects.count()
+    with transaction.atomic():
+        counter, created = RespondentTotalCount.objects.select_for_update()\
+            .get_or_create(pk=TOTAL_COUNT_PK, defaults={'total_count': actual})
+        stored = None if created else counter.total_count
+        if not created and stored != actual:
+            counter.total_count = actual
+            counter.save()
+    cache.set(TOTAL_COUNT_CACHE_KEY, actual, TOTAL_COUNT_CACHE_TIMEOUT)
+    return stored, actual
+
+
+def get_total_count():
+    """
+    캐시 -> counter row(pk 조회) 순서로 읽습니다. row 가 없을 때(최초 1회)만 실제 count 를 합니다.
+    """
+    count = cache.get(TOTAL_COUNT_CACHE_KEY)
+    if count is None:
+        count = RespondentTotalCount.objects.filter(pk=TOTAL_COUNT_PK).values_list('total_count', flat=True).first()
+        if count is None:
+            _, count = reconcile_total_count()
+        cache.set(TOTAL_COUNT_CACHE_KEY, count, TOTAL_COUNT_CACHE_TIMEOUT)
+    return count
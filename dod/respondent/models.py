@@ -86,3 +86,13 @@ class TestRespondent(models.Model):
     phone_confirm = models.OneToOneField(TestRespondentPhoneConfirm, on_delete=models.CASCADE, related_name='test_respondent',
                                          help_text="Phone Confirm 이 True 일때만 Reward 생성")
     is_win = models.BooleanField(default=True, help_text="Reward의 winner_id로 사용해도 되지만, 대시보드 쿼리 속도 향상을 위해 사용")
+
+
+class RespondentTotalCount(models.Model):
+    """
+    전체 Respondent 수 입니다. (랜딩페이지 누적 추첨수)
+    Respondent 생성/삭제시 respondent.counters 로 갱신하고, 주기적으로 실제 count 와 맞춥니다.
+    row 는 하나(pk=1)만 사용합니다.
+    """
+    total_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
@@ -1,6 +1,7 @@
 from rest_framework import serializers, exceptions
 
-from accounts.models import BannedPhoneInfo
+from accounts.banned import banned_phones
+from projects.cache import get_project_snapshot
 from projects.models import Project
 from respondent.models import RespondentPhoneConfirm, Respondent, DeviceMetaInfo, TestRespondent, \
     TestRespondentPhoneConfirm
@@ -14,12 +15,14 @@ class SMSRespondentPhoneCheckSerializer(serializers.Serializer):
         super(SMSRespondentPhoneCheckSerializer, self).validate(attrs)
         phone = attrs.get('phone')
         project_key = attrs.get('project_key')
-        project = Project.objects.get(project_hash_key=project_key)
+        project = get_project_snapshot(project_key)
+        if not project:
+            raise exceptions.NotFound()
 
         if project.kind == Project.ONBOARDING or not project.status:  # 활성화 안됨 -> 작성자 참여 O & 중복 참여 X
             phone_confirm_queryset = TestRespondentPhoneConfirm.objects.filter(phone=phone).\
                 prefetch_related('test_respondent', 'test_respondent__project')
-            test_real_phone_confirm_queryset = phone_confirm_queryset.filter(test_respondent__project__project_hash_key=project_key)
+            test_real_phone_confirm_queryset = phone_confirm_queryset.filter(test_respondent__project_id=project.id)
             if test_real_phone_confirm_queryset.filter(is_confirmed=True).exists():
                 msg = '이미 추첨에 참여하셨어요!'
                 raise exceptions.ValidationError(msg)
@@ -27,14 +30,14 @@ class SMSRespondentPhoneCheckSerializer(serializers.Serializer):
         elif project.kind == Project.NORMAL and project.status and project.is_active:  # 정상 작동
             phone_confirm_queryset = RespondentPhoneConfirm.objects.filter(phone=phone)\
                 .prefetch_related('respondent', 'respondent__project')
-            real_phone_confirm_queryset = phone_confirm_queryset.filter(respondent__project__project_hash_key=project_key)
-            if BannedPhoneInfo.objects.filter(phone__icontains=phone).exists():
+            real_phone_confirm_queryset = phone_confirm_queryset.filter(respondent__project_id=project.id)
+            if banned_phones.is_banned(phone):
                 msg = '어뷰징 응답자입니다. 참여할 수 없습니다.'
                 raise exceptions.ValidationError(msg)
             elif real_phone_confirm_queryset.filter(is_confirmed=True).exists():
                 msg = '이미 추첨에 참여하셨어요!'
                 raise exceptions.ValidationError(msg)
-            elif phone == project.owner.phone:
+            elif phone == project.owner_phone:
                 msg = '추첨생성자는 참여할 수 없습니다.'
                 raise exceptions.ValidationError(msg)
 
@@ -53,7 +56,9 @@ class SMSRespondentPhoneConfirmSerializer(serializers.Serializer):
         confirm_key = attrs.get('confirm_key')
         validator = attrs.get('validator')
         project_key = attrs.get('project_key')
-        project = Project.objects.get(project_hash_key=project_key)
+        project = get_project_snapshot(project_key)
+        if not project:
+            raise exceptions.NotFound()
 
         if project.kind in [Project.TEST, Project.ONBOARDING] or not project.status:
             phone_confirm_queryset = TestRespondentPhoneConfirm.objects.filter(phone=phone)
@@ -64,14 +69,14 @@ class SMSRespondentPhoneConfirmSerializer(serializers.Serializer):
         else:
             phone_confirm_queryset = RespondentPhoneConfirm.objects.filter(phone=phone)\
                 .prefetch_related('respondent', 'respondent__project')
-            real_phone_confirm_queryset = phone_confirm_queryset.filter(respondent__project__project_hash_key=project_key)
-            if BannedPhoneInfo.objects.filter(phone__icontains=phone).exists():
+            real_phone_confirm_queryset = phone_confirm_queryset.filter(respondent__project_id=project.id)
+            if banned_phones.is_banned(phone):
                 msg = '어뷰징 응답자입니다. 참여할 수 없습니다.'
                 raise exceptions.ValidationError(msg)
             elif real_phone_confirm_queryset.filter(is_confirmed=True).exists():
                 msg = '이미 추첨에 참여하셨어요!'
                 raise exceptions.ValidationError(msg)
-            elif phone == project.owner.phone:
+            elif phone == project.owner_phone:
                 msg = '추첨생성자는 참여할 수 없습니다.'
                 raise exceptions.ValidationError(msg)
             elif not phone_confirm_queryset.filter(confirm_key=confirm_key, is_confirmed=False).exists():
@@ -90,17 +95,20 @@ class SMSRespondentPhoneConfirmSerializer(serializers.Serializer):
 
 
 class RespondentCreateSerializer(serializers.ModelSerializer):
+    """
+    project 는 view 에서 save(project_id=) 로 넘겨줍니다. (project 조회 쿼리 제거)
+    """
 
     class Meta:
         model = Respondent
-        fields = ['project', 'phone_confirm', 'is_win']
+        fields = ['phone_confirm', 'is_win']
 
 
 class TestRespondentCreateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = TestRespondent
-        fields = ['project', 'phone_confirm', 'is_win']
+        fields = ['phone_confirm', 'is_win']
 
 
 class ClientRefererProjectValidateSerializer(serializers.Serializer):
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from respondent.counters import bump_total_count
+from respondent.models import Respondent
+
+
+@receiver(post_save, sender=Respondent)
+def count_created_respondent(sender, instance, created, **kwargs):
+    if created:
+        bump_total_count(1)
+
+
+@receiver(post_delete, sender=Respondent)
+def count_deleted_respondent(sender, instance, **kwargs):
+    bump_total_count(-1)
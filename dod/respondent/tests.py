@@ -1,3 +1,72 @@
+import datetime
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from core.testing import QueryBudgetTestMixin
+from logic.models import UserSelectLogic, PercentageResult
+from products.models import Brand, Item, Product, Reward
+from projects.counters import get_counter
+from projects.models import Project
+from respondent.models import Respondent, RespondentPhoneConfirm, DeviceMetaInfo
+
+
+class RespondentConfirmQueryBudgetTestCase(QueryBudgetTestMixin, TestCase):
+    """
+    sms/respondent_confirm 은 당첨/미당첨 모두 query_budgets 안에서 응답해야 합니다.
+    인증번호는 직접 만들어서 sms 는 발송하지 않습니다.
+    """
+    def setUp(self):
+        now = datetime.datetime.now()
+        owner = User.objects.create_user(phone='01000000000')
+        self.project = Project.objects.create(name='confirm', project_hash_key='confirmconfirm', owner=owner,
+                                              start_at=now - datetime.timedelta(days=1),
+                                              dead_at=now + datetime.timedelta(days=1),
+                                              winner_count=1, status=True, is_active=True)
+        brand = Brand.objects.create(name='brand')
+        item = Item.objects.create(order=1, brand=brand, name='item', short_name='item', price=4000,
+                                   won_thumbnail='test/won.jpg')
+        logic = UserSelectLogic.objects.create(project=self.project, kind=UserSelectLogic.Percentage)
+        PercentageResult.objects.create(logic=logic, percentage=100)
+        product = Product.objects.create(project=self.project, item=item, count=1)
+        Reward.objects.create(product=product, reward_img='test/reward.jpg', due_date='2099-12-31')
+        self.warm_item_catalog()
+        self.client = APIClient()
+
+    def _confirm(self, phone):
+        confirm = RespondentPhoneConfirm.objects.create(phone=phone, confirm_key='1234')
+        DeviceMetaInfo.objects.create(ip='127.0.0.1', user_agent='test', validator=phone)
+        return self.client.post('/api/v1/sms/respondent_confirm/',
+                                {'phone': phone, 'confirm_key': confirm.confirm_key,
+                                 'project_key': self.project.project_hash_key, 'validator': phone},
+                                format='json')
+
+    def test_confirm_win_and_lose(self):
+        response = self._confirm('01011110000')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['is_win'])
+        self.assertWithinQueryBudget(response)
+
+        # 남은 기프티콘이 없으므로 미당첨
+        response = self._confirm('01011110001')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['is_win'])
+        self.assertWithinQueryBudget(response)
+        self.assertEqual(Respondent.objects.filter(project=self.project).count(), 2)
+
+    def test_counter_is_updated_last(self):
+        # ProjectCounter row lock 을 commit 직전에만 잡도록 counter 갱신은 마지막 write 한번이어야 합니다.
+        with CaptureQueriesContext(connection) as context:
+            response = self._confirm('01011110000')
+        self.assertTrue(response.data['is_win'])
+        writes = [query['sql'] for query in context.captured_queries
+                  if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        counter_writes = [i for i, sql in enumerate(writes) if 'projectcounter' in sql]
+        self.assertEqual(counter_writes, [len(writes) - 1])
 
-# Create your tests here.
+        counter = get_counter(Project.objects.get(id=self.project.id))
+        self.assertEqual((counter.respondent_count, counter.won_respondent_count, counter.used_reward_count),
+                         (1, 1, 1))
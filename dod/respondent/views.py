@@ -15,6 +15,8 @@ from rest_framework.views import APIView
 # Create your views here.
 from core.slack import staff_reward_didnt_upload_slack_message
 from core.tools import get_client_ip
+from products.models import Product
+from projects.cache import get_project_snapshot
 from projects.models import Project
 from respondent.models import DeviceMetaInfo
 from respondent.serializers import ClientRefererProjectValidateSerializer
@@ -56,14 +58,14 @@ class RefererValidatorAPIView(APIView):
             return HttpResponseRedirect(forbidden_url)
 
         project_hash_key = kwargs['slug']
-        self.project = Project.objects.filter(project_hash_key=project_hash_key).last()
+        self.project = get_project_snapshot(project_hash_key)
 
         if not self.project or not self._validate_project(): # 여기에 활성화 전 추가
             # project not started page
             project_not_start_url = base_url + 'invalid'
             return HttpResponseRedirect(project_not_start_url)
 
-        if self.project.products.filter(rewards__isnull=True).exists():
+        if Product.objects.filter(project_id=self.project.id, rewards__isnull=True).exists():
             msg = '[기프티콘 업로드 안됨]\n검색 키: {}\n시작 일: {}\n활성화 여부: {}'\
                 .format(self.project.project_hash_key,
                         self.project.start_at,
@@ -152,7 +154,7 @@ class ClientRefererProjectValidateCheckViewSet(viewsets.GenericViewSet):
             if validator.ip != ip or validator.user_agent != user_agent or validator.is_confirmed:
                 return Response({'dod_status': 999}, status=status.HTTP_200_OK)
 
-            self.project = Project.objects.filter(project_hash_key=data.get('project_key')).last()
+            self.project = get_project_snapshot(data.get('project_key'))
             if not self.project or not self._validate_project():
                 return Response({'dod_status': 400}, status=status.HTTP_200_OK)
 